@@ -1,55 +1,357 @@
 import os
+import logging
 from pathlib import Path
-from dotenv import load_dotenv
-from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Tuple
+from dotenv import load_dotenv, find_dotenv, dotenv_values
+from dataclasses import dataclass, field, fields, replace
 
-load_dotenv()
+# Process environment wins over .env, at startup and on reload
+_BASE_ENV = dict(os.environ)
+ENV_FILE = find_dotenv() or str(Path(__file__).resolve().parent.parent / '.env')
+load_dotenv(ENV_FILE)
+
+# Built-in default of every setting by environment key; on reload a key
+# removed from .env returns to it
+_DEFAULTS: Dict[str, str] = {}
+
+def _env(key: str, default):
+    """os.getenv(key, default), recording the default"""
+    _DEFAULTS[key] = str(default)
+    return os.getenv(key, default)
 
 @dataclass
 class AudioConfig:
-    CHUNK_SIZE: int = int(os.getenv('AUDIO_CHUNK_SIZE', 4096))
-    CHANNELS: int = int(os.getenv('AUDIO_CHANNELS', 1))
-    SAMPLE_RATE: int = int(os.getenv('AUDIO_SAMPLE_RATE', 16000))
-    DEVICE_INDEX: int = int(os.getenv('AUDIO_DEVICE_INDEX', -1))
+    _ENV_PREFIX = 'AUDIO_'
+
+    CHUNK_SIZE: int = int(_env('AUDIO_CHUNK_SIZE', 4096))
+    CHANNELS: int = int(_env('AUDIO_CHANNELS', 1))
+    SAMPLE_RATE: int = int(_env('AUDIO_SAMPLE_RATE', 16000))
+    DEVICE_INDEX: int = int(_env('AUDIO_DEVICE_INDEX', -1))
+    BACKEND: str = _env('AUDIO_BACKEND', 'pyaudio')
+    FRAMES_PER_BUFFER: int = int(_env('AUDIO_FRAMES_PER_BUFFER', 0))
+    QUEUE_MS: int = int(_env('AUDIO_QUEUE_MS', 2000))
+    WAV_PATH: str = _env('AUDIO_WAV_PATH', '')
+    NATIVE_FORMAT: bool = _env('AUDIO_NATIVE_FORMAT', 'True').lower() == 'true'
+    CAPTURE_RATE: int = int(_env('AUDIO_CAPTURE_RATE', 0))
+    CAPTURE_CHANNELS: int = int(_env('AUDIO_CAPTURE_CHANNELS', 0))
+    DEVICE_INDICES: str = _env('AUDIO_DEVICE_INDICES', '')
+    WAV_PATHS: str = _env('AUDIO_WAV_PATHS', '')
+    SPLIT_CHANNELS: bool = _env('AUDIO_SPLIT_CHANNELS', 'False').lower() == 'true'
 
 @dataclass
 class VoskConfig:
-    MODEL_PATH: str = os.getenv('VOSK_MODEL_PATH', './models/vosk_models/vosk-model-ru-0.42-big')
-    TIMEOUT_SECONDS: int = int(os.getenv('VOSK_TIMEOUT_SECONDS', 10))
+    _ENV_PREFIX = 'VOSK_'
+
+    MODEL_PATH: str = _env('VOSK_MODEL_PATH', './models/vosk_models/vosk-model-ru-0.42-big')
+    TIMEOUT_SECONDS: int = int(_env('VOSK_TIMEOUT_SECONDS', 10))
+    MODELS: str = _env('VOSK_MODELS', '')
+    DEFAULT_MODEL: str = _env('VOSK_DEFAULT_MODEL', '')
+    COMMAND_MODEL: str = _env('VOSK_COMMAND_MODEL', '')
+    FALLBACK_MODEL: str = _env('VOSK_FALLBACK_MODEL', '')
+    MEMORY_BUDGET_MB: int = int(_env('VOSK_MEMORY_BUDGET_MB', 0))
+    PRELOAD: bool = _env('VOSK_PRELOAD', 'True').lower() == 'true'
+    USAGE_FILE: str = _env('VOSK_USAGE_FILE', './logs/model_usage.json')
+
+@dataclass
+class WakeConfig:
+    _ENV_PREFIX = 'WAKE_'
+
+    ON_PARTIAL: bool = _env('WAKE_ON_PARTIAL', 'True').lower() == 'true'
+    PARTIAL_STABILITY: int = int(_env('WAKE_PARTIAL_STABILITY', 2))
+    REFRACTORY_MS: int = int(_env('WAKE_REFRACTORY_MS', 2000))
+    MODEL: str = _env('WAKE_MODEL', '')
+    VAD_GATE: bool = _env('WAKE_VAD_GATE', 'False').lower() == 'true'
 
 @dataclass
 class TTSConfig:
-    RATE: int = int(os.getenv('TTS_RATE', 150))
-    VOLUME: float = float(os.getenv('TTS_VOLUME', 0.9))
-    ENGINE: str = os.getenv('TTS_ENGINE', 'sapi5')
+    _ENV_PREFIX = 'TTS_'
+
+    RATE: int = int(_env('TTS_RATE', 150))
+    VOLUME: float = float(_env('TTS_VOLUME', 0.9))
+    ENGINE: str = _env('TTS_ENGINE', 'sapi5')
+    REFERENCE: bool = _env('TTS_REFERENCE', 'False').lower() == 'true'
 
 @dataclass
 class VADConfig:
-    ENERGY_THRESHOLD: int = int(os.getenv('VAD_ENERGY_THRESHOLD', 1000))
-    MIN_DURATION_MS: int = int(os.getenv('VAD_MIN_DURATION_MS', 500))
+    _ENV_PREFIX = 'VAD_'
+
+    ENERGY_THRESHOLD: int = int(_env('VAD_ENERGY_THRESHOLD', 1000))
+    MIN_DURATION_MS: int = int(_env('VAD_MIN_DURATION_MS', 500))
+    FRAME_MS: int = int(_env('VAD_FRAME_MS', 30))
+    TRAILING_SILENCE_MS: int = int(_env('VAD_TRAILING_SILENCE_MS', 700))
+    MATCHED_SILENCE_MS: int = int(_env('VAD_MATCHED_SILENCE_MS', 300))
+    FINAL_SILENCE_MS: int = int(_env('VAD_FINAL_SILENCE_MS', 150))
+
+@dataclass
+class NoiseConfig:
+    _ENV_PREFIX = 'NOISE_'
+
+    ENABLED: bool = _env('NOISE_ENABLED', 'False').lower() == 'true'
+    FRAME_MS: int = int(_env('NOISE_FRAME_MS', 32))
+    HIGHPASS_HZ: int = int(_env('NOISE_HIGHPASS_HZ', 100))
+    STRENGTH: float = float(_env('NOISE_STRENGTH', 2.0))
+    FLOOR_DB: float = float(_env('NOISE_FLOOR_DB', -20))
+    AGC: bool = _env('NOISE_AGC', 'True').lower() == 'true'
+    AGC_TARGET_RMS: int = int(_env('NOISE_AGC_TARGET_RMS', 3000))
+    AGC_MAX_GAIN_DB: float = float(_env('NOISE_AGC_MAX_GAIN_DB', 12))
+    BUDGET_US: int = int(_env('NOISE_BUDGET_US', 2000))
+
+@dataclass
+class EchoConfig:
+    _ENV_PREFIX = 'ECHO_'
+
+    ENABLED: bool = _env('ECHO_ENABLED', 'True').lower() == 'true'
+    TAIL_MS: int = int(_env('ECHO_TAIL_MS', 300))
+    BARGE_IN_RMS: int = int(_env('ECHO_BARGE_IN_RMS', 2500))
+    MAX_DELAY_MS: int = int(_env('ECHO_MAX_DELAY_MS', 250))
+    SUPPRESSION_DB: float = float(_env('ECHO_SUPPRESSION_DB', -30))
+
+@dataclass
+class MultiMicConfig:
+    _ENV_PREFIX = 'MULTI_'
+
+    DECODERS: int = int(_env('MULTI_DECODERS', 1))
+    ACTIVE_SNR_DB: float = float(_env('MULTI_ACTIVE_SNR_DB', 8))
+    HANGOVER_MS: int = int(_env('MULTI_HANGOVER_MS', 800))
+    PREROLL_MS: int = int(_env('MULTI_PREROLL_MS', 500))
+    WINDOW_MS: int = int(_env('MULTI_WINDOW_MS', 1500))
+    SWITCH_DB: float = float(_env('MULTI_SWITCH_DB', 6))
+    CONFIDENCE_DB: float = float(_env('MULTI_CONFIDENCE_DB', 6))
+
+@dataclass
+class CommandsConfig:
+    _ENV_PREFIX = 'COMMANDS_'
+
+    DISABLED: str = _env('COMMANDS_DISABLED', '')
+
+@dataclass
+class PluginsConfig:
+    _ENV_PREFIX = 'PLUGINS_'
+
+    DIR: str = _env('PLUGINS_DIR', './plugins')
+    ENTRY_POINTS: bool = _env('PLUGINS_ENTRY_POINTS', 'True').lower() == 'true'
+    WARMUP: bool = _env('PLUGINS_WARMUP', 'True').lower() == 'true'
+    WARMUP_DELAY_MS: int = int(_env('PLUGINS_WARMUP_DELAY_MS', 3000))
+
+@dataclass
+class BlackBoxConfig:
+    _ENV_PREFIX = 'BLACKBOX_'
+
+    ENABLED: bool = _env('BLACKBOX_ENABLED', 'True').lower() == 'true'
+    FILE: str = _env('BLACKBOX_FILE', './logs/blackbox.ring')
+    MINUTES: float = float(_env('BLACKBOX_MINUTES', 5))
+    EVENT_SLOTS: int = int(_env('BLACKBOX_EVENT_SLOTS', 4096))
+    SNAPSHOT_DIR: str = _env('BLACKBOX_SNAPSHOT_DIR', './logs/blackbox')
+    SNAPSHOT_S: float = float(_env('BLACKBOX_SNAPSHOT_S', 30))
+    MIN_INTERVAL_S: float = float(_env('BLACKBOX_MIN_INTERVAL_S', 60))
+    ON_ERROR: bool = _env('BLACKBOX_ON_ERROR', 'True').lower() == 'true'
+    ON_UNRECOGNIZED: bool = _env('BLACKBOX_ON_UNRECOGNIZED', 'True').lower() == 'true'
+
+@dataclass
+class JournalConfig:
+    _ENV_PREFIX = 'JOURNAL_'
+
+    ENABLED: bool = _env('JOURNAL_ENABLED', 'True').lower() == 'true'
+    FILE: str = _env('JOURNAL_FILE', './logs/commands.db')
+    BATCH_MS: int = int(_env('JOURNAL_BATCH_MS', 500))
+    QUEUE_SIZE: int = int(_env('JOURNAL_QUEUE_SIZE', 1000))
+    RETENTION_DAYS: int = int(_env('JOURNAL_RETENTION_DAYS', 90))
+
+@dataclass
+class DiagConfig:
+    _ENV_PREFIX = 'DIAG_'
+
+    ENABLED: bool = _env('DIAG_ENABLED', 'False').lower() == 'true'
+    SAMPLE_HZ: int = int(_env('DIAG_SAMPLE_HZ', 50))
+    SUMMARY_S: int = int(_env('DIAG_SUMMARY_S', 30))
+    TOP: int = int(_env('DIAG_TOP', 5))
+    DIR: str = _env('DIAG_DIR', './logs/diag')
 
 @dataclass
 class GUIConfig:
-    USE_GUI: bool = os.getenv('GUI_USE_GUI', 'False').lower() == 'true'
-    THEME: str = os.getenv('GUI_THEME', 'dark')
+    _ENV_PREFIX = 'GUI_'
+
+    USE_GUI: bool = _env('GUI_USE_GUI', 'False').lower() == 'true'
+    THEME: str = _env('GUI_THEME', 'dark')
+    VU_FPS: int = int(_env('GUI_VU_FPS', 20))
+    VU_BARS: int = int(_env('GUI_VU_BARS', 40))
+
+@dataclass
+class PerfConfig:
+    _ENV_PREFIX = 'PERF_'
+    # Set while running; a reload keeps the value unless the key is given
+    _RUNTIME_FIELDS = ('CALIBRATED_CHUNK',)
+
+    PROFILE: str = _env('PERF_PROFILE', '')
+    CALIBRATE: bool = _env('PERF_CALIBRATE', 'False').lower() == 'true'
+    CPU_TARGET: float = float(_env('PERF_CPU_TARGET', 0))
+    CALIBRATION_FILE: str = _env('PERF_CALIBRATION_FILE', './logs/perf_calibration.json')
+    # Set by the startup calibration; overrides the profile's chunk size
+    CALIBRATED_CHUNK: int = int(_env('PERF_CALIBRATED_CHUNK', 0))
+
+# Settings each PERF_PROFILE imposes, by section and field, over the
+# individual keys; cpu_target is the default PERF_CPU_TARGET
+PERF_PROFILES = {
+    'low-latency': {'audio': {'CHUNK_SIZE': 1024}, 'vad': {'FRAME_MS': 10},
+                    'wake': {'VAD_GATE': False}, 'gui': {'VU_FPS': 30}, 'cpu_target': 0.5},
+    'balanced': {'audio': {'CHUNK_SIZE': 2048}, 'vad': {'FRAME_MS': 20},
+                 'wake': {'VAD_GATE': True}, 'gui': {'VU_FPS': 20}, 'cpu_target': 0.25},
+    'low-power': {'audio': {'CHUNK_SIZE': 4096}, 'vad': {'FRAME_MS': 30},
+                  'wake': {'VAD_GATE': True}, 'gui': {'VU_FPS': 10}, 'cpu_target': 0.1},
+}
+DEFAULT_CPU_TARGET = 0.25
+
+@dataclass
+class ReloadConfig:
+    _ENV_PREFIX = 'RELOAD_'
+
+    ENABLED: bool = _env('RELOAD_ENABLED', 'True').lower() == 'true'
+    INTERVAL_MS: int = int(_env('RELOAD_INTERVAL_MS', 1000))
 
 @dataclass
 class LoggingConfig:
-    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
-    LOG_FILE: str = os.getenv('LOG_FILE', './logs/voice_assistant.log')
-    ERROR_LOG_FILE: str = os.getenv('ERROR_LOG_FILE', './logs/errors.log')
-    MAX_LOG_SIZE: int = int(os.getenv('MAX_LOG_SIZE', 5242880))
-    BACKUP_COUNT: int = int(os.getenv('BACKUP_COUNT', 3))
+    _ENV_PREFIX = ''
+
+    LOG_LEVEL: str = _env('LOG_LEVEL', 'INFO')
+    LOG_FILE: str = _env('LOG_FILE', './logs/voice_assistant.log')
+    ERROR_LOG_FILE: str = _env('ERROR_LOG_FILE', './logs/errors.log')
+    MAX_LOG_SIZE: int = int(_env('MAX_LOG_SIZE', 5242880))
+    BACKUP_COUNT: int = int(_env('BACKUP_COUNT', 3))
 
 @dataclass
 class Config:
     audio: AudioConfig = field(default_factory=AudioConfig)
     vosk: VoskConfig = field(default_factory=VoskConfig)
+    wake: WakeConfig = field(default_factory=WakeConfig)
     tts: TTSConfig = field(default_factory=TTSConfig)
     vad: VADConfig = field(default_factory=VADConfig)
+    noise: NoiseConfig = field(default_factory=NoiseConfig)
+    echo: EchoConfig = field(default_factory=EchoConfig)
+    multi: MultiMicConfig = field(default_factory=MultiMicConfig)
+    commands: CommandsConfig = field(default_factory=CommandsConfig)
+    plugins: PluginsConfig = field(default_factory=PluginsConfig)
+    blackbox: BlackBoxConfig = field(default_factory=BlackBoxConfig)
+    journal: JournalConfig = field(default_factory=JournalConfig)
+    diag: DiagConfig = field(default_factory=DiagConfig)
     gui: GUIConfig = field(default_factory=GUIConfig)
+    perf: PerfConfig = field(default_factory=PerfConfig)
+    reload: ReloadConfig = field(default_factory=ReloadConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
 
+    def __post_init__(self):
+        """Impose the PERF_PROFILE settings, then a calibrated chunk size"""
+        profile = PERF_PROFILES.get(self.perf.PROFILE.lower(), {})
+        for name, values in profile.items():
+            if isinstance(values, dict):
+                setattr(self, name, replace(getattr(self, name), **values))
+        if self.perf.CALIBRATED_CHUNK > 0:
+            self.audio = replace(self.audio, CHUNK_SIZE=self.perf.CALIBRATED_CHUNK)
+
+    def cpu_target(self) -> float:
+        """PERF_CPU_TARGET, or the profile's when it is 0"""
+        if self.perf.CPU_TARGET > 0:
+            return self.perf.CPU_TARGET
+        return PERF_PROFILES.get(self.perf.PROFILE.lower(), {}).get('cpu_target', DEFAULT_CPU_TARGET)
+
+    def sections(self) -> Dict[str, object]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def from_env(self, env: Mapping[str, str]) -> Tuple['Config', List[str]]:
+        """New snapshot from env over the built-in defaults
+
+        Fields in a section's _RUNTIME_FIELDS keep their current value
+        unless env sets them.
+        """
+        errors = []
+        sections = {}
+        for name, section in self.sections().items():
+            runtime = getattr(section, '_RUNTIME_FIELDS', ())
+            values = {}
+            for f in fields(section):
+                key = section._ENV_PREFIX + f.name
+                if key in env:
+                    raw = env[key]
+                elif f.name in runtime:
+                    continue
+                else:
+                    raw = _DEFAULTS[key]
+                try:
+                    values[f.name] = raw.lower() == 'true' if f.type is bool else f.type(raw)
+                except ValueError:
+                    errors.append(f"{key}: cannot parse {raw!r} as {f.type.__name__}")
+            sections[name] = replace(section, **values)
+        return Config(**sections), errors
+
+    def validate(self) -> List[str]:
+        """Return a list of problems, empty if the configuration is usable"""
+        checks = [
+            (self.audio.CHUNK_SIZE > 0, "AUDIO_CHUNK_SIZE must be positive"),
+            (self.audio.SAMPLE_RATE > 0, "AUDIO_SAMPLE_RATE must be positive"),
+            (self.audio.CHANNELS > 0, "AUDIO_CHANNELS must be positive"),
+            (self.audio.FRAMES_PER_BUFFER >= 0, "AUDIO_FRAMES_PER_BUFFER must not be negative"),
+            (self.audio.QUEUE_MS > 0, "AUDIO_QUEUE_MS must be positive"),
+            (self.audio.BACKEND.lower() in ('pyaudio', 'wav', 'synthetic'), "AUDIO_BACKEND must be pyaudio, wav or synthetic"),
+            (all(index.strip().lstrip('-').isdigit() for index in self.audio.DEVICE_INDICES.split(',') if index.strip()),
+             "AUDIO_DEVICE_INDICES must be a comma-separated list of device indices"),
+            (self.vosk.TIMEOUT_SECONDS > 0, "VOSK_TIMEOUT_SECONDS must be positive"),
+            (self.vosk.MEMORY_BUDGET_MB >= 0, "VOSK_MEMORY_BUDGET_MB must not be negative"),
+            (self.wake.PARTIAL_STABILITY >= 1, "WAKE_PARTIAL_STABILITY must be at least 1"),
+            (self.wake.REFRACTORY_MS >= 0, "WAKE_REFRACTORY_MS must not be negative"),
+            (self.tts.RATE > 0, "TTS_RATE must be positive"),
+            (0 <= self.tts.VOLUME <= 1, "TTS_VOLUME must be between 0 and 1"),
+            (self.vad.ENERGY_THRESHOLD >= 0, "VAD_ENERGY_THRESHOLD must not be negative"),
+            (self.vad.FRAME_MS > 0, "VAD_FRAME_MS must be positive"),
+            (min(self.vad.MIN_DURATION_MS, self.vad.TRAILING_SILENCE_MS, self.vad.MATCHED_SILENCE_MS,
+                 self.vad.FINAL_SILENCE_MS) >= 0, "VAD durations must not be negative"),
+            (self.noise.FRAME_MS > 0, "NOISE_FRAME_MS must be positive"),
+            (self.noise.FLOOR_DB <= 0, "NOISE_FLOOR_DB must not be positive"),
+            (self.noise.AGC_MAX_GAIN_DB >= 0, "NOISE_AGC_MAX_GAIN_DB must not be negative"),
+            (self.multi.DECODERS >= 1, "MULTI_DECODERS must be at least 1"),
+            (min(self.multi.HANGOVER_MS, self.multi.PREROLL_MS, self.multi.WINDOW_MS) >= 0,
+             "MULTI_HANGOVER_MS, MULTI_PREROLL_MS and MULTI_WINDOW_MS must not be negative"),
+            (self.plugins.WARMUP_DELAY_MS >= 0, "PLUGINS_WARMUP_DELAY_MS must not be negative"),
+            (min(self.echo.TAIL_MS, self.echo.MAX_DELAY_MS, self.echo.BARGE_IN_RMS) >= 0,
+             "ECHO_TAIL_MS, ECHO_MAX_DELAY_MS and ECHO_BARGE_IN_RMS must not be negative"),
+            (self.echo.SUPPRESSION_DB <= 0, "ECHO_SUPPRESSION_DB must not be positive"),
+            (self.blackbox.MINUTES > 0, "BLACKBOX_MINUTES must be positive"),
+            (self.blackbox.EVENT_SLOTS > 0, "BLACKBOX_EVENT_SLOTS must be positive"),
+            (self.blackbox.SNAPSHOT_S >= 0, "BLACKBOX_SNAPSHOT_S must not be negative"),
+            (self.journal.BATCH_MS > 0, "JOURNAL_BATCH_MS must be positive"),
+            (self.journal.QUEUE_SIZE > 0, "JOURNAL_QUEUE_SIZE must be positive"),
+            (self.journal.RETENTION_DAYS >= 0, "JOURNAL_RETENTION_DAYS must not be negative"),
+            (0 < self.diag.SAMPLE_HZ <= 1000, "DIAG_SAMPLE_HZ must be between 1 and 1000"),
+            (self.diag.SUMMARY_S > 0, "DIAG_SUMMARY_S must be positive"),
+            (self.gui.VU_FPS > 0, "GUI_VU_FPS must be positive"),
+            (self.gui.VU_BARS > 0, "GUI_VU_BARS must be positive"),
+            (not self.perf.PROFILE or self.perf.PROFILE.lower() in PERF_PROFILES,
+             f"PERF_PROFILE must be empty or one of {', '.join(PERF_PROFILES)}"),
+            (self.perf.CPU_TARGET >= 0, "PERF_CPU_TARGET must not be negative"),
+            (self.reload.INTERVAL_MS > 0, "RELOAD_INTERVAL_MS must be positive"),
+            (isinstance(logging.getLevelName(self.logging.LOG_LEVEL), int), "LOG_LEVEL must be DEBUG, INFO, WARNING or ERROR"),
+        ]
+        return [message for ok, message in checks if not ok]
+
+    def diff(self, other: 'Config') -> Dict[str, Dict[str, tuple]]:
+        """Changed fields per section: {section: {field: (old, new)}}"""
+        changes = {}
+        for name, section in self.sections().items():
+            new_section = getattr(other, name)
+            changed = {f.name: (getattr(section, f.name), getattr(new_section, f.name))
+                       for f in fields(section) if getattr(section, f.name) != getattr(new_section, f.name)}
+            if changed:
+                changes[name] = changed
+        return changes
+
+    def swap(self, other: 'Config'):
+        """Adopt every section of other in one assignment"""
+        self.__dict__ = dict(other.__dict__)
+
+def read_env(env_file: str = None) -> Dict[str, str]:
+    """Current .env values overlaid with the process environment"""
+    values = {key: value for key, value in dotenv_values(env_file or ENV_FILE).items() if value is not None}
+    values.update(_BASE_ENV)
+    return values
+
 config = Config()
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict
+from config.settings import config, read_env, ENV_FILE
+from core.logger import app_logger, log_error
+
+# callback(section, changed) with changed = {field: (old, new)}
+SectionCallback = Callable[[object, Dict[str, tuple]], None]
+
+
+class ConfigWatcher:
+    """Watches .env and applies changed settings while the assistant runs
+
+    On a change the whole file is parsed into a new Config snapshot and
+    validated; an invalid file is reported and ignored. The snapshot is
+    then swapped into the shared config object in one assignment, so a
+    reader sees either the old or the new settings, never a mix.
+    Subscribers are called only for sections whose values changed, with
+    just the changed fields, so each subsystem decides what needs
+    rebuilding. Keys removed from the file return to their defaults.
+    """
+
+    def __init__(self, env_file: str = None, interval_ms: int = None):
+        self.env_file = env_file or ENV_FILE
+        self.interval = (interval_ms or config.reload.INTERVAL_MS) / 1000
+        self.subscribers = defaultdict(list)
+        self.is_running = False
+        self.thread = None
+        self._signature = self._file_signature()
+        self.stats = {'reloads': 0, 'rejected': 0, 'last_reload_ms': 0.0}
+
+    def subscribe(self, section: str, callback: SectionCallback):
+        """Call callback when fields of the given config section change"""
+        self.subscribers[section].append(callback)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.env_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.thread = threading.Thread(target=self._watch_loop, name='config-watcher', daemon=True)
+        self.thread.start()
+        app_logger.info(f"Watching {self.env_file} for config changes")
+
+    def stop(self):
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+
+    def _watch_loop(self):
+        while self.is_running:
+            time.sleep(self.interval)
+            signature = self._file_signature()
+            if signature != self._signature:
+                self._signature = signature
+                self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the config source and apply changes; False if rejected"""
+        start = time.perf_counter()
+        try:
+            snapshot, errors = config.from_env(read_env(self.env_file))
+            errors += snapshot.validate()
+        except Exception as e:
+            log_error("ConfigWatcher.reload", e)
+            return False
+
+        if errors:
+            self.stats['rejected'] += 1
+            app_logger.error(f"Config change rejected, keeping current settings: {'; '.join(errors)}")
+            return False
+
+        changes = config.diff(snapshot)
+        if not changes:
+            return True
+
+        config.swap(snapshot)
+        for name, changed in changes.items():
+            app_logger.info(f"Config {name}: " + ", ".join(f"{key} {old!r} -> {new!r}"
+                                                          for key, (old, new) in changed.items()))
+            if not self.subscribers.get(name):
+                app_logger.warning(f"Config {name} changes take effect after restart")
+            for callback in self.subscribers.get(name, []):
+                try:
+                    callback(getattr(config, name), changed)
+                except Exception as e:
+                    log_error(f"ConfigWatcher.reload({name})", e)
+
+        reload_ms = (time.perf_counter() - start) * 1000
+        self.stats['reloads'] += 1
+        self.stats['last_reload_ms'] = reload_ms
+        app_logger.info(f"Config reloaded in {reload_ms:.1f}ms ({', '.join(changes)})")
+        return True
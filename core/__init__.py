@@ -3,10 +3,22 @@
 __all__ = [
     'AudioCapture',
     'VoiceActivityDetector',
+    'NoiseSuppressor',
+    'EchoGate',
+    'Endpointer',
+    'UtteranceBuffer',
+    'WakeWordEngine',
     'WakeWordDetector',
+    'MultiMicDetector',
     'SpeechToTextPipeline',
+    'ModelManager',
     'TextToSpeechEngine',
     'CommandRouter',
+    'BlackBox',
+    'CommandJournal',
+    'Diagnostics',
+    'PluginRegistry',
+    'CommandSpec',
     'app_logger',
     'error_logger',
 ]
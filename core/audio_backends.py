@@ -0,0 +1,323 @@
+import threading
+import time
+import wave
+from collections import namedtuple
+from typing import Callable, List, Optional
+import numpy as np
+from core.logger import app_logger, log_error
+from config.settings import config
+
+# gated: captured during TTS playback with no barge-in, not to be decoded
+TimestampedChunk = namedtuple('TimestampedChunk', ['data', 'timestamp', 'gated'], defaults=[False])
+
+# on_chunk(data, timestamp, overflow, underflow)
+ChunkCallback = Callable[[bytes, float, bool, bool], None]
+
+
+class AudioBackend:
+    """Audio source feeding AudioCapture from its own thread or callback"""
+
+    name = 'base'
+
+    def __init__(self, rate: int, channels: int, frames_per_buffer: int):
+        """frames_per_buffer is counted at AUDIO_SAMPLE_RATE, so buffer
+        duration stays the same whatever the native device rate is"""
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = max(1, int(round(frames_per_buffer * rate / config.audio.SAMPLE_RATE)))
+
+    def start(self, on_chunk: ChunkCallback):
+        """Start delivering chunks to on_chunk"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop delivering chunks and release the source"""
+        raise NotImplementedError
+
+    def is_active(self) -> bool:
+        raise NotImplementedError
+
+
+class PyAudioBackend(AudioBackend):
+    """Microphone capture through a PortAudio callback stream
+
+    rate or channels of 0 open the device at its native default rate or
+    its full channel count.
+    """
+
+    name = 'pyaudio'
+
+    def __init__(self, rate: int, channels: int, frames_per_buffer: int, device_index: int = -1):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.device_index = device_index
+        self.p = pyaudio.PyAudio()
+        self.stream = None
+        self.on_chunk = None
+
+        if not rate or not channels:
+            if device_index >= 0:
+                device_info = self.p.get_device_info_by_index(device_index)
+            else:
+                device_info = self.p.get_default_input_device_info()
+            rate = rate or int(device_info['defaultSampleRate'])
+            channels = channels or int(device_info['maxInputChannels'])
+
+        super().__init__(rate, channels, frames_per_buffer)
+
+    def start(self, on_chunk: ChunkCallback):
+        pyaudio = self.pyaudio
+        self.on_chunk = on_chunk
+
+        if self.device_index >= 0:
+            device_info = self.p.get_device_info_by_index(self.device_index)
+            app_logger.info(f"Using device: {device_info['name']}")
+
+        self.stream = self.p.open(
+            format=getattr(pyaudio.paInt16, 'value', pyaudio.paInt16),
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            frames_per_buffer=self.frames_per_buffer,
+            input_device_index=self.device_index if self.device_index >= 0 else None,
+            stream_callback=self._callback,
+            start=False
+        )
+        self.stream.start_stream()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Runs on the PortAudio thread: hand off and return immediately
+        self.on_chunk(in_data, time.monotonic(),
+                      bool(status & self.pyaudio.paInputOverflow),
+                      bool(status & self.pyaudio.paInputUnderflow))
+        return (None, self.pyaudio.paContinue)
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        self.p.terminate()
+
+    def is_active(self) -> bool:
+        return self.stream is not None and self.stream.is_active()
+
+
+class _ThreadedBackend(AudioBackend):
+    """Backend producing chunks from a daemon thread, paced like a device"""
+
+    def __init__(self, rate: int, channels: int, frames_per_buffer: int, realtime: bool = True):
+        super().__init__(rate, channels, frames_per_buffer)
+        self.realtime = realtime
+        self.is_running = False
+        self.thread = None
+
+    def start(self, on_chunk: ChunkCallback):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, args=(on_chunk,), name=f'audio-{self.name}', daemon=True)
+        self.thread.start()
+
+    def _run(self, on_chunk: ChunkCallback):
+        period = self.frames_per_buffer / self.rate
+        next_time = time.monotonic()
+
+        try:
+            while self.is_running:
+                data = self._next_buffer()
+                if data is None:
+                    break
+
+                if self.realtime:
+                    next_time += period
+                    delay = next_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                on_chunk(data, time.monotonic(), False, False)
+        except Exception as e:
+            log_error(f"{type(self).__name__}._run", e)
+        finally:
+            self.is_running = False
+
+    def _next_buffer(self) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def stop(self):
+        self.is_running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+
+    def is_active(self) -> bool:
+        return self.is_running
+
+
+class WavFileBackend(_ThreadedBackend):
+    """Replays a 16-bit PCM WAV file as if it were a microphone"""
+
+    name = 'wav'
+
+    def __init__(self, path: str, frames_per_buffer: int, realtime: bool = True, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self.wav = wave.open(str(path), 'rb')
+        if self.wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        super().__init__(self.wav.getframerate(), self.wav.getnchannels(), frames_per_buffer, realtime)
+
+    def _next_buffer(self) -> Optional[bytes]:
+        data = self.wav.readframes(self.frames_per_buffer)
+        if not data and self.loop:
+            self.wav.rewind()
+            data = self.wav.readframes(self.frames_per_buffer)
+        return data or None
+
+    def stop(self):
+        super().stop()
+        self.wav.close()
+
+
+class SyntheticBackend(_ThreadedBackend):
+    """Generates noise with an optional tone, for running without a sound card"""
+
+    name = 'synthetic'
+
+    def __init__(self, rate: int, channels: int, frames_per_buffer: int, realtime: bool = True,
+                 noise_level: float = 100.0, tone_hz: float = 0.0, tone_level: float = 0.0, seed: int = 0):
+        super().__init__(rate, channels, frames_per_buffer, realtime)
+        self.noise_level = noise_level
+        self.tone_hz = tone_hz
+        self.tone_level = tone_level
+        self.rng = np.random.default_rng(seed)
+        self.sample_index = 0
+
+    def _next_buffer(self) -> Optional[bytes]:
+        n = self.frames_per_buffer
+        signal = self.rng.standard_normal(n) * self.noise_level
+        if self.tone_level:
+            t = (self.sample_index + np.arange(n)) / self.rate
+            signal += self.tone_level * np.sin(2 * np.pi * self.tone_hz * t)
+        self.sample_index += n
+
+        samples = np.clip(signal, -32768, 32767).astype(np.int16)
+        if self.channels > 1:
+            samples = np.repeat(samples, self.channels)
+        return samples.tobytes()
+
+
+class ChannelSplitter:
+    """Shares one multichannel backend as one mono backend per channel
+
+    The source starts with the first channel that starts and stops with
+    the last one; each buffer is deinterleaved once per channel.
+    """
+
+    def __init__(self, source: AudioBackend):
+        self.source = source
+        self.callbacks = {}
+        self.lock = threading.Lock()
+        self.backends = [ChannelBackend(self, channel) for channel in range(source.channels)]
+
+    def _start(self, channel: int, on_chunk: ChunkCallback):
+        with self.lock:
+            first = not self.callbacks
+            self.callbacks[channel] = on_chunk
+        if first:
+            self.source.start(self._on_chunk)
+
+    def _stop(self, channel: int):
+        with self.lock:
+            self.callbacks.pop(channel, None)
+            last = not self.callbacks
+        if last:
+            self.source.stop()
+
+    def _on_chunk(self, data: bytes, timestamp: float, overflow: bool, underflow: bool):
+        samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self.source.channels)
+        for channel, on_chunk in list(self.callbacks.items()):
+            on_chunk(samples[:, channel].tobytes(), timestamp, overflow, underflow)
+
+
+class ChannelBackend(AudioBackend):
+    """One channel of a multichannel source, see ChannelSplitter"""
+
+    def __init__(self, splitter: ChannelSplitter, channel: int):
+        source = splitter.source
+        super().__init__(source.rate, 1, config.audio.SAMPLE_RATE)
+        self.name = f'{source.name}-ch{channel}'
+        self.frames_per_buffer = source.frames_per_buffer
+        self.splitter = splitter
+        self.channel = channel
+
+    def start(self, on_chunk: ChunkCallback):
+        self.splitter._start(self.channel, on_chunk)
+
+    def stop(self):
+        self.splitter._stop(self.channel)
+
+    def is_active(self) -> bool:
+        return self.channel in self.splitter.callbacks and self.splitter.source.is_active()
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def multi_stream_configured() -> bool:
+    """True if the audio settings describe more than one microphone stream"""
+    audio = config.audio
+    name = audio.BACKEND.lower()
+    if audio.SPLIT_CHANNELS:
+        return True
+    if name == 'wav':
+        return len(_split_list(audio.WAV_PATHS)) > 1
+    return len(_split_list(audio.DEVICE_INDICES)) > 1
+
+
+def create_backends(frames_per_buffer: int) -> List[AudioBackend]:
+    """Build one backend per microphone stream
+
+    AUDIO_DEVICE_INDICES lists PyAudio devices (for the synthetic backend
+    only their count matters), AUDIO_WAV_PATHS lists WAV files. With
+    AUDIO_SPLIT_CHANNELS every channel of every source is its own stream,
+    e.g. for a microphone array opened as one multichannel device.
+    """
+    audio = config.audio
+    name = audio.BACKEND.lower()
+    indices = [int(index) for index in _split_list(audio.DEVICE_INDICES)]
+
+    if name == 'pyaudio' and indices:
+        if audio.NATIVE_FORMAT:
+            rate, channels = audio.CAPTURE_RATE, audio.CAPTURE_CHANNELS
+        else:
+            rate, channels = audio.SAMPLE_RATE, audio.CHANNELS
+        backends = [PyAudioBackend(rate, channels, frames_per_buffer, index) for index in indices]
+    elif name == 'wav' and _split_list(audio.WAV_PATHS):
+        backends = [WavFileBackend(path, frames_per_buffer, loop=True) for path in _split_list(audio.WAV_PATHS)]
+    elif name == 'synthetic' and indices:
+        backends = [SyntheticBackend(audio.SAMPLE_RATE, audio.CHANNELS, frames_per_buffer, seed=seed)
+                    for seed in range(len(indices))]
+    else:
+        backends = [create_backend(frames_per_buffer)]
+
+    if audio.SPLIT_CHANNELS:
+        backends = [channel for backend in backends
+                    for channel in (ChannelSplitter(backend).backends if backend.channels > 1 else [backend])]
+    return backends
+
+
+def create_backend(frames_per_buffer: int) -> AudioBackend:
+    """Build the backend selected by AUDIO_BACKEND"""
+    name = config.audio.BACKEND.lower()
+
+    if name == 'pyaudio':
+        if config.audio.NATIVE_FORMAT:
+            rate, channels = config.audio.CAPTURE_RATE, config.audio.CAPTURE_CHANNELS
+        else:
+            rate, channels = config.audio.SAMPLE_RATE, config.audio.CHANNELS
+        return PyAudioBackend(rate, channels, frames_per_buffer, config.audio.DEVICE_INDEX)
+    elif name == 'wav':
+        return WavFileBackend(config.audio.WAV_PATH, frames_per_buffer, loop=True)
+    elif name == 'synthetic':
+        return SyntheticBackend(config.audio.SAMPLE_RATE, config.audio.CHANNELS, frames_per_buffer)
+
+    raise ValueError(f"Unknown audio backend: {config.audio.BACKEND}")
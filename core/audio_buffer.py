@@ -0,0 +1,68 @@
+import wave
+import numpy as np
+from core.logger import app_logger
+from config.settings import config
+
+class UtteranceBuffer:
+    """Preallocated 16-bit mono buffer for one utterance with a hard size cap"""
+
+    def __init__(self, max_seconds: float = None, sample_rate: int = None):
+        self.RATE = sample_rate or config.audio.SAMPLE_RATE
+        self.MAX_SECONDS = max_seconds or config.vosk.TIMEOUT_SECONDS
+        self.MAX_BYTES = int(self.MAX_SECONDS * self.RATE) * 2
+
+        self._data = bytearray(self.MAX_BYTES)
+        self._view = memoryview(self._data)
+        self._samples = np.frombuffer(self._data, dtype=np.int16)
+        self.length = 0
+        self.dropped_bytes = 0
+
+        app_logger.info(f"UtteranceBuffer initialized: {self.MAX_SECONDS}s cap, {self.MAX_BYTES} bytes")
+
+    def clear(self):
+        """Forget buffered audio, keeping the allocation"""
+        self.length = 0
+        self.dropped_bytes = 0
+
+    def append(self, audio_chunk) -> memoryview:
+        """Copy chunk into buffer and return a view of the stored region
+
+        Audio past the cap is dropped and counted in dropped_bytes.
+        """
+        chunk_view = memoryview(audio_chunk).cast('B')
+        start = self.length
+        n_bytes = min(len(chunk_view), self.MAX_BYTES - start)
+        n_bytes -= n_bytes % 2
+
+        if n_bytes > 0:
+            self._view[start:start + n_bytes] = chunk_view[:n_bytes]
+            self.length += n_bytes
+        self.dropped_bytes += len(chunk_view) - n_bytes
+
+        return self._view[start:self.length]
+
+    def view(self, start: int = 0, end: int = None) -> memoryview:
+        """Zero-copy view of buffered bytes"""
+        end = self.length if end is None else min(end, self.length)
+        return self._view[start:end]
+
+    def samples(self) -> np.ndarray:
+        """Zero-copy int16 view of buffered samples"""
+        return self._samples[:self.length // 2]
+
+    def is_full(self) -> bool:
+        return self.length >= self.MAX_BYTES
+
+    def duration_ms(self) -> float:
+        return self.length / 2 / self.RATE * 1000
+
+    def write_wav(self, path: str):
+        """Save buffered audio as WAV"""
+        with wave.open(str(path), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.RATE)
+            wf.writeframes(self.view())
+
+    def __len__(self):
+        return self.length
@@ -1,70 +1,217 @@
-import pyaudio
+import threading
+import time
 import numpy as np
 from collections import deque
+from typing import Optional
 from core.logger import app_logger, log_error
+from core.audio_backends import AudioBackend, TimestampedChunk, create_backend
+from core.resampler import InputConditioner
+from core.noise_suppression import NoiseSuppressor
+from core.echo_gate import EchoGate
 from config.settings import config
 
 class AudioCapture:
     """Handles audio capture from microphone"""
     
-    def __init__(self):
+    def __init__(self, backend: AudioBackend = None, data_ready: threading.Event = None):
+        """data_ready may be shared by captures read from one thread"""
         self.CHUNK = config.audio.CHUNK_SIZE
-        self.FORMAT = getattr(pyaudio.paInt16, 'value', pyaudio.paInt16)
         self.CHANNELS = config.audio.CHANNELS
         self.RATE = config.audio.SAMPLE_RATE
+        self.FRAMES_PER_BUFFER = config.audio.FRAMES_PER_BUFFER or self.CHUNK
+        
+        queue_len = max(2, int(config.audio.QUEUE_MS / 1000 * self.RATE / self.FRAMES_PER_BUFFER))
+        self.queue = deque(maxlen=queue_len)
+        self._data_ready = data_ready or threading.Event()
+        self.level_feed = None
+        self.recorder = None
+        self._reset_stats()
         
-        self.p = pyaudio.PyAudio()
-        self.stream = None
+        self.backend = backend
+        self.conditioner = None
+        self.echo_gate = EchoGate(self.RATE) if config.echo.ENABLED else None
+        self.stages = []
+        if config.noise.ENABLED:
+            self.stages.append(NoiseSuppressor(self.RATE, max_chunk=2 * self.CHUNK))
         self._init_stream()
         
-        app_logger.info(f"AudioCapture initialized: {self.RATE}Hz, {self.CHANNELS}ch, {self.CHUNK} chunk")
+        app_logger.info(f"AudioCapture initialized: {self.RATE}Hz, {self.CHANNELS}ch, {self.CHUNK} chunk, "
+                        f"{self.FRAMES_PER_BUFFER} frames/buffer, backend={self.backend.name} "
+                        f"({self.backend.rate}Hz, {self.backend.channels}ch)")
     
     def _init_stream(self):
         """Initialize audio stream"""
         try:
-            device_index = config.audio.DEVICE_INDEX
+            if self.backend is None:
+                self.backend = create_backend(self.FRAMES_PER_BUFFER)
             
-            if device_index >= 0:
-                device_info = self.p.get_device_info_by_index(device_index)
-                app_logger.info(f"Using device: {device_info['name']}")
+            native_frames = int(self.CHUNK * self.backend.rate / self.RATE)
+            self._native_chunk_bytes = native_frames * 2 * self.backend.channels
             
-            self.stream = self.p.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK,
-                input_device_index=device_index if device_index >= 0 else None,
-                start=False
-            )
+            if self.backend.rate != self.RATE or self.backend.channels != self.CHANNELS:
+                self.conditioner = InputConditioner(self.backend.rate, self.backend.channels, self.RATE,
+                                                    max_frames=native_frames + self.backend.frames_per_buffer)
+                self.CHANNELS = 1
             
-            self.stream.start_stream()
+            self.backend.start(self._on_chunk)
             app_logger.info("Audio stream started")
             
         except Exception as e:
             log_error("AudioCapture._init_stream", e)
             raise
     
+    def _reset_stats(self):
+        self.stats = {
+            'chunks': 0,
+            'queue_overflows': 0,
+            'device_overflows': 0,
+            'device_underflows': 0,
+            'timeouts': 0,
+            'gated': 0,
+            'gated_s': 0.0,
+            'jitter_ms_avg': 0.0,
+            'jitter_ms_max': 0.0,
+        }
+        self._last_timestamp = None
+    
+    def _on_chunk(self, data: bytes, timestamp: float, overflow: bool, underflow: bool):
+        """Producer side, runs on the backend thread: no locks, no waiting"""
+        stats = self.stats
+        stats['chunks'] += 1
+        if overflow:
+            stats['device_overflows'] += 1
+        if underflow:
+            stats['device_underflows'] += 1
+        
+        if self._last_timestamp is not None:
+            expected = len(data) / 2 / self.backend.channels / self.backend.rate
+            jitter_ms = abs(timestamp - self._last_timestamp - expected) * 1000
+            stats['jitter_ms_avg'] += (jitter_ms - stats['jitter_ms_avg']) * 0.05
+            if jitter_ms > stats['jitter_ms_max']:
+                stats['jitter_ms_max'] = jitter_ms
+        self._last_timestamp = timestamp
+        
+        if len(self.queue) == self.queue.maxlen:
+            stats['queue_overflows'] += 1  # deque drops the oldest chunk
+        self.queue.append(TimestampedChunk(data, timestamp))
+        self._data_ready.set()
+    
+    def get_timestamped_chunk(self, timeout=1.0) -> Optional[TimestampedChunk]:
+        """Get next chunk with its capture time, waiting at most timeout seconds
+        
+        Buffers already queued are coalesced up to CHUNK frames, so a small
+        AUDIO_FRAMES_PER_BUFFER keeps latency low while a consumer that
+        falls behind catches up in fewer iterations. Audio captured in the
+        device's native format is converted to mono at SAMPLE_RATE, handed
+        to the recorder if one is attached, checked by the echo gate, then
+        passed through the processing stages in order.
+        """
+        chunk = self._next_native_chunk(timeout)
+        if chunk is None:
+            return None
+        
+        data = chunk.data
+        if self.conditioner is not None:
+            data = self.conditioner.process(data)
+        if self.recorder is not None:
+            self.recorder.write_audio(data)
+        gated = False
+        if self.echo_gate is not None:
+            data = self.echo_gate.process(data, chunk.timestamp)
+            gated = self.echo_gate.gated
+        for stage in self.stages:
+            data = stage.process(data)
+        
+        return TimestampedChunk(data, chunk.timestamp, gated)
+    
+    def _next_native_chunk(self, timeout: float) -> Optional[TimestampedChunk]:
+        """Pop and coalesce queued backend buffers"""
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            try:
+                first = self.queue.popleft()
+                break
+            except IndexError:
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and not self.backend.is_active():
+                    # A stopped or failed device: still honour the timeout, so callers
+                    # polling in a loop do not spin
+                    time.sleep(remaining)
+                    remaining = 0
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    return None
+                self._data_ready.wait(remaining)
+                self._data_ready.clear()
+        
+        chunk_bytes = self._native_chunk_bytes
+        if len(first.data) >= chunk_bytes or not self.queue:
+            return first
+        
+        parts = [first.data]
+        size = len(first.data)
+        while size < chunk_bytes:
+            try:
+                part = self.queue.popleft()
+            except IndexError:
+                break
+            parts.append(part.data)
+            size += len(part.data)
+        
+        return TimestampedChunk(b''.join(parts), first.timestamp)
+    
     def get_audio_chunk(self, timeout=1.0):
-        """Get single audio chunk"""
+        """Get single audio chunk; None on timeout or while gated during TTS playback"""
         try:
-            if not self.stream or not self.stream.is_active():
+            chunk = self.get_timestamped_chunk(timeout)
+            if chunk is None:
                 return None
+            if chunk.gated:
+                # Chunks are coalesced from backend buffers, so their length varies
+                self.stats['gated'] += 1
+                self.stats['gated_s'] += len(chunk.data) / 2 / self.RATE
+                return None
+            
+            if self.level_feed is not None:
+                self.level_feed.publish(chunk.data)
             
-            data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-            return data
+            return chunk.data
             
         except Exception as e:
             log_error("AudioCapture.get_audio_chunk", e)
             return None
     
+    def apply_config(self, noise, changed: dict):
+        """Rebuild processing stages for new NOISE_* settings"""
+        stages = [NoiseSuppressor(self.RATE, max_chunk=2 * self.CHUNK)] if noise.ENABLED else []
+        self.stages = stages
+    
+    def discard_until(self, timestamp: float):
+        """Drop queued audio captured up to timestamp"""
+        queue = self.queue
+        while queue and queue[0].timestamp <= timestamp:
+            queue.popleft()
+    
+    def flush(self):
+        """Drop queued audio"""
+        self.queue.clear()
+        self._data_ready.clear()
+    
+    def get_stats(self) -> dict:
+        """Capture counters: overflows, underflows, timeouts and jitter"""
+        stats = dict(self.stats, queued=len(self.queue))
+        for stage in self.stages:
+            stats[type(stage).__name__] = stage.get_stats()
+        if self.echo_gate is not None:
+            stats['EchoGate'] = self.echo_gate.get_stats()
+        return stats
+    
     def stop(self):
         """Stop audio capture"""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        self.p.terminate()
-        app_logger.info("Audio capture stopped")
+        self.backend.stop()
+        self._data_ready.set()
+        app_logger.info(f"Audio capture stopped: {self.get_stats()}")
 
 
 class VoiceActivityDetector:
@@ -75,6 +222,8 @@ class VoiceActivityDetector:
         self.RATE = config.audio.SAMPLE_RATE
         self.THRESHOLD = config.vad.ENERGY_THRESHOLD
         self.MIN_DURATION = config.vad.MIN_DURATION_MS
+        self.FRAME_SIZE = max(1, int(self.RATE * config.vad.FRAME_MS / 1000))
+        self._scratch = np.empty(self.CHUNK, dtype=np.float32)
         
         self.buffer = deque(maxlen=int(self.RATE / self.CHUNK * 2))
         self.is_voice_active = False
@@ -83,6 +232,12 @@ class VoiceActivityDetector:
         
         app_logger.info(f"VAD initialized: threshold={self.THRESHOLD}, min_duration={self.MIN_DURATION}ms")
     
+    def apply_config(self, vad, changed: dict):
+        """Take new VAD_* settings; no state is lost"""
+        self.THRESHOLD = vad.ENERGY_THRESHOLD
+        self.MIN_DURATION = vad.MIN_DURATION_MS
+        self.FRAME_SIZE = max(1, int(self.RATE * vad.FRAME_MS / 1000))
+    
     def reset(self):
         """Reset VAD state"""
         self.buffer.clear()
@@ -90,15 +245,38 @@ class VoiceActivityDetector:
         self.voice_start_time = None
         self.silence_start_time = None
     
+    def _squared(self, audio_data):
+        """Square samples into a reusable float32 scratch buffer"""
+        if len(audio_data) > len(self._scratch):
+            self._scratch = np.empty(len(audio_data), dtype=np.float32)
+        
+        squared = self._scratch[:len(audio_data)]
+        np.multiply(audio_data, audio_data, out=squared, dtype=np.float32)
+        return squared
+    
     def get_energy(self, audio_chunk):
         """Calculate energy of audio chunk"""
         try:
             audio_data = np.frombuffer(audio_chunk, dtype=np.int16)
-            energy = np.sqrt(np.mean(audio_data.astype(float) ** 2))
+            energy = np.sqrt(np.mean(self._squared(audio_data)))
             return energy
         except:
             return 0
     
+    def frame_energies(self, audio_chunk):
+        """Calculate energy of each VAD frame in audio chunk"""
+        audio_data = np.frombuffer(audio_chunk, dtype=np.int16)
+        n_frames = len(audio_data) // self.FRAME_SIZE
+        
+        if len(audio_data) == 0:
+            return np.zeros(0)
+        elif n_frames == 0:
+            frames = self._squared(audio_data).reshape(1, -1)
+        else:
+            frames = self._squared(audio_data[:n_frames * self.FRAME_SIZE]).reshape(n_frames, self.FRAME_SIZE)
+        
+        return np.sqrt(np.mean(frames, axis=1))
+    
     def detect_speech_start(self, audio_chunk):
         """Detect speech start (voice activity onset)"""
         energy = self.get_energy(audio_chunk)
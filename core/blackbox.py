@@ -0,0 +1,255 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import wave
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from core.logger import app_logger, log_error
+from config.settings import config
+
+MAGIC = b'VABBOX01'
+# magic, sample rate, event slots, audio capacity (bytes), audio written (bytes), events written
+HEADER = struct.Struct('<8sIIQQQ')
+HEADER_SIZE = 4096
+COUNTER = struct.Struct('<Q')
+AUDIO_WRITTEN_OFFSET = 24
+EVENTS_WRITTEN_OFFSET = 32
+
+# sample position, wall time, kind, text length, value, UTF-8 text
+EVENT = struct.Struct('<QdHHf100s4x')
+EVENT_KINDS = ('note', 'start', 'wake', 'endpoint', 'recognized', 'command', 'unrecognized', 'error', 'snapshot',
+               'tts')
+EVENT_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+
+
+class BlackBox:
+    """Always-on recorder of recent audio and pipeline events
+
+    Audio (mono int16 after format conversion, before the processing
+    stages) and events go into one fixed-size memory-mapped file:
+    a header, an audio ring of BLACKBOX_MINUTES and a ring of
+    BLACKBOX_EVENT_SLOTS fixed-size event records stamped with the
+    audio sample position. Writing a chunk is one or two copies into
+    the map and a header update; nothing is allocated per chunk.
+
+    The file survives a crash and can be read by another process while
+    the assistant runs (tools/blackbox_dump.py). snapshot() saves a
+    bundle in the replay corpus layout: recording.wav, a recording.json
+    sidecar and events.jsonl.
+    """
+
+    def __init__(self, path: str = None, minutes: float = None, event_slots: int = None,
+                 rate: int = None, readonly: bool = False):
+        self.path = Path(path or config.blackbox.FILE)
+        self.lock = threading.Lock()
+        self.last_auto_snapshot = 0.0
+        self.stats = {'chunks': 0, 'events': 0, 'snapshots': 0, 'skipped': 0}
+        self.closed = False
+        self.snapshot_threads: List[threading.Thread] = []
+
+        if readonly:
+            self._open_existing()
+            return
+
+        self.rate = rate or config.audio.SAMPLE_RATE
+        minutes = config.blackbox.MINUTES if minutes is None else minutes
+        self.event_slots = event_slots or config.blackbox.EVENT_SLOTS
+        self.capacity = int(minutes * 60 * self.rate) * 2
+        size = HEADER_SIZE + self.capacity + self.event_slots * EVENT.size
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = self._read_header() if self.path.exists() and self.path.stat().st_size == size else None
+        resume = header is not None and header[:4] == (MAGIC, self.rate, self.event_slots, self.capacity)
+        with open(self.path, 'r+b' if resume else 'w+b') as f:
+            if not resume:
+                f.truncate(size)
+            self.mm = mmap.mmap(f.fileno(), size)
+
+        if resume:
+            self.audio_written, self.events_written = header[4], header[5]
+        else:
+            self.audio_written = self.events_written = 0
+            HEADER.pack_into(self.mm, 0, MAGIC, self.rate, self.event_slots, self.capacity, 0, 0)
+        self.audio_offset = HEADER_SIZE
+        self.events_offset = HEADER_SIZE + self.capacity
+        self.event('start', f"pid {os.getpid()}")
+
+        app_logger.info(f"BlackBox recording to {self.path}: {minutes} min of audio, "
+                        f"{self.event_slots} events{' (resumed)' if resume else ''}")
+
+    def _read_header(self):
+        with open(self.path, 'rb') as f:
+            data = f.read(HEADER.size)
+        return HEADER.unpack(data) if len(data) == HEADER.size else None
+
+    def _open_existing(self):
+        header = self._read_header()
+        if header is None or header[0] != MAGIC:
+            raise ValueError(f"{self.path} is not a black box file")
+        _, self.rate, self.event_slots, self.capacity, _, _ = header
+        with open(self.path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.audio_offset = HEADER_SIZE
+        self.events_offset = HEADER_SIZE + self.capacity
+
+    def write_audio(self, data):
+        """Append one chunk of mono int16 audio to the ring"""
+        n = len(data)
+        if n > self.capacity:
+            data = memoryview(data)[n - self.capacity:]
+            n = self.capacity
+        with self.lock:
+            if self.closed:
+                return
+            pos = self.audio_written % self.capacity
+            start = self.audio_offset + pos
+            first = self.capacity - pos
+            if n <= first:
+                self.mm[start:start + n] = data
+            else:
+                view = memoryview(data)
+                self.mm[start:start + first] = view[:first]
+                self.mm[self.audio_offset:self.audio_offset + n - first] = view[first:]
+            self.audio_written += n
+            COUNTER.pack_into(self.mm, AUDIO_WRITTEN_OFFSET, self.audio_written)
+        self.stats['chunks'] += 1
+
+    def event(self, kind: str, text: str = '', value: float = 0.0):
+        """Record a pipeline event at the current audio position"""
+        encoded = text.encode('utf-8')[:100]
+        with self.lock:
+            if self.closed:
+                return
+            slot = self.events_written % self.event_slots
+            EVENT.pack_into(self.mm, self.events_offset + slot * EVENT.size, self.audio_written // 2,
+                            time.time(), EVENT_CODES.get(kind, 0), len(encoded), value, encoded)
+            self.events_written += 1
+            COUNTER.pack_into(self.mm, EVENTS_WRITTEN_OFFSET, self.events_written)
+        self.stats['events'] += 1
+
+    def read_events(self, events_written: int = None) -> List[dict]:
+        """Events still in the ring, oldest first"""
+        if events_written is None:
+            events_written = COUNTER.unpack_from(self.mm, EVENTS_WRITTEN_OFFSET)[0]
+        events = []
+        for index in range(max(0, events_written - self.event_slots), events_written):
+            offset = self.events_offset + (index % self.event_slots) * EVENT.size
+            sample, wall_time, code, length, value, text = EVENT.unpack_from(self.mm, offset)
+            events.append({'sample': sample, 'time': wall_time,
+                           'kind': EVENT_KINDS[code] if code < len(EVENT_KINDS) else 'note',
+                           'text': text[:length].decode('utf-8', errors='replace'), 'value': value})
+        return events
+
+    def read_audio(self, start: int, end: int) -> bytes:
+        """Audio bytes between two absolute byte positions still in the ring"""
+        if end - start <= 0:
+            return b''
+        pos = start % self.capacity
+        first = min(end - start, self.capacity - pos)
+        data = self.mm[self.audio_offset + pos:self.audio_offset + pos + first]
+        if first < end - start:
+            data += self.mm[self.audio_offset:self.audio_offset + end - start - first]
+        return data
+
+    def on_error(self, module: str, error: Exception):
+        """log_error hook: record the error and snapshot"""
+        self.event('error', f"{module}: {error}")
+        if config.blackbox.ON_ERROR and not module.startswith('BlackBox'):
+            self.snapshot('error')
+
+    def snapshot(self, reason: str = 'manual', seconds: float = None, from_wake: bool = False,
+                 wait: bool = False) -> Optional[Path]:
+        """Save the last seconds of audio and their events as a replay bundle
+
+        Automatic snapshots (any reason but "manual") are rate limited by
+        BLACKBOX_MIN_INTERVAL_S. With from_wake the recording starts at
+        the last wake event, matching what the command capture loop saw.
+        Files are written on a background thread unless wait is set;
+        close() waits for it. Returns None once closed.
+        """
+        now = time.monotonic()
+        if reason != 'manual':
+            if now - self.last_auto_snapshot < config.blackbox.MIN_INTERVAL_S:
+                self.stats['skipped'] += 1
+                return None
+            self.last_auto_snapshot = now
+
+        with self.lock:
+            if self.closed:
+                return None
+            end = COUNTER.unpack_from(self.mm, AUDIO_WRITTEN_OFFSET)[0]
+            events_written = COUNTER.unpack_from(self.mm, EVENTS_WRITTEN_OFFSET)[0]
+        seconds = config.blackbox.SNAPSHOT_S if seconds is None else seconds
+        out_dir = Path(config.blackbox.SNAPSHOT_DIR) / f"{datetime.now():%Y%m%d-%H%M%S}-{reason}"
+
+        def run():
+            try:
+                self._write_bundle(out_dir, reason, end, events_written, seconds, from_wake)
+            except Exception as e:
+                log_error("BlackBox.snapshot", e)
+
+        if wait:
+            run()
+        else:
+            thread = threading.Thread(target=run, name='blackbox-snapshot', daemon=True)
+            with self.lock:
+                if self.closed:
+                    return None
+                self.snapshot_threads = [t for t in self.snapshot_threads if t.is_alive()] + [thread]
+            thread.start()
+        return out_dir
+
+    def _write_bundle(self, out_dir: Path, reason: str, end: int, events_written: int,
+                      seconds: float, from_wake: bool):
+        # A live writer may be overwriting the oldest chunk; leave a margin
+        oldest = max(0, end - self.capacity + 2 * config.audio.CHUNK_SIZE * 2)
+        start = max(oldest, end - int(seconds * self.rate) * 2) if seconds else oldest
+        events = [e for e in self.read_events(events_written) if start // 2 <= e['sample'] <= end // 2]
+        wakes = [i for i, e in enumerate(events) if e['kind'] == 'wake']
+        if from_wake and wakes:
+            events = events[wakes[-1]:]
+            start = events[0]['sample'] * 2
+
+        audio = self.read_audio(start, end)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(out_dir / 'recording.wav'), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.rate)
+            wf.writeframes(audio)
+
+        start_sample = start // 2
+        with open(out_dir / 'events.jsonl', 'w', encoding='utf-8') as f:
+            for e in events:
+                e['t_ms'] = round((e['sample'] - start_sample) / self.rate * 1000, 1)
+                f.write(json.dumps(e, ensure_ascii=False) + '\n')
+
+        # Pipeline outputs only; ground-truth labels (text, speech_end_ms,
+        # wake_end_ms) are added by whoever listens to the recording
+        recognized = [e['text'] for e in events if e['kind'] in ('recognized', 'unrecognized')]
+        labels = {'reason': reason, 'captured_at': datetime.now().isoformat(timespec='seconds'),
+                  'recognized': recognized[-1] if recognized else '',
+                  'wake_fired_ms': [e['t_ms'] for e in events if e['kind'] == 'wake']}
+        (out_dir / 'recording.json').write_text(json.dumps(labels, ensure_ascii=False), encoding='utf-8')
+
+        self.stats['snapshots'] += 1
+        app_logger.info(f"BlackBox snapshot ({reason}): {len(audio) / 2 / self.rate:.1f}s, "
+                        f"{len(events)} events -> {out_dir}")
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, seconds_recorded=round(min(self.audio_written, self.capacity) / 2 / self.rate, 1))
+
+    def close(self):
+        """Stop recording, let snapshots in progress finish reading the map, then unmap it"""
+        with self.lock:
+            self.closed = True
+            threads = self.snapshot_threads
+        for thread in threads:
+            thread.join(timeout=10.0)
+        with self.lock:
+            self.mm.flush()
+            self.mm.close()
@@ -2,39 +2,57 @@ import datetime
 import os
 import subprocess
 import webbrowser
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional
 from core.logger import app_logger, log_error, log_command
+from core.plugins import PluginRegistry, CommandSpec
 from config.settings import config
 
 class CommandRouter:
     """Routes and executes voice commands"""
     
     def __init__(self):
-        self.commands = {
-            'time': self._cmd_time,
-            'date': self._cmd_date,
-            'google': self._cmd_google,
-            'youtube': self._cmd_youtube,
-            'calculator': self._cmd_calculator,
-            'notepad': self._cmd_notepad,
-            'weather': self._cmd_weather,
-            'shutdown': self._cmd_shutdown,
-            'restart': self._cmd_restart,
-            'lock': self._cmd_lock,
-            'hello': self._cmd_hello,
-        }
-        app_logger.info("CommandRouter initialized with %d commands", len(self.commands))
+        self.registry = PluginRegistry()
+        builtins = [
+            CommandSpec('time', ['time'], self._cmd_time),
+            CommandSpec('date', ['date'], self._cmd_date),
+            CommandSpec('google', ['google'], self._cmd_google, 'launch', 'fast', open_ended=True),
+            CommandSpec('youtube', ['youtube'], self._cmd_youtube, 'launch', 'fast', open_ended=True),
+            CommandSpec('calculator', ['calculator'], self._cmd_calculator, 'launch', 'fast'),
+            CommandSpec('notepad', ['notepad'], self._cmd_notepad, 'launch', 'fast'),
+            CommandSpec('weather', ['weather'], self._cmd_weather),
+            CommandSpec('shutdown', ['shutdown'], self._cmd_shutdown, 'system', 'fast'),
+            CommandSpec('restart', ['restart'], self._cmd_restart, 'system', 'fast'),
+            CommandSpec('lock', ['lock'], self._cmd_lock, 'system', 'fast'),
+            CommandSpec('hello', ['hello'], self._cmd_hello),
+        ]
+        for spec in builtins:
+            self.registry.register(spec)
+        self.registry.discover()
+        self.disabled_commands = set()
+        self.apply_config(config.commands, {})
+        app_logger.info("CommandRouter initialized with %d commands", len(self.registry.specs))
+    
+    def warmup(self):
+        """Import plugin handlers in the background after startup"""
+        if config.plugins.WARMUP:
+            self.registry.warmup()
+    
+    def apply_config(self, commands, changed: dict):
+        """Take new COMMANDS_* settings"""
+        self.disabled_commands = {name.strip() for name in commands.DISABLED.split(',') if name.strip()}
+        if self.disabled_commands:
+            app_logger.info(f"Disabled commands: {', '.join(sorted(self.disabled_commands))}")
     
     def route_command(self, text: str) -> Tuple[str, str, bool]:
         """Route command and return (command_type, result, success)"""
         try:
             text_lower = text.lower().strip()
+            cmd_name = self.match_command(text_lower)
             
-            for cmd_name, cmd_func in self.commands.items():
-                if cmd_name in text_lower:
-                    log_command(text, cmd_name)
-                    result = cmd_func(text_lower)
-                    return (cmd_name, result, True)
+            if cmd_name:
+                log_command(text, cmd_name)
+                result = self.registry.call(cmd_name, text_lower)
+                return (cmd_name, result, True)
             
             log_command(text, 'unknown', 'not_recognized')
             return ('unknown', 'Команда не распознана', False)
@@ -43,6 +61,15 @@ class CommandRouter:
             log_error("CommandRouter.route_command", e)
             return ('error', 'Ошибка при роутинге команды', False)
     
+    def match_command(self, text: str) -> Optional[str]:
+        """Return name of command matching text, or None"""
+        return self.registry.match(text.lower().strip(), self.disabled_commands)
+    
+    def is_complete_command(self, text: str) -> bool:
+        """Check if text already forms a command that needs no more speech"""
+        cmd_name = self.match_command(text)
+        return cmd_name is not None and not self.registry.specs[cmd_name].open_ended
+    
     def _cmd_time(self, text: str) -> str:
         """Get current time"""
         now = datetime.datetime.now()
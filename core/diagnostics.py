@@ -0,0 +1,198 @@
+import gc
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from core.logger import app_logger, log_error
+from core.process_stats import process_rss, thread_cpu_times
+from config.settings import config
+
+
+class Diagnostics:
+    """Sampling profiler and resource monitor for all threads
+
+    A daemon thread takes the Python stack of every thread via
+    sys._current_frames() DIAG_SAMPLE_HZ times a second and counts
+    collapsed stacks ("thread;outer;...;inner"). Samples are wall-clock:
+    a thread blocked in Event.wait is counted too, so per-thread CPU
+    time is recorded alongside to show which thread actually burns CPU.
+    GC pauses come from gc.callbacks, RSS is sampled once a second.
+
+    Every DIAG_SUMMARY_S a summary is logged and the cumulative stacks
+    are written to DIAG_DIR/stacks-<pid>.folded, ready for flamegraph.pl
+    or speedscope; one JSON line per summary goes to timeline-<pid>.jsonl.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stacks = Counter()
+        self.interval_stacks = Counter()
+        self.labels = {}
+        self.rss = deque(maxlen=3600)
+        self.gc_pauses = []
+        self._gc_start = None
+        self._cpu_last = {}
+        self.overhead_s = 0.0
+        self.samples = 0
+
+    def apply_config(self, diag, changed: dict):
+        """Take new DIAG_* settings; ENABLED starts or stops sampling"""
+        if diag.ENABLED and not self.is_running:
+            self.start()
+        elif not diag.ENABLED and self.is_running:
+            self.stop()
+
+    def toggle(self, *_):
+        """Signal handler: start or stop sampling"""
+        if self.is_running:
+            threading.Thread(target=self.stop, name='diagnostics-stop', daemon=True).start()
+        else:
+            self.start()
+
+    def install_signal(self):
+        """Toggle diagnostics on SIGUSR1, or on Ctrl+Break on Windows"""
+        signum = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+        if signum is not None:
+            signal.signal(signum, self.toggle)
+            app_logger.info(f"Diagnostics toggle: {signal.Signals(signum).name}")
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.out_dir = Path(config.diag.DIR)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._cpu_last = thread_cpu_times()
+        gc.callbacks.append(self._on_gc)
+        self.thread = threading.Thread(target=self._sample_loop, name='diagnostics', daemon=True)
+        self.thread.start()
+        app_logger.info(f"Diagnostics started: {config.diag.SAMPLE_HZ}Hz sampling, "
+                        f"summary every {config.diag.SUMMARY_S}s to {self.out_dir}")
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self._summary()
+        app_logger.info("Diagnostics stopped")
+
+    def _on_gc(self, phase: str, info: dict):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self.gc_pauses.append((info['generation'], (time.perf_counter() - self._gc_start) * 1000))
+            self._gc_start = None
+
+    def _label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def _sample_loop(self):
+        period = 1 / config.diag.SAMPLE_HZ
+        own_id = threading.get_ident()
+        names = {}
+        next_names = next_rss = next_summary = time.monotonic()
+        next_summary += config.diag.SUMMARY_S
+
+        while self.is_running:
+            cpu_start = time.thread_time()
+            now = time.monotonic()
+            if now >= next_names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_names = now + 1.0
+            if now >= next_rss:
+                self.rss.append((time.time(), process_rss()))
+                next_rss = now + 1.0
+
+            try:
+                frames = sys._current_frames()
+                with self.lock:
+                    for ident, frame in frames.items():
+                        if ident == own_id:
+                            continue
+                        stack = []
+                        while frame is not None:
+                            stack.append(self._label(frame.f_code))
+                            frame = frame.f_back
+                        stack.append(names.get(ident, f'thread-{ident}'))
+                        self.interval_stacks[';'.join(reversed(stack))] += 1
+                    self.samples += 1
+                frames = None
+            except Exception as e:
+                log_error("Diagnostics._sample_loop", e)
+
+            self.overhead_s += time.thread_time() - cpu_start
+            if now >= next_summary:
+                self._summary()
+                next_summary = now + config.diag.SUMMARY_S
+            time.sleep(max(0.0, period - (time.monotonic() - now)))
+
+    def _summary(self):
+        """Log the interval summary and write stacks and timeline files"""
+        with self.lock:
+            interval, self.interval_stacks = self.interval_stacks, Counter()
+            self.stacks.update(interval)
+            gc_pauses, self.gc_pauses = self.gc_pauses, []
+            samples, self.samples = self.samples, 0
+            overhead_s, self.overhead_s = self.overhead_s, 0.0
+
+        cpu_now = thread_cpu_times()
+        natives = {t.native_id: t.name for t in threading.enumerate()}
+        cpu = {natives.get(tid, f'native-{tid}'): round(seconds - self._cpu_last.get(tid, 0.0), 3)
+               for tid, seconds in cpu_now.items()}
+        self._cpu_last = cpu_now
+        cpu = dict(sorted(((name, s) for name, s in cpu.items() if s > 0), key=lambda item: -item[1]))
+
+        # Leaf frames by sample count: where threads spend wall time
+        leaves = Counter()
+        for stack, count in interval.items():
+            parts = stack.split(';')
+            leaves[f"{parts[0]}: {parts[-1]}"] += count
+        rss = [value for _, value in self.rss if value is not None]
+        gc_ms = [ms for _, ms in gc_pauses]
+
+        summary = {
+            'time': time.time(),
+            'samples': samples,
+            'overhead_cpu_s': round(overhead_s, 3),
+            'thread_cpu_s': cpu,
+            'gc': {'count': len(gc_ms), 'total_ms': round(sum(gc_ms), 2), 'max_ms': round(max(gc_ms, default=0.0), 2),
+                   'by_generation': dict(Counter(generation for generation, _ in gc_pauses))},
+            'rss_mb': round(rss[-1] / 1024 / 1024, 1) if rss else None,
+            'rss_peak_mb': round(max(rss) / 1024 / 1024, 1) if rss else None,
+            'top': leaves.most_common(config.diag.TOP),
+        }
+
+        app_logger.info(f"Diagnostics: {samples} samples, sampler {overhead_s * 1000:.0f}ms CPU, "
+                        f"RSS {summary['rss_mb']}MB (peak {summary['rss_peak_mb']}MB), "
+                        f"GC {len(gc_ms)} pauses {summary['gc']['total_ms']}ms (max {summary['gc']['max_ms']}ms)")
+        app_logger.info("Diagnostics thread CPU: " + (", ".join(f"{name} {seconds:.2f}s" for name, seconds in cpu.items())
+                                                      or "unavailable"))
+        for leaf, count in summary['top']:
+            app_logger.info(f"Diagnostics top: {count / max(samples, 1):6.1%} {leaf}")
+
+        try:
+            pid = os.getpid()
+            with open(self.out_dir / f'stacks-{pid}.folded', 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks.items():
+                    f.write(f"{stack} {count}\n")
+            with open(self.out_dir / f'timeline-{pid}.jsonl', 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+        except OSError as e:
+            log_error("Diagnostics._summary", e)
+
+
+diagnostics = Diagnostics()
@@ -0,0 +1,87 @@
+import numpy as np
+from core.logger import app_logger
+from core.playback import playback, PlaybackMonitor
+from config.settings import config
+
+
+class EchoGate:
+    """Keeps the assistant's own speech away from the decoders
+
+    While TTS plays, and for ECHO_TAIL_MS after, each chunk is checked
+    for the user talking over it. Without a reference signal that is the
+    raw chunk level; with one, a spectral echo suppressor first removes
+    the estimated echo: the echo power in each bin is the reference
+    power (maximum over ECHO_MAX_DELAY_MS of possible playback delay)
+    times a tracked speaker-to-mic coupling, and each bin is attenuated
+    by at most ECHO_SUPPRESSION_DB. A chunk whose level stays below
+    ECHO_BARGE_IN_RMS is marked gated and is not decoded; louder chunks
+    pass as barge-in.
+    """
+
+    OVERSUBTRACT = 2.0
+    COUPLING_FALL = 0.5
+    COUPLING_RISE = 0.05
+
+    def __init__(self, rate: int = None, monitor: PlaybackMonitor = None):
+        self.RATE = rate or config.audio.SAMPLE_RATE
+        self.monitor = monitor or playback
+        self.TAIL_S = config.echo.TAIL_MS / 1000
+        self.MAX_DELAY_S = config.echo.MAX_DELAY_MS / 1000
+        self.BARGE_IN_RMS = config.echo.BARGE_IN_RMS
+        self.FLOOR = 10 ** (config.echo.SUPPRESSION_DB / 20)
+        self.coupling = None
+        self.gated = False
+        self.stats = {'chunks': 0, 'gated': 0, 'gated_ms': 0.0, 'barge_in': 0, 'suppressed': 0}
+
+        app_logger.info(f"EchoGate initialized: tail={config.echo.TAIL_MS}ms, "
+                        f"barge-in RMS={self.BARGE_IN_RMS}, max delay={config.echo.MAX_DELAY_MS}ms")
+
+    def process(self, data, timestamp: float) -> bytes:
+        """Check one chunk captured around timestamp; sets self.gated"""
+        self.gated = False
+        if not self.monitor.is_active(timestamp, self.TAIL_S):
+            return data
+
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        self.stats['chunks'] += 1
+        duration = len(samples) / self.RATE
+        reference = self.monitor.reference_segment(timestamp - duration - self.MAX_DELAY_S, timestamp)
+        if reference is not None and reference.any():
+            samples = self._suppress(samples, reference)
+            data = np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+            self.stats['suppressed'] += 1
+
+        if np.sqrt(np.mean(samples ** 2)) >= self.BARGE_IN_RMS:
+            self.stats['barge_in'] += 1
+            return data
+
+        self.gated = True
+        self.stats['gated'] += 1
+        self.stats['gated_ms'] += duration * 1000
+        return data
+
+    def _suppress(self, samples: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        n = len(samples)
+        spectrum = np.fft.rfft(samples)
+        mic_power = spectrum.real ** 2 + spectrum.imag ** 2
+        # Reference blocks at every candidate delay, half a chunk apart
+        blocks = np.lib.stride_tricks.sliding_window_view(reference, n)[::max(1, n // 2)]
+        ref_power = (np.abs(np.fft.rfft(blocks, axis=1)) ** 2).max(axis=0)
+
+        # Coupling tracks the minimum mic/reference ratio: it follows
+        # drops fast and rises slowly, so talk over playback is not learned
+        strong = ref_power > ref_power.max() * 1e-3
+        ratio = np.minimum(mic_power / np.maximum(ref_power, 1e-6), 10.0)
+        if self.coupling is None:
+            self.coupling = np.where(strong, ratio, 0.0)
+        else:
+            rate = np.where(ratio < self.coupling, self.COUPLING_FALL, self.COUPLING_RISE)
+            self.coupling += np.where(strong, (ratio - self.coupling) * rate, 0.0)
+
+        echo = self.coupling * ref_power
+        gain = 1 - self.OVERSUBTRACT * echo / np.maximum(mic_power, 1e-6)
+        gain = np.sqrt(np.clip(gain, self.FLOOR ** 2, 1))
+        return np.fft.irfft(spectrum * gain, n=n)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, gated_ms=round(self.stats['gated_ms']))
@@ -0,0 +1,85 @@
+from typing import Callable, Optional
+from core.logger import app_logger
+from core.audio_input import VoiceActivityDetector
+from config.settings import config
+
+class Endpointer:
+    """Decides when a command utterance is over
+
+    Combines three signals, from weakest to strongest evidence that the
+    user has finished speaking:
+      * frame-level VAD trailing silence (VAD_TRAILING_SILENCE_MS)
+      * the partial text already matching a complete command (VAD_MATCHED_SILENCE_MS)
+      * Vosk reporting a final result for the segment (VAD_FINAL_SILENCE_MS)
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, is_complete_command: Callable[[str], bool] = None):
+        self.vad = vad
+        self.is_complete_command = is_complete_command
+        self.RATE = config.audio.SAMPLE_RATE
+        self.FRAME_MS = self.vad.FRAME_SIZE / self.RATE * 1000
+        self.TRAILING_SILENCE = config.vad.TRAILING_SILENCE_MS
+        self.MATCHED_SILENCE = config.vad.MATCHED_SILENCE_MS
+        self.FINAL_SILENCE = config.vad.FINAL_SILENCE_MS
+
+        self.reset()
+
+        app_logger.info(f"Endpointer initialized: trailing={self.TRAILING_SILENCE}ms, "
+                        f"matched={self.MATCHED_SILENCE}ms, final={self.FINAL_SILENCE}ms")
+
+    def apply_config(self, vad, changed: dict):
+        """Take new VAD_* silence settings (call after the VAD's own apply_config)"""
+        self.FRAME_MS = self.vad.FRAME_SIZE / self.RATE * 1000
+        self.TRAILING_SILENCE = vad.TRAILING_SILENCE_MS
+        self.MATCHED_SILENCE = vad.MATCHED_SILENCE_MS
+        self.FINAL_SILENCE = vad.FINAL_SILENCE_MS
+
+    def reset(self):
+        """Reset endpointer state for a new utterance"""
+        self.speech_seen = False
+        self.segment_final = False
+        self.trailing_silence_ms = 0.0
+        self.elapsed_ms = 0.0
+        self.reason = None
+
+    def process(self, audio_chunk, text: str = "", is_final: bool = False) -> bool:
+        """Feed next chunk and return True once the utterance has ended
+
+        text is the recognizer's best hypothesis so far and is_final tells
+        whether the recognizer has just closed a segment; the final signal
+        holds until new speech frames arrive.
+        """
+        energies = self.vad.frame_energies(audio_chunk)
+        self.elapsed_ms += len(audio_chunk) / 2 / self.RATE * 1000
+
+        speech_frames = (energies > self.vad.THRESHOLD).nonzero()[0]
+        if len(speech_frames) > 0:
+            self.speech_seen = True
+            self.trailing_silence_ms = (len(energies) - 1 - speech_frames[-1]) * self.FRAME_MS
+            self.segment_final = False
+        else:
+            self.trailing_silence_ms += len(energies) * self.FRAME_MS
+
+        if is_final:
+            self.segment_final = True
+
+        if not self.speech_seen:
+            return False
+
+        if self.segment_final and text and self.trailing_silence_ms >= self.FINAL_SILENCE:
+            return self._end('final')
+
+        if text and self.is_complete_command and self.trailing_silence_ms >= self.MATCHED_SILENCE:
+            if self.is_complete_command(text):
+                return self._end('matched')
+
+        if self.trailing_silence_ms >= self.TRAILING_SILENCE:
+            return self._end('silence')
+
+        return False
+
+    def _end(self, reason: str) -> bool:
+        self.reason = reason
+        app_logger.debug(f"Endpoint ({reason}) after {self.elapsed_ms:.0f}ms, "
+                         f"trailing silence {self.trailing_silence_ms:.0f}ms")
+        return True
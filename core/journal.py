@@ -0,0 +1,187 @@
+import argparse
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import List
+from core.logger import app_logger, log_error
+from core.metrics import percentile
+from config.settings import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    text TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    confidence REAL,
+    outcome TEXT NOT NULL,
+    result TEXT,
+    endpoint_reason TEXT,
+    capture_ms REAL,
+    stt_ms REAL,
+    route_ms REAL,
+    response_ms REAL,
+    total_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_ts ON commands (ts);
+CREATE INDEX IF NOT EXISTS idx_commands_intent_ts ON commands (intent, ts);
+"""
+
+COLUMNS = ('ts', 'text', 'intent', 'confidence', 'outcome', 'result', 'endpoint_reason',
+           'capture_ms', 'stt_ms', 'route_ms', 'response_ms', 'total_ms')
+
+
+class CommandJournal:
+    """Append-only SQLite journal of handled commands
+
+    record() only appends to an in-memory queue, so the command path
+    never waits on disk. A background thread writes queued records in
+    one transaction every JOURNAL_BATCH_MS and deletes records older than
+    JOURNAL_RETENTION_DAYS once a day. The database is in WAL mode, so
+    `main.py stats` can read it while the assistant writes.
+
+    Record fields: ts (wake time, unix seconds), text, intent (command
+    name, "unknown" or "no_speech"), confidence (mean Vosk word
+    confidence), outcome (success, failed, not_recognized, no_speech,
+    error), result, endpoint_reason and stage timings in ms: capture
+    (wake to endpoint), stt (final decode), route (command execution),
+    response (endpoint to response ready) and total (wake to response).
+    """
+
+    RETENTION_INTERVAL_S = 24 * 3600
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or config.journal.FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.queue = deque(maxlen=config.journal.QUEUE_SIZE)
+        self._wake = threading.Event()
+        self.is_running = True
+        self.stats = {'recorded': 0, 'written': 0, 'batches': 0, 'dropped': 0, 'deleted': 0}
+        self.thread = threading.Thread(target=self._writer_loop, name='journal', daemon=True)
+        self.thread.start()
+        app_logger.info(f"CommandJournal: {self.path}, retention {config.journal.RETENTION_DAYS} days")
+
+    def record(self, entry: dict):
+        """Queue one command record; never blocks"""
+        if len(self.queue) == self.queue.maxlen:
+            self.stats['dropped'] += 1
+        self.queue.append(tuple(entry.get(column) for column in COLUMNS))
+        self.stats['recorded'] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path))
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _writer_loop(self):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            log_error("CommandJournal._connect", e)
+            self.is_running = False
+            return
+
+        next_retention = time.monotonic()
+        while True:
+            self._wake.wait(config.journal.BATCH_MS / 1000)
+            running = self.is_running
+            self._flush(conn)
+            if time.monotonic() >= next_retention:
+                self._apply_retention(conn)
+                next_retention = time.monotonic() + self.RETENTION_INTERVAL_S
+            if not running:
+                break
+        conn.close()
+
+    def _flush(self, conn: sqlite3.Connection):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+        try:
+            with conn:
+                conn.executemany(f"INSERT INTO commands ({', '.join(COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(COLUMNS))})", batch)
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        except sqlite3.Error as e:
+            self.stats['dropped'] += len(batch)
+            log_error("CommandJournal._flush", e)
+
+    def _apply_retention(self, conn: sqlite3.Connection):
+        if not config.journal.RETENTION_DAYS:
+            return
+        cutoff = time.time() - config.journal.RETENTION_DAYS * 86400
+        try:
+            with conn:
+                deleted = conn.execute("DELETE FROM commands WHERE ts < ?", (cutoff,)).rowcount
+            if deleted:
+                self.stats['deleted'] += deleted
+                app_logger.info(f"CommandJournal: removed {deleted} records older than "
+                                f"{config.journal.RETENTION_DAYS} days")
+        except sqlite3.Error as e:
+            log_error("CommandJournal._apply_retention", e)
+
+    def close(self):
+        """Write what is queued and stop the writer"""
+        self.is_running = False
+        self._wake.set()
+        self.thread.join(timeout=5.0)
+        app_logger.info(f"CommandJournal: {self.stats}")
+
+
+def stats_cli(argv: List[str]) -> int:
+    """`main.py stats`: latency and outcome summary from the journal"""
+    parser = argparse.ArgumentParser(prog='main.py stats', description="Command journal statistics")
+    parser.add_argument('--days', type=float, default=7, help="Look back this many days (default 7)")
+    parser.add_argument('--intent', help="Only this command")
+    parser.add_argument('--top', type=int, default=10, help="Unrecognized phrases to list")
+    parser.add_argument('--db', default=config.journal.FILE, help="Journal database")
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"No journal at {args.db}")
+        return 1
+    conn = sqlite3.connect(f"file:{Path(args.db).resolve().as_posix()}?mode=ro", uri=True)
+    since = time.time() - args.days * 86400
+    where, params = "ts >= ?", [since]
+    if args.intent:
+        where, params = where + " AND intent = ?", params + [args.intent]
+
+    total, = conn.execute(f"SELECT COUNT(*) FROM commands WHERE {where}", params).fetchone()
+    print(f"{total} commands in the last {args.days:g} days")
+    outcomes = conn.execute(f"SELECT outcome, COUNT(*) FROM commands WHERE {where} "
+                            f"GROUP BY outcome ORDER BY 2 DESC", params).fetchall()
+    print("  " + ", ".join(f"{outcome} {count}" for outcome, count in outcomes))
+
+    print(f"\n{'intent':>14} {'count':>6} {'success':>8} {'conf':>5} "
+          f"{'resp p50':>9} {'resp p95':>9} {'total p50':>10} {'total p95':>10}")
+    intents = conn.execute(f"SELECT intent, COUNT(*), AVG(outcome = 'success'), AVG(confidence) "
+                           f"FROM commands WHERE {where} GROUP BY intent ORDER BY 2 DESC", params).fetchall()
+    for intent, count, success, confidence in intents:
+        response = [r for r, in conn.execute("SELECT response_ms FROM commands WHERE intent = ? AND ts >= ? "
+                                             "AND response_ms IS NOT NULL", (intent, since))]
+        total_ms = [r for r, in conn.execute("SELECT total_ms FROM commands WHERE intent = ? AND ts >= ? "
+                                             "AND total_ms IS NOT NULL", (intent, since))]
+        cells = [percentile(response, 50), percentile(response, 95), percentile(total_ms, 50), percentile(total_ms, 95)]
+        print(f"{intent:>14} {count:6d} {success:8.0%} {confidence if confidence is not None else float('nan'):5.2f} "
+              + " ".join(f"{'%.0fms' % v if not math.isnan(v) else '-':>{w}}" for v, w in zip(cells, (9, 9, 10, 10))))
+
+    if not args.intent:
+        phrases = conn.execute("SELECT text, COUNT(*) FROM commands WHERE ts >= ? AND outcome = 'not_recognized' "
+                               "GROUP BY text ORDER BY 2 DESC LIMIT ?", (since, args.top)).fetchall()
+        if phrases:
+            print("\nMost frequent unrecognized phrases:")
+            for text, count in phrases:
+                print(f"  {count:5d}  {text}")
+    conn.close()
+    return 0
@@ -0,0 +1,39 @@
+import numpy as np
+
+class LevelFeed:
+    """Single-slot handoff of audio levels from the audio thread to the GUI
+
+    The audio thread reduces each chunk to a few peak bins and replaces the
+    slot; the GUI picks up only the latest value at its own frame rate.
+    Replacing a reference is atomic under the GIL, so neither side locks
+    and a slow GUI never holds up capture.
+    """
+
+    def __init__(self, num_bins: int = 40):
+        self.num_bins = num_bins
+        self._slot = None
+        self._seq = 0
+        self._taken_seq = 0
+
+    def publish(self, audio_chunk):
+        """Reduce chunk to peak levels per bin (0..1) and store them"""
+        samples = np.frombuffer(audio_chunk, dtype=np.int16)
+        bin_size = len(samples) // self.num_bins
+        if bin_size == 0:
+            return
+
+        frames = samples[:bin_size * self.num_bins].reshape(self.num_bins, bin_size)
+        peaks = np.maximum(frames.max(axis=1), -frames.min(axis=1).astype(np.int32))
+        levels = (peaks / 32768.0).tolist()
+
+        self._seq += 1
+        self._slot = (self._seq, levels, max(levels))
+
+    def take(self):
+        """Return (levels, peak) published since the last take, or None"""
+        slot = self._slot
+        if slot is None or slot[0] == self._taken_seq:
+            return None
+
+        self._taken_seq = slot[0]
+        return slot[1], slot[2]
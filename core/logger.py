@@ -3,13 +3,22 @@ import logging.handlers
 from pathlib import Path
 from config.settings import config
 
-Path(config.logging.LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Creates the log directory and opens the file on the first record,
+    so commands that log nothing (main.py stats) leave no logs behind"""
+    
+    def __init__(self, log_file: str, max_bytes: int, backup_count: int):
+        super().__init__(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+    
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
 
 def setup_logger(name: str, log_file: str, level: str = "INFO"):
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level))
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=config.logging.MAX_LOG_SIZE, backupCount=config.logging.BACKUP_COUNT, encoding='utf-8')
+    file_handler = LazyRotatingFileHandler(log_file, config.logging.MAX_LOG_SIZE, config.logging.BACKUP_COUNT)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
     console_handler = logging.StreamHandler()
@@ -23,6 +32,30 @@ error_logger = setup_logger('voice_assistant_errors', config.logging.ERROR_LOG_F
 def log_command(recognized_text: str, command_type: str, result: str = "success"):
     app_logger.info(f"COMMAND | Text: '{recognized_text}' | Type: {command_type} | Result: {result}")
 
+# Called as hook(module, error) after an error is logged, e.g. by the black box recorder
+error_hooks = []
+
 def log_error(module: str, error: Exception):
     error_logger.error(f"{module}: {error}", exc_info=True)
     app_logger.error(f"{module}: {error}")
+    for hook in error_hooks:
+        try:
+            hook(module, error)
+        except Exception as e:
+            error_logger.error(f"error hook {hook!r}: {e}")
+
+def apply_config(logging_config, changed: dict):
+    """Take new logging settings; file handlers are reopened only if their keys changed"""
+    if 'LOG_LEVEL' in changed:
+        app_logger.setLevel(getattr(logging, logging_config.LOG_LEVEL))
+
+    if changed.keys() & {'LOG_FILE', 'ERROR_LOG_FILE', 'MAX_LOG_SIZE', 'BACKUP_COUNT'}:
+        for logger, log_file in ((app_logger, logging_config.LOG_FILE), (error_logger, logging_config.ERROR_LOG_FILE)):
+            for handler in logger.handlers:
+                if isinstance(handler, logging.handlers.RotatingFileHandler):
+                    new_handler = LazyRotatingFileHandler(log_file, logging_config.MAX_LOG_SIZE, logging_config.BACKUP_COUNT)
+                    new_handler.setFormatter(handler.formatter)
+                    logger.addHandler(new_handler)
+                    logger.removeHandler(handler)
+                    handler.close()
+                    break
@@ -0,0 +1,303 @@
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+from vosk import Model
+from core.logger import app_logger, log_error
+from core.process_stats import process_rss
+from config.settings import config
+
+
+def parse_models(spec: str) -> Dict[str, str]:
+    """Parse VOSK_MODELS ("ru=path,en=path") into {key: path}"""
+    models = {}
+    for item in spec.split(','):
+        if '=' in item:
+            key, path = item.split('=', 1)
+            models[key.strip()] = path.strip()
+    return models
+
+
+def directory_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+
+
+class _ModelEntry:
+    def __init__(self, key: str, path: str):
+        self.key = key
+        self.path = path
+        self.model = None
+        self.size = 0        # measured RSS growth, or size on disk before first load
+        self.pins = 0
+        self.load_ms = 0.0
+        self.loading = None  # Event while a load is in progress
+
+
+class ModelManager:
+    """Loads Vosk models on demand and keeps them under a memory budget
+
+    Models are keyed by language or tier (VOSK_MODELS). Loaded models
+    form an LRU list; when a load would exceed VOSK_MEMORY_BUDGET_MB the
+    least recently used unpinned models are evicted first. Models in use
+    are pinned with acquire() or pin(). Usage counts are kept across
+    runs and drive background preloading.
+    """
+
+    def __init__(self, models: Dict[str, str] = None, budget_mb: int = None):
+        if models is None:
+            models = parse_models(config.vosk.MODELS) or {'default': config.vosk.MODEL_PATH}
+        self.entries = {key: _ModelEntry(key, path) for key, path in models.items()}
+        self.default_key = config.vosk.DEFAULT_MODEL or next(iter(self.entries))
+        self.fallback_key = config.vosk.FALLBACK_MODEL or None
+        budget_mb = config.vosk.MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self.budget = budget_mb * 1024 * 1024
+
+        self.loaded = OrderedDict()  # key -> entry, least recently used first
+        self.lock = threading.RLock()
+        self.usage_file = Path(config.vosk.USAGE_FILE) if config.vosk.USAGE_FILE else None
+        self.usage = Counter(self._load_usage())
+        self.stats = {'loads': 0, 'evictions': 0, 'hits': 0, 'misses': 0, 'fallbacks': 0,
+                      'preloads': 0, 'load_ms_total': 0.0, 'evict_ms_total': 0.0}
+
+        app_logger.info(f"ModelManager: models={', '.join(self.entries)}, default={self.default_key}, "
+                        f"budget={'%dMB' % budget_mb if budget_mb else 'unlimited'}")
+
+    def apply_config(self, vosk, changed: dict) -> set:
+        """Take new VOSK_* model settings; returns keys whose model was replaced
+
+        Only models whose path changed or that were removed are dropped;
+        holders of a dropped model keep using it until they let go.
+        """
+        replaced = set()
+        with self.lock:
+            if changed.keys() & {'MODELS', 'MODEL_PATH'}:
+                models = parse_models(vosk.MODELS) or {'default': vosk.MODEL_PATH}
+                for key, entry in list(self.entries.items()):
+                    if models.get(key) != entry.path:
+                        self.loaded.pop(key, None)
+                        del self.entries[key]
+                        replaced.add(key)
+                for key, path in models.items():
+                    if key not in self.entries:
+                        self.entries[key] = _ModelEntry(key, path)
+
+            self.default_key = vosk.DEFAULT_MODEL or next(iter(self.entries))
+            self.fallback_key = vosk.FALLBACK_MODEL or None
+            self.usage_file = Path(vosk.USAGE_FILE) if vosk.USAGE_FILE else None
+            self.budget = vosk.MEMORY_BUDGET_MB * 1024 * 1024
+            self._make_room(0)
+
+        if replaced:
+            app_logger.info(f"Models replaced: {', '.join(sorted(replaced))}")
+        return replaced
+
+    def _load_usage(self) -> dict:
+        if self.usage_file and self.usage_file.exists():
+            try:
+                return json.loads(self.usage_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                log_error("ModelManager._load_usage", e)
+        return {}
+
+    def save_usage(self):
+        """Persist usage counts for preloading on the next start"""
+        if not self.usage_file:
+            return
+        try:
+            self.usage_file.parent.mkdir(parents=True, exist_ok=True)
+            self.usage_file.write_text(json.dumps(dict(self.usage)), encoding='utf-8')
+        except OSError as e:
+            log_error("ModelManager.save_usage", e)
+
+    def resolve(self, key: Optional[str]) -> str:
+        """Model key for a language or tier; unknown keys fall back"""
+        with self.lock:
+            key = key or self.default_key
+            if key in self.entries:
+                return key
+            self.stats['fallbacks'] += 1
+            fallback = self.fallback_key or self.default_key
+        app_logger.warning(f"No model for '{key}', using '{fallback}'")
+        return fallback
+
+    def get(self, key: str = None) -> Model:
+        """Return a loaded model, loading it if needed"""
+        return self._with_fallback(self.resolve(key), self._get, 'get')
+
+    def _with_fallback(self, key: str, load, caller: str) -> Model:
+        """load(key), or load(VOSK_FALLBACK_MODEL) if that fails"""
+        try:
+            return load(key)
+        except Exception as e:
+            if not self.fallback_key or key == self.fallback_key:
+                raise
+            log_error(f"ModelManager.{caller}({key})", e)
+            with self.lock:
+                self.stats['fallbacks'] += 1
+            return load(self.fallback_key)
+
+    def _get(self, key: str, count_use: bool = True) -> Model:
+        entry = self.entries[key]
+        if count_use:
+            with self.lock:
+                self.usage[key] += 1
+        while True:
+            with self.lock:
+                if entry.model is not None:
+                    self.loaded.move_to_end(key)
+                    if count_use:
+                        self.stats['hits'] += 1
+                    return entry.model
+                if entry.loading is None:
+                    entry.loading = threading.Event()
+                    if count_use:
+                        self.stats['misses'] += 1
+                    break
+                loading = entry.loading
+            # Another thread is loading this model
+            loading.wait()
+            if entry.model is None and entry.loading is None:
+                raise RuntimeError(f"Loading model '{key}' failed")
+
+        try:
+            return self._load(entry)
+        finally:
+            with self.lock:
+                loading, entry.loading = entry.loading, None
+            loading.set()
+
+    def _load(self, entry: _ModelEntry) -> Model:
+        path = Path(entry.path)
+        if not path.exists():
+            raise FileNotFoundError(f"Model not found at {path}")
+
+        with self.lock:
+            if not entry.size:
+                entry.size = directory_size(path)
+            self._make_room(entry.size)
+
+        rss_before = process_rss()
+        start = time.perf_counter()
+        model = Model(str(path))
+        entry.load_ms = (time.perf_counter() - start) * 1000
+        rss_after = process_rss()
+        if rss_before is not None and rss_after is not None and rss_after > rss_before:
+            entry.size = rss_after - rss_before
+
+        with self.lock:
+            entry.model = model
+            self.loaded[entry.key] = entry
+            self.stats['loads'] += 1
+            self.stats['load_ms_total'] += entry.load_ms
+
+        app_logger.info(f"Model '{entry.key}' loaded from {path} in {entry.load_ms:.0f}ms "
+                        f"({entry.size / 1024 / 1024:.0f}MB, {self.used_bytes() / 1024 / 1024:.0f}MB in use)")
+        return model
+
+    def used_bytes(self) -> int:
+        with self.lock:
+            return sum(entry.size for entry in self.loaded.values())
+
+    def _make_room(self, needed: int):
+        """Evict least recently used unpinned models until needed bytes fit"""
+        if not self.budget:
+            return
+        for key in list(self.loaded):
+            if self.used_bytes() + needed <= self.budget:
+                return
+            if self.loaded[key].pins == 0:
+                self._evict(key)
+        if self.used_bytes() + needed > self.budget:
+            app_logger.warning(f"Model memory budget exceeded: {(self.used_bytes() + needed) / 1024 / 1024:.0f}MB "
+                               f"needed, {self.budget / 1024 / 1024:.0f}MB budget, remaining models pinned")
+
+    def _evict(self, key: str):
+        start = time.perf_counter()
+        entry = self.loaded.pop(key)
+        entry.model = None  # Vosk frees the model once no recognizer holds it
+        evict_ms = (time.perf_counter() - start) * 1000
+        self.stats['evictions'] += 1
+        self.stats['evict_ms_total'] += evict_ms
+        app_logger.info(f"Model '{key}' evicted ({entry.size / 1024 / 1024:.0f}MB)")
+
+    def pin(self, key: str = None) -> Model:
+        """Load a model and keep it loaded until unpin()
+
+        If the model fails to load the fallback model is pinned instead,
+        so release it with unpin(model=...).
+        """
+        return self._with_fallback(self.resolve(key), self._pin, 'pin')
+
+    def _pin(self, key: str) -> Model:
+        entry = self.entries[key]
+        while True:
+            model = self._get(key)
+            with self.lock:
+                # Recheck: another thread may have evicted it in between
+                if entry.model is model:
+                    entry.pins += 1
+                    return model
+
+    def unpin(self, key: str = None, model: Model = None):
+        """Release a pin; with model, on whichever entry holds that model
+
+        pin() may have fallen back to another key, and after apply_config()
+        replaced a key its new entry is not the one that was pinned, so
+        pass the model pin() returned. A model no entry holds is ignored.
+        """
+        with self.lock:
+            if model is None:
+                entry = self.entries[self.resolve(key)]
+            else:
+                entry = next((entry for entry in self.entries.values() if entry.model is model), None)
+                if entry is None:
+                    return
+            entry.pins = max(0, entry.pins - 1)
+
+    @contextmanager
+    def acquire(self, key: str = None):
+        """Pin a model for the duration of a with block"""
+        key = self.resolve(key)
+        model = self.pin(key)
+        try:
+            yield model
+        finally:
+            self.unpin(key, model)
+
+    def preload(self):
+        """Load the most used models in the background while they fit the budget"""
+        threading.Thread(target=self._preload, name='model-preload', daemon=True).start()
+
+    def _preload(self):
+        for key, _ in self.usage.most_common():
+            entry = self.entries.get(key)
+            if entry is None or entry.model is not None:
+                continue
+            if not Path(entry.path).exists():
+                continue
+            with self.lock:
+                if not entry.size:
+                    entry.size = directory_size(Path(entry.path))
+                if self.budget and self.used_bytes() + entry.size > self.budget:
+                    continue
+            try:
+                self._get(key, count_use=False)
+                with self.lock:
+                    self.stats['preloads'] += 1
+            except Exception as e:
+                log_error(f"ModelManager._preload({key})", e)
+
+    def get_stats(self) -> dict:
+        """Load/evict counts and timings, plus per-model state"""
+        with self.lock:
+            models = {key: {'loaded': entry.model is not None, 'pins': entry.pins,
+                            'size_mb': round(entry.size / 1024 / 1024, 1), 'load_ms': round(entry.load_ms),
+                            'uses': self.usage[key]}
+                      for key, entry in self.entries.items()}
+            return dict(self.stats, used_mb=round(self.used_bytes() / 1024 / 1024, 1), models=models)
+
+
+model_manager = ModelManager()
@@ -0,0 +1,354 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from core.logger import app_logger, log_error
+from core.audio_backends import create_backends
+from core.audio_input import AudioCapture, VoiceActivityDetector
+from core.model_manager import model_manager
+from core.wake_word import WakeWordDetector, WakeWordEngine
+from config.settings import config
+
+
+class MicStream:
+    """Front end of one microphone: noise floor, SNR, activity and pre-roll"""
+
+    FLOOR_FALL = 0.5
+    FLOOR_RISE_S = 5.0
+    FLOOR_RISE_ACTIVE_S = 60.0
+    MIN_FLOOR = 30.0
+
+    def __init__(self, index: int, preroll_chunks: int, window_chunks: int):
+        self.index = index
+        self.floor = None
+        self.snr_db = 0.0
+        self.active_until = -math.inf
+        self.preroll = deque(maxlen=preroll_chunks)
+        self.snr_window = deque(maxlen=window_chunks)
+        self.stats = {'chunks': 0, 'active': 0, 'wakes': 0, 'selected': 0}
+
+    def update(self, energy: float, data: bytes, timestamp: float, rate: int, active_snr_db: float, hangover_s: float):
+        """SNR against the floor before this chunk, then track the floor:
+        it follows drops fast and rises slowly, and hardly at all during
+        speech, so speech is not learned but a louder room eventually is"""
+        if self.floor is None:
+            self.floor = max(energy, self.MIN_FLOOR)
+        self.snr_db = 20 * math.log10(max(energy, 1.0) / self.floor)
+
+        duration = len(data) / 2 / rate
+        rise_s = self.FLOOR_RISE_ACTIVE_S if self.snr_db >= active_snr_db else self.FLOOR_RISE_S
+        rise = self.FLOOR_FALL if energy < self.floor else min(1.0, duration / rise_s)
+        self.floor = max(self.floor + (energy - self.floor) * rise, self.MIN_FLOOR)
+
+        self.preroll.append(data)
+        self.snr_window.append(self.snr_db)
+        self.stats['chunks'] += 1
+        if self.snr_db >= active_snr_db:
+            self.active_until = timestamp + hangover_s
+        if self.is_active(timestamp):
+            self.stats['active'] += 1
+
+    def is_active(self, timestamp: float) -> bool:
+        return timestamp <= self.active_until
+
+    def peak_snr_db(self) -> float:
+        return max(self.snr_window, default=0.0)
+
+    def reset(self):
+        self.active_until = -math.inf
+        self.preroll.clear()
+        self.snr_window.clear()
+
+
+class StreamArbiter:
+    """Decides which microphone streams are decoded and which one wins a wake
+
+    Every stream gets an energy VAD against its own tracked noise floor,
+    which costs a few microseconds per chunk. Only streams at least
+    MULTI_ACTIVE_SNR_DB above their floor, and for MULTI_HANGOVER_MS after,
+    hold one of the decoder slots; a newly active stream is decoded from
+    MULTI_PREROLL_MS of buffered audio, so the wake word onset is kept.
+    With all slots taken, a stream MULTI_SWITCH_DB louder than the weakest
+    decoded one takes its slot. Idle streams are never decoded, so CPU
+    grows with the number of decoders, not of microphones.
+
+    On a wake, each active stream scores its peak SNR over MULTI_WINDOW_MS;
+    decoded streams add MULTI_CONFIDENCE_DB times how much their wake
+    confidence differs from the best one, so a decoder that heard the
+    wake word less clearly counts against its stream. The best score
+    selects the stream for the command.
+    """
+
+    def __init__(self, count: int, decoders: int = None, rate: int = None):
+        self.RATE = rate or config.audio.SAMPLE_RATE
+        self.vad = VoiceActivityDetector()
+        self.slots: List[Optional[int]] = [None] * (decoders or config.multi.DECODERS)
+        chunk_s = config.audio.CHUNK_SIZE / self.RATE
+        preroll_chunks = max(1, math.ceil(config.multi.PREROLL_MS / 1000 / chunk_s))
+        window_chunks = max(1, math.ceil(config.multi.WINDOW_MS / 1000 / chunk_s))
+        self.streams = [MicStream(index, preroll_chunks, window_chunks) for index in range(count)]
+        self.stats = {'assignments': 0, 'switches': 0}
+        self.apply_config(config.multi, {})
+
+    def apply_config(self, multi, changed: dict):
+        """Take new MULTI_* thresholds"""
+        self.ACTIVE_SNR_DB = multi.ACTIVE_SNR_DB
+        self.HANGOVER_S = multi.HANGOVER_MS / 1000
+        self.SWITCH_DB = multi.SWITCH_DB
+        self.CONFIDENCE_DB = multi.CONFIDENCE_DB
+
+    def update(self, index: int, data: bytes, timestamp: float) -> Optional[Tuple[int, List[bytes], bool]]:
+        """Take one chunk of a stream; return (slot, chunks to decode, newly
+        assigned) if the stream is decoded, None if it is not"""
+        stream = self.streams[index]
+        stream.update(self.vad.get_energy(data), data, timestamp, self.RATE, self.ACTIVE_SNR_DB, self.HANGOVER_S)
+        active = stream.is_active(timestamp)
+
+        if index in self.slots:
+            slot = self.slots.index(index)
+            if active:
+                return slot, [data], False
+            self.slots[slot] = None
+            return None
+        if not active:
+            return None
+
+        if None in self.slots:
+            slot = self.slots.index(None)
+        else:
+            slot = min(range(len(self.slots)), key=lambda s: self.streams[self.slots[s]].snr_db)
+            if stream.snr_db < self.streams[self.slots[slot]].snr_db + self.SWITCH_DB:
+                return None
+            self.stats['switches'] += 1
+
+        self.slots[slot] = index
+        self.stats['assignments'] += 1
+        return slot, list(stream.preroll), True
+
+    def select(self, confidences: Dict[int, float], timestamp: float) -> Tuple[int, Dict[int, float]]:
+        """Stream to take the command from, and the score of every candidate
+
+        confidences maps stream index to wake confidence (0 to 1) for the
+        streams being decoded; streams not decoded are not penalized.
+        """
+        best = max(confidences.values(), default=0.0)
+        scores = {}
+        for stream in self.streams:
+            if stream.index in confidences or stream.is_active(timestamp):
+                scores[stream.index] = (stream.peak_snr_db()
+                                        + self.CONFIDENCE_DB * (confidences.get(stream.index, best) - best))
+        selected = max(scores, key=scores.get)
+        self.streams[selected].stats['selected'] += 1
+        return selected, scores
+
+    def reset(self):
+        """Forget activity and decoder assignments, e.g. after a command"""
+        self.slots = [None] * len(self.slots)
+        for stream in self.streams:
+            stream.reset()
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, streams=[dict(stream.stats, floor=round(stream.floor or 0.0))
+                                         for stream in self.streams])
+
+
+class MultiMicDetector(WakeWordDetector):
+    """Wake word detection over several microphones
+
+    One AudioCapture per stream (see create_backends), all read by the
+    detection thread. A StreamArbiter picks which streams MULTI_DECODERS
+    wake engines decode; on a wake the command is read from the stream
+    the arbiter selects, continuing right after the wake word. The black
+    box recorder and the GUI level meter follow the selected stream.
+    """
+
+    def __init__(self, on_wake: Callable, on_partial_result: Callable = None):
+        self.on_wake = on_wake
+        self.on_partial_result = on_partial_result
+        self.is_running = False
+        self.detection_thread = None
+        self.stats = {'chunks': 0, 'decode_s': 0.0, 'idle_chunks': 0}
+        # Held while on_wake reads the command from the selected capture
+        self._command_lock = threading.Lock()
+        self.decoders = max(1, config.multi.DECODERS)
+        self.selected = 0
+        self._recorder = None
+        self._level_feed = None
+
+        self._open_streams()
+        self._init_recognizer()
+
+        app_logger.info(f"MultiMicDetector initialized: {len(self._streams[0])} streams, {self.decoders} decoders")
+
+    def _open_streams(self):
+        data_ready = threading.Event()
+        captures = []
+        try:
+            for backend in create_backends(config.audio.FRAMES_PER_BUFFER or config.audio.CHUNK_SIZE):
+                captures.append(AudioCapture(backend, data_ready))
+        except Exception:
+            for capture in captures:
+                capture.stop()
+            raise
+        self.selected = min(self.selected, len(captures) - 1)
+        self._streams = (captures, StreamArbiter(len(captures), self.decoders), data_ready)
+        self._focus(self.selected)
+
+    def _init_recognizer(self):
+        """Pin the wake model and build one engine per decoder slot"""
+        try:
+            self.model_key = model_manager.resolve(config.wake.MODEL or None)
+            self.model = model_manager.pin(self.model_key)
+            self.engines = [WakeWordEngine(self.model, self.on_partial_result) for _ in range(self.decoders)]
+            self.engine = self.engines[0]
+
+            app_logger.info(f"Wake word model: '{self.model_key}', {self.decoders} decoders")
+
+        except Exception as e:
+            log_error("MultiMicDetector._init_recognizer", e)
+            raise
+
+    def apply_config(self, wake, changed: dict):
+        if 'MODEL' in changed:
+            self.reload_model()
+            return
+
+        for engine in self.engines:
+            engine.ON_PARTIAL = wake.ON_PARTIAL
+            engine.STABILITY = max(1, wake.PARTIAL_STABILITY)
+            engine.REFRACTORY_MS = wake.REFRACTORY_MS
+
+    def apply_multi_config(self, multi, changed: dict):
+        """Take new MULTI_* thresholds; MULTI_DECODERS takes effect after restart"""
+        self._streams[1].apply_config(multi, changed)
+        if 'DECODERS' in changed:
+            app_logger.warning("MULTI_DECODERS takes effect after restart")
+
+    @property
+    def audio_capture(self) -> AudioCapture:
+        return self._streams[0][self.selected]
+
+    def captures(self) -> List[AudioCapture]:
+        return list(self._streams[0])
+
+    def reopen_captures(self):
+        """Reopen every stream; waits for a command being read to end"""
+        with self._command_lock:
+            old_captures = self._streams[0]
+            self._open_streams()
+            for capture in old_captures:
+                capture.stop()
+
+    @property
+    def recorder(self):
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder):
+        self._recorder = recorder
+        self._focus(self.selected)
+
+    @property
+    def level_feed(self):
+        return self._level_feed
+
+    @level_feed.setter
+    def level_feed(self, level_feed):
+        self._level_feed = level_feed
+        self._focus(self.selected)
+
+    def _focus(self, index: int):
+        """Move the recorder and level meter to stream index"""
+        self.selected = index
+        for i, capture in enumerate(self._streams[0]):
+            capture.recorder = self._recorder if i == index else None
+            capture.level_feed = self._level_feed if i == index else None
+
+    def stop(self):
+        self.is_running = False
+        if self.detection_thread:
+            self.detection_thread.join(timeout=2.0)
+        for capture in self._streams[0]:
+            capture.stop()
+        model_manager.unpin(self.model_key, self.model)
+        app_logger.info(f"Multi-microphone detection stopped: {self.get_stats()}")
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, decode_s=round(self.stats['decode_s'], 2), arbiter=self._streams[1].get_stats())
+
+    def _detection_loop(self):
+        while self.is_running:
+            try:
+                captures, arbiter, data_ready = self._streams
+                data_ready.wait(0.5)
+                data_ready.clear()
+                for index, capture in enumerate(captures):
+                    if self._drain(index, capture, captures, arbiter):
+                        break
+
+            except Exception as e:
+                log_error("MultiMicDetector._detection_loop", e)
+
+    def _drain(self, index: int, capture: AudioCapture, captures: List[AudioCapture], arbiter: StreamArbiter) -> bool:
+        """Process queued chunks of one stream; True if a wake was handled"""
+        while capture.queue and self.is_running:
+            chunk = capture.get_timestamped_chunk(timeout=0)
+            if chunk is None:
+                return False
+            if chunk.gated:
+                capture.stats['gated'] += 1
+                capture.stats['gated_s'] += len(chunk.data) / 2 / capture.RATE
+                continue
+            if capture.level_feed is not None:
+                capture.level_feed.publish(chunk.data)
+
+            decision = arbiter.update(index, chunk.data, chunk.timestamp)
+            if decision is None:
+                self.stats['idle_chunks'] += 1
+                continue
+
+            slot, chunks, assigned = decision
+            engines = self.engines
+            engine = engines[slot]
+            if assigned:
+                engine.reset()
+            # Slot engines sit idle or skip audio between assignments; their
+            # clocks follow capture time so WAKE_REFRACTORY_MS is real time
+            engine.advance_to(chunk.timestamp * 1000 - sum(len(data) for data in chunks) / 2 / capture.RATE * 1000)
+            start = time.perf_counter()
+            fired = None
+            for data in chunks:
+                fired = engine.process_chunk(data)
+                if fired:
+                    break
+            self.stats['decode_s'] += time.perf_counter() - start
+            self.stats['chunks'] += len(chunks)
+
+            if fired:
+                self._on_stream_wake(index, engine, chunk.timestamp, captures, arbiter)
+                return True
+        return False
+
+    def _on_stream_wake(self, index: int, engine: WakeWordEngine, timestamp: float,
+                        captures: List[AudioCapture], arbiter: StreamArbiter):
+        confidences = {stream: self.engines[slot].pending_confidence()
+                       for slot, stream in enumerate(arbiter.slots) if stream is not None}
+        confidences[index] = engine.last_confidence if engine.last_confidence is not None else 1.0
+        arbiter.streams[index].stats['wakes'] += 1
+        selected, scores = arbiter.select(confidences, timestamp)
+        app_logger.info(f"Wake on stream {index}, command from stream {selected} "
+                        f"({captures[selected].backend.name}); scores: "
+                        + ", ".join(f"{stream}: {score:.1f}" for stream, score in sorted(scores.items())))
+
+        self._focus(selected)
+        # Streams are drained in turn, so the selected one may still hold the wake word
+        captures[selected].discard_until(timestamp)
+        with self._command_lock:
+            self.on_wake()
+        # Audio queued while the command was handled is stale
+        for capture in captures:
+            capture.flush()
+        arbiter.reset()
+        for other in self.engines:
+            other.reset()
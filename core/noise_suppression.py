@@ -0,0 +1,237 @@
+import time
+import numpy as np
+from core.logger import app_logger
+from config.settings import config
+
+class NoiseSuppressor:
+    """Streaming high-pass, spectral-subtraction and AGC stage
+
+    Works on 50%-overlapping frames of NOISE_FRAME_MS with a sqrt-Hann
+    analysis/synthesis window, so overlap-add reconstructs the input
+    exactly when every gain is 1. Per frequency bin the frame gets:
+      * a 2nd-order Butterworth high-pass response at NOISE_HIGHPASS_HZ
+      * a spectral-subtraction gain against a tracked noise floor,
+        never below NOISE_FLOOR_DB
+      * one AGC gain per frame, adapted only on frames well above the
+        noise floor so noise is never pumped up to speech level
+    Output length always equals input length; the stage delays audio by
+    one frame. Frame, power, gain and output buffers are preallocated
+    and grow only if a longer chunk arrives; the spectra returned by
+    np.fft are the only per-chunk allocations, as numpy's FFT takes no
+    output array before 2.0.
+    """
+
+    # Noise tracker: minimum of smoothed power over NOISE_WINDOW_S, kept
+    # as SUBWINDOWS partial minima; the bias corrects minimum to mean
+    SMOOTHING = 0.8
+    NOISE_WINDOW_S = 1.5
+    SUBWINDOWS = 6
+    NOISE_BIAS = 2.0
+    INIT_FRAMES = 10
+
+    # AGC envelope attack/release and gain smoothing, per frame
+    AGC_ATTACK = 0.3
+    AGC_RELEASE = 0.05
+    AGC_SMOOTHING = 0.1
+    AGC_SPEECH_SNR = 4.0
+
+    def __init__(self, rate: int = None, max_chunk: int = None):
+        self.RATE = rate or config.audio.SAMPLE_RATE
+        self.HOP = max(1, int(self.RATE * config.noise.FRAME_MS / 1000) // 2)
+        self.FRAME = 2 * self.HOP
+        self.STRENGTH = config.noise.STRENGTH
+        self.FLOOR = 10 ** (config.noise.FLOOR_DB / 20)
+        self.AGC = config.noise.AGC
+        self.AGC_TARGET = config.noise.AGC_TARGET_RMS
+        self.AGC_MAX_GAIN = 10 ** (config.noise.AGC_MAX_GAIN_DB / 20)
+        self.BUDGET_US = config.noise.BUDGET_US
+        self.bypass = False
+
+        self.window = np.sqrt(np.hanning(self.FRAME + 1)[:self.FRAME])
+        bins = self.HOP + 1
+        freqs = np.fft.rfftfreq(self.FRAME, 1 / self.RATE)
+        if config.noise.HIGHPASS_HZ > 0:
+            with np.errstate(divide='ignore'):
+                self.highpass = 1 / np.sqrt(1 + (config.noise.HIGHPASS_HZ / freqs) ** 4)
+        else:
+            self.highpass = np.ones(bins)
+
+        self._smoothed = np.zeros(bins)
+        self._noise = np.zeros(bins)
+        self._subwindow_frames = max(1, int(self.NOISE_WINDOW_S * self.RATE / self.HOP / self.SUBWINDOWS))
+        self._minima = np.zeros((self.SUBWINDOWS, bins))
+        self._current_min = np.full(bins, np.inf)
+        self._subwindow_pos = 0
+        self._subwindow_index = 0
+        # Frame power of a signal at 1 LSB RMS
+        self._silence_power = self.FRAME ** 2 / 2
+        self._tmp = np.empty(bins)
+        self._carry = np.zeros(self.HOP)
+        self.agc_envelope = float(self.AGC_TARGET)
+        self.agc_gain = 1.0
+        self.frames_seen = 0
+
+        self._allocate(max_chunk or config.audio.CHUNK_SIZE)
+        self.reset()
+
+        self.stats = {'chunks': 0, 'us_last': 0.0, 'us_avg': 0.0, 'us_max': 0.0, 'over_budget': 0}
+
+        app_logger.info(f"NoiseSuppressor initialized: {self.FRAME}-sample frames, "
+                        f"highpass={config.noise.HIGHPASS_HZ}Hz, strength={self.STRENGTH}, "
+                        f"floor={config.noise.FLOOR_DB}dB, agc={self.AGC}, budget={self.BUDGET_US}us")
+
+    def _allocate(self, max_chunk: int):
+        self.max_chunk = max_chunk
+        max_frames = max_chunk // self.HOP + 2
+        old_input = getattr(self, '_input', None)
+        old_fifo = getattr(self, '_fifo', None)
+
+        self._input = np.zeros(max_chunk + self.FRAME, dtype=np.float64)
+        self._frames = np.empty((max_frames, self.FRAME), dtype=np.float64)
+        self._power = np.empty((max_frames, self.HOP + 1), dtype=np.float64)
+        self._gains = np.empty((max_frames, self.HOP + 1), dtype=np.float64)
+        self._fifo = np.zeros(max_chunk + self.FRAME + self.HOP, dtype=np.float64)
+        self._pcm = np.empty(max_chunk, dtype=np.int16)
+
+        if old_input is not None:
+            self._input[:self._tail_len] = old_input[:self._tail_len]
+            self._fifo[:self._fifo_len] = old_fifo[:self._fifo_len]
+
+    def reset(self):
+        """Forget buffered audio; the noise estimate and AGC gain are kept"""
+        self._tail_len = self.FRAME - self.HOP
+        self._input[:self._tail_len] = 0
+        self._carry[:] = 0
+        # One hop of lead so a chunk that ends mid-hop still has output
+        self._fifo_len = self.HOP
+        self._fifo[:self.HOP] = 0
+
+    def process(self, data) -> bytes:
+        """Condition one chunk of mono int16 audio"""
+        if self.bypass:
+            return bytes(data)
+
+        start = time.perf_counter()
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = len(samples)
+        if n > self.max_chunk:
+            self._allocate(n)
+
+        total = self._tail_len + n
+        buffer = self._input[:total]
+        buffer[self._tail_len:] = samples
+
+        n_frames = (total - self.FRAME) // self.HOP + 1 if total >= self.FRAME else 0
+        if n_frames:
+            self._process_frames(buffer, n_frames)
+
+        consumed = n_frames * self.HOP
+        self._tail_len = total - consumed
+        self._input[:self._tail_len] = buffer[consumed:]
+
+        out = self._fifo[:n]
+        np.clip(out, -32768, 32767, out=out)
+        pcm = self._pcm[:n]
+        pcm[:] = out
+        self._fifo_len -= n
+        self._fifo[:self._fifo_len] = self._fifo[n:n + self._fifo_len]
+
+        self._update_stats((time.perf_counter() - start) * 1e6)
+        return pcm.tobytes()
+
+    def _process_frames(self, buffer: np.ndarray, n_frames: int):
+        hop = self.HOP
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.FRAME)[::hop][:n_frames]
+        frames = np.multiply(windows, self.window, out=self._frames[:n_frames])
+
+        spectrum = np.fft.rfft(frames, axis=1)
+        power = np.multiply(spectrum.real, spectrum.real, out=self._power[:n_frames])
+        # The gain rows are written only after the power is known
+        gains = self._gains[:n_frames]
+        power += np.multiply(spectrum.imag, spectrum.imag, out=gains)
+
+        for i in range(n_frames):
+            self._frame_gain(power[i], gains[i])
+
+        spectrum *= gains
+        synthesized = np.fft.irfft(spectrum, n=self.FRAME, axis=1)
+        synthesized *= self.window
+
+        # Overlap-add: each output hop is the second half of the previous
+        # frame plus the first half of the current one
+        block = synthesized[:, :hop]
+        block[0] += self._carry
+        block[1:] += synthesized[:-1, hop:]
+        self._carry[:] = synthesized[-1, hop:]
+
+        end = self._fifo_len + n_frames * hop
+        self._fifo[self._fifo_len:end].reshape(n_frames, hop)[:] = block
+        self._fifo_len = end
+
+    def _frame_gain(self, power: np.ndarray, gain: np.ndarray):
+        """Update noise floor and AGC from one frame's power; write its gains"""
+        smoothed, noise, tmp = self._smoothed, self._noise, self._tmp
+
+        # Digital silence (muted or restarted device) would drag the
+        # minimum to zero and let noise through for a whole window
+        if power.sum() >= self._silence_power:
+            if self.frames_seen < self.INIT_FRAMES:
+                self.frames_seen += 1
+                smoothed += (power - smoothed) / self.frames_seen
+                self._minima[:] = smoothed
+            else:
+                smoothed *= self.SMOOTHING
+                smoothed += (1 - self.SMOOTHING) * power
+            self._track_minimum(smoothed)
+
+        # Spectral subtraction, floored, then shaped by the high-pass
+        np.multiply(noise, self.STRENGTH * self.NOISE_BIAS, out=tmp)
+        np.divide(tmp, np.maximum(power, 1e-6), out=gain)
+        np.subtract(1, gain, out=gain)
+        np.maximum(gain, self.FLOOR ** 2, out=gain)
+        np.sqrt(gain, out=gain)
+        gain *= self.highpass
+
+        if self.AGC:
+            np.multiply(self.highpass, self.highpass, out=tmp)
+            signal_power = np.dot(power, tmp)
+            noise_power = np.dot(noise, tmp) * self.NOISE_BIAS
+            if signal_power > self.AGC_SPEECH_SNR * noise_power:
+                np.multiply(gain, gain, out=tmp)
+                rms = 2 * np.sqrt(np.dot(tmp, power)) / self.FRAME
+                rate = self.AGC_ATTACK if rms > self.agc_envelope else self.AGC_RELEASE
+                self.agc_envelope += (rms - self.agc_envelope) * rate
+
+            target = min(self.AGC_MAX_GAIN, max(1 / self.AGC_MAX_GAIN, self.AGC_TARGET / max(self.agc_envelope, 1.0)))
+            self.agc_gain += (target - self.agc_gain) * self.AGC_SMOOTHING
+            gain *= self.agc_gain
+
+    def _track_minimum(self, smoothed: np.ndarray):
+        """Noise floor = minimum over the current and the last SUBWINDOWS-1 subwindows"""
+        np.minimum(self._current_min, smoothed, out=self._current_min)
+        self._subwindow_pos += 1
+        if self._subwindow_pos >= self._subwindow_frames:
+            self._minima[self._subwindow_index] = self._current_min
+            self._subwindow_index = (self._subwindow_index + 1) % self.SUBWINDOWS
+            self._current_min[:] = np.inf
+            self._subwindow_pos = 0
+        np.min(self._minima, axis=0, out=self._noise)
+        np.minimum(self._noise, self._current_min, out=self._noise)
+
+    def _update_stats(self, elapsed_us: float):
+        stats = self.stats
+        stats['chunks'] += 1
+        stats['us_last'] = elapsed_us
+        stats['us_avg'] += (elapsed_us - stats['us_avg']) * 0.05
+        if elapsed_us > stats['us_max']:
+            stats['us_max'] = elapsed_us
+        # The first chunk pays for one-off FFT setup
+        if self.BUDGET_US and elapsed_us > self.BUDGET_US and stats['chunks'] > 1:
+            stats['over_budget'] += 1
+            if stats['over_budget'] == 1 or stats['over_budget'] % 100 == 0:
+                app_logger.warning(f"Noise suppression over budget: {elapsed_us:.0f}us > {self.BUDGET_US}us "
+                                   f"({stats['over_budget']} chunks)")
+
+    def get_stats(self) -> dict:
+        """Per-chunk processing time in microseconds and budget overruns"""
+        return dict(self.stats, agc_gain_db=round(20 * float(np.log10(self.agc_gain)), 1))
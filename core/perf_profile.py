@@ -0,0 +1,117 @@
+import json
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import List, Tuple
+import numpy as np
+from core.logger import app_logger, log_error
+from core.audio_input import VoiceActivityDetector
+from core.model_manager import model_manager
+from core.wake_word import WakeWordEngine
+from config.settings import config
+
+CANDIDATE_CHUNKS = (512, 1024, 2048, 4096, 8192)
+CALIBRATION_SECONDS = 5.0
+
+
+def synthetic_audio(seconds: float, rate: int, seed: int = 0) -> np.ndarray:
+    """Voiced bursts with syllable rhythm between pauses, over room noise"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    audio = rng.standard_normal(n) * 150
+    position = 0
+    while position < n:
+        length = min(n - position, int(rng.uniform(0.5, 1.5) * rate))
+        t = np.arange(length) / rate
+        f0 = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * k * f0 * t) / k for k in range(1, 20) if k * f0 < rate / 2)
+        syllables = np.abs(np.sin(np.pi * rng.uniform(3.5, 5.5) * t))
+        audio[position:position + length] += voiced * syllables * 3000
+        position += length + int(rng.uniform(0.3, 1.0) * rate)
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def measure_chunk_cost(model, vad: VoiceActivityDetector, chunk: int, audio: np.ndarray, rate: int) -> dict:
+    """CPU time of wake decoding plus VAD framing per chunk at one chunk size
+
+    Runs the WakeWordEngine itself, so the per-chunk Python work (JSON
+    parsing of partials, wake word scanning) is counted with Kaldi's.
+    """
+    engine = WakeWordEngine(model)
+    count = len(audio) // chunk
+    start = time.thread_time()
+    for index in range(count):
+        data = audio[index * chunk:(index + 1) * chunk].tobytes()
+        engine.process_chunk(data)
+        vad.frame_energies(data)
+    cpu_s = time.thread_time() - start
+    return {'chunk': chunk, 'ms_per_chunk': round(cpu_s * 1000 / count, 2),
+            'cpu_share': round(cpu_s / (count * chunk / rate), 3)}
+
+
+def choose_chunk(results: List[dict], target: float) -> int:
+    """Smallest chunk within the CPU target, else the cheapest one"""
+    within = [r['chunk'] for r in results if r['cpu_share'] <= target]
+    if within:
+        return min(within)
+    return min(results, key=lambda r: r['cpu_share'])['chunk']
+
+
+def calibrate(target: float = None, candidates=CANDIDATE_CHUNKS) -> Tuple[int, List[dict], bool]:
+    """Pick the chunk size for this host: (chunk, measurements, from cache)
+
+    Results are kept in PERF_CALIBRATION_FILE and reused while the wake
+    model, sample rate and candidates are the same.
+    """
+    target = target or config.cpu_target()
+    rate = config.audio.SAMPLE_RATE
+    model_key = model_manager.resolve(config.wake.MODEL or None)
+    key = {'model': model_key, 'rate': rate, 'candidates': list(candidates)}
+
+    cache_path = Path(config.perf.CALIBRATION_FILE)
+    results = None
+    try:
+        cached = json.loads(cache_path.read_text(encoding='utf-8'))
+        if cached.get('key') == key:
+            results = cached['results']
+    except (OSError, ValueError):
+        pass
+    if results is not None:
+        return choose_chunk(results, target), results, True
+
+    model = model_manager.get(model_key)
+    audio = synthetic_audio(CALIBRATION_SECONDS, rate)
+    vad = VoiceActivityDetector()
+    results = [measure_chunk_cost(model, vad, chunk, audio, rate) for chunk in candidates]
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({'key': key, 'results': results, 'time': time.time()}), encoding='utf-8')
+    except OSError as e:
+        log_error("perf_profile.calibrate", e)
+    return choose_chunk(results, target), results, False
+
+
+def apply_startup_profile():
+    """Run the calibration if PERF_CALIBRATE is set, then log the performance settings
+
+    Must run before any AudioCapture is created, as it may change
+    AUDIO_CHUNK_SIZE.
+    """
+    target = config.cpu_target()
+    if config.perf.CALIBRATE:
+        try:
+            start = time.perf_counter()
+            chunk, results, cached = calibrate(target)
+            app_logger.info(f"Chunk calibration{' (cached)' if cached else ''}: " + ", ".join(
+                f"{r['chunk']}: {r['ms_per_chunk']}ms/chunk {r['cpu_share']:.0%} CPU" for r in results)
+                + f" -> {chunk} for {target:.0%} CPU target in {time.perf_counter() - start:.1f}s")
+            config.perf = replace(config.perf, CALIBRATED_CHUNK=chunk)
+            config.audio = replace(config.audio, CHUNK_SIZE=chunk)
+        except Exception as e:
+            log_error("perf_profile.apply_startup_profile", e)
+
+    chunk = config.audio.CHUNK_SIZE
+    app_logger.info(f"Performance profile: {config.perf.PROFILE or 'custom'}, chunk {chunk} "
+                    f"({chunk / config.audio.SAMPLE_RATE * 1000:.0f}ms), VAD frame {config.vad.FRAME_MS}ms, "
+                    f"wake VAD gate {'on' if config.wake.VAD_GATE else 'off'}, GUI {config.gui.VU_FPS}fps, "
+                    f"CPU target {target:.0%}")
@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Callable, List, Optional
+import numpy as np
+from core.logger import log_error
+from config.settings import config
+
+# listener(event, text) with event "start" or "stop"
+PlaybackListener = Callable[[str, str], None]
+
+
+class PlaybackMonitor:
+    """TTS playback state shared with the capture side
+
+    The TTS engine reports when an utterance starts and stops playing
+    and, when it rendered the audio itself, the reference signal at the
+    capture sample rate. Times are time.monotonic(), the clock of the
+    capture timestamps.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.speaking = False
+        self.started_at = None
+        self.finished_at = None
+        self.reference = None
+        self.listeners: List[PlaybackListener] = []
+        self.stats = {'utterances': 0, 'with_reference': 0, 'playback_s': 0.0}
+
+    def started(self, text: str = '', reference: np.ndarray = None, rate: int = None):
+        """Playback begins now; reference is mono audio at rate"""
+        if reference is not None and rate and rate != config.audio.SAMPLE_RATE:
+            from core.resampler import PolyphaseResampler
+            resampler = PolyphaseResampler(rate, config.audio.SAMPLE_RATE, max_chunk=len(reference))
+            reference = resampler.process(reference.astype(np.float32)).copy()
+
+        with self.lock:
+            self.speaking = True
+            self.started_at = time.monotonic()
+            self.finished_at = None
+            self.reference = reference.astype(np.float32) if reference is not None else None
+            self.stats['utterances'] += 1
+            self.stats['with_reference'] += reference is not None
+        self._notify('start', text)
+
+    def finished(self, text: str = ''):
+        with self.lock:
+            if not self.speaking:
+                return
+            self.speaking = False
+            self.finished_at = time.monotonic()
+            self.stats['playback_s'] += self.finished_at - self.started_at
+        self._notify('stop', text)
+
+    def _notify(self, event: str, text: str):
+        for listener in self.listeners:
+            try:
+                listener(event, text)
+            except Exception as e:
+                log_error("PlaybackMonitor listener", e)
+
+    def is_active(self, timestamp: float, tail_s: float) -> bool:
+        """True if audio captured at timestamp may contain playback"""
+        if self.speaking:
+            return self.started_at is not None and timestamp >= self.started_at
+        return self.finished_at is not None and self.started_at <= timestamp <= self.finished_at + tail_s
+
+    def reference_segment(self, start: float, end: float) -> Optional[np.ndarray]:
+        """Reference samples played between two monotonic times, zero outside playback"""
+        reference, started_at = self.reference, self.started_at
+        if reference is None:
+            return None
+        rate = config.audio.SAMPLE_RATE
+        first = int(round((start - started_at) * rate))
+        count = int(round((end - start) * rate))
+        segment = np.zeros(count, dtype=np.float32)
+        lo, hi = max(first, 0), min(first + count, len(reference))
+        if hi > lo:
+            segment[lo - first:hi - first] = reference[lo:hi]
+        return segment
+
+
+playback = PlaybackMonitor()
@@ -0,0 +1,189 @@
+import importlib
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+from core.logger import app_logger, log_error
+from config.settings import config
+
+ENTRY_POINT_GROUP = 'voice_assistant.commands'
+
+SIDE_EFFECTS = ('none', 'launch', 'system')
+LATENCY_CLASSES = ('instant', 'fast', 'slow')
+
+
+@dataclass
+class CommandSpec:
+    """Command declaration; handler is a callable or a lazy "module:function" path
+
+    side_effect: none (answers only), launch (opens apps or pages),
+    system (power, lock). latency: instant, fast or slow (network,
+    heavy libraries).
+    """
+    name: str
+    triggers: List[str]
+    handler: Union[str, Callable[[str], str]]
+    side_effect: str = 'none'
+    latency: str = 'instant'
+    open_ended: bool = False
+    source: str = 'builtin'
+    stats: dict = field(default_factory=lambda: {'import_ms': 0.0, 'first_call_ms': None, 'calls': 0})
+
+    @property
+    def is_loaded(self) -> bool:
+        return callable(self.handler)
+
+
+def spec_from_dict(data: dict, source: str) -> CommandSpec:
+    """Build a CommandSpec from manifest or entry point metadata; omitted keys take the CommandSpec defaults"""
+    spec = CommandSpec(
+        name=data['name'],
+        triggers=[t.lower() for t in data.get('triggers', [data['name']])],
+        handler=data['handler'],
+        side_effect=data.get('side_effect', CommandSpec.side_effect),
+        latency=data.get('latency', CommandSpec.latency),
+        open_ended=bool(data.get('open_ended', False)),
+        source=source,
+    )
+    if spec.side_effect not in SIDE_EFFECTS:
+        raise ValueError(f"{spec.name}: side_effect must be one of {', '.join(SIDE_EFFECTS)}")
+    if spec.latency not in LATENCY_CLASSES:
+        raise ValueError(f"{spec.name}: latency must be one of {', '.join(LATENCY_CLASSES)}")
+    if not isinstance(spec.handler, str) or ':' not in spec.handler:
+        raise ValueError(f"{spec.name}: handler must be 'module:function'")
+    return spec
+
+
+class PluginRegistry:
+    """Command registry with lazily imported handlers
+
+    Plugins are discovered from JSON manifests in PLUGINS_DIR (one
+    command object or a list; handler modules live next to the
+    manifest) and from the "voice_assistant.commands" entry point
+    group, whose entries return a list of such dicts. Discovery reads
+    metadata only: a handler module is imported on its first call, or
+    earlier by warmup() in the background.
+    """
+
+    def __init__(self):
+        self.specs: Dict[str, CommandSpec] = {}
+        self.load_lock = threading.Lock()
+        self.discovery_ms = {}
+
+    def register(self, spec: CommandSpec):
+        if spec.name in self.specs:
+            app_logger.warning(f"Command '{spec.name}' from {spec.source} replaces one from "
+                               f"{self.specs[spec.name].source}")
+        self.specs[spec.name] = spec
+
+    def discover(self, plugin_dir: str = None, entry_points: bool = None):
+        """Register plugins from the plugin directory and entry points"""
+        plugin_dir = config.plugins.DIR if plugin_dir is None else plugin_dir
+        entry_points = config.plugins.ENTRY_POINTS if entry_points is None else entry_points
+
+        if plugin_dir and Path(plugin_dir).is_dir():
+            for manifest in sorted(Path(plugin_dir).glob('*.json')):
+                self._timed(manifest.name, self._load_manifest, manifest)
+        if entry_points:
+            for entry_point in self._entry_points():
+                self._timed(entry_point.name, self._load_entry_point, entry_point)
+
+        if self.discovery_ms:
+            app_logger.info("Plugin discovery: " + ", ".join(f"{name} {ms:.1f}ms"
+                                                             for name, ms in self.discovery_ms.items()))
+
+    def _timed(self, name: str, func, arg):
+        start = time.perf_counter()
+        try:
+            func(arg)
+        except Exception as e:
+            log_error(f"PluginRegistry.discover({name})", e)
+        self.discovery_ms[name] = (time.perf_counter() - start) * 1000
+
+    def _load_manifest(self, manifest: Path):
+        data = json.loads(manifest.read_text(encoding='utf-8'))
+        plugin_path = str(manifest.parent.resolve())
+        if plugin_path not in sys.path:
+            sys.path.append(plugin_path)
+        for item in data if isinstance(data, list) else [data]:
+            self.register(spec_from_dict(item, f"plugin:{manifest.name}"))
+
+    @staticmethod
+    def _entry_points():
+        from importlib import metadata
+        try:
+            return list(metadata.entry_points(group=ENTRY_POINT_GROUP))
+        except TypeError:
+            # Python < 3.10
+            return list(metadata.entry_points().get(ENTRY_POINT_GROUP, []))
+
+    def _load_entry_point(self, entry_point):
+        # The entry point should be a light metadata function; handlers stay lazy
+        for item in entry_point.load()():
+            self.register(spec_from_dict(item, f"entry_point:{entry_point.name}"))
+
+    def resolve(self, name: str) -> Callable[[str], str]:
+        """Return the command's handler, importing its module on first use"""
+        spec = self.specs[name]
+        if spec.is_loaded:
+            return spec.handler
+
+        with self.load_lock:
+            if not spec.is_loaded:
+                start = time.perf_counter()
+                module_name, func_name = spec.handler.split(':', 1)
+                handler = getattr(importlib.import_module(module_name), func_name)
+                spec.stats['import_ms'] = (time.perf_counter() - start) * 1000
+                spec.handler = handler
+                app_logger.info(f"Plugin '{name}' loaded in {spec.stats['import_ms']:.1f}ms")
+        return spec.handler
+
+    def call(self, name: str, text: str) -> str:
+        """Run a command, timing the first call including any import"""
+        spec = self.specs[name]
+        start = time.perf_counter()
+        result = self.resolve(name)(text)
+        if spec.stats['first_call_ms'] is None:
+            spec.stats['first_call_ms'] = (time.perf_counter() - start) * 1000
+            if spec.source != 'builtin':
+                app_logger.info(f"Plugin '{name}' first call: {spec.stats['first_call_ms']:.1f}ms "
+                                f"(import {spec.stats['import_ms']:.1f}ms)")
+        spec.stats['calls'] += 1
+        return result
+
+    def warmup(self, delay_ms: int = None):
+        """Import pending handlers in the background, slow ones first"""
+        delay = (config.plugins.WARMUP_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        pending = sorted((spec for spec in self.specs.values() if not spec.is_loaded),
+                         key=lambda spec: -LATENCY_CLASSES.index(spec.latency))
+        if not pending:
+            return
+
+        def run():
+            time.sleep(delay)
+            for spec in pending:
+                try:
+                    self.resolve(spec.name)
+                except Exception as e:
+                    log_error(f"PluginRegistry.warmup({spec.name})", e)
+
+        threading.Thread(target=run, name='plugin-warmup', daemon=True).start()
+
+    def match(self, text: str, disabled: set = frozenset()) -> Optional[str]:
+        """Name of the first command with a trigger in text"""
+        for name, spec in self.specs.items():
+            if name in disabled:
+                continue
+            for trigger in spec.triggers:
+                if trigger in text:
+                    return name
+        return None
+
+    def get_stats(self) -> dict:
+        """Per-plugin discovery, import and first-call timings"""
+        return {name: dict(spec.stats, source=spec.source, loaded=spec.is_loaded,
+                           discovery_ms=self.discovery_ms.get(spec.source.split(':', 1)[-1]))
+                for name, spec in self.specs.items()}
@@ -0,0 +1,111 @@
+import os
+import sys
+from typing import Dict, Optional
+
+# Shared by the profiler and the model manager; psutil is used when
+# installed, otherwise the Win32 API on Windows and /proc on Linux
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, None if unavailable"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def thread_cpu_times() -> Dict[int, float]:
+    """CPU seconds (user + system) per native thread id, empty if unavailable"""
+    try:
+        import psutil
+        return {t.id: t.user_time + t.system_time for t in psutil.Process().threads()}
+    except ImportError:
+        pass
+
+    if sys.platform == 'win32':
+        try:
+            return _win32_thread_cpu_times()
+        except (OSError, AttributeError, ValueError):
+            return {}
+
+    times = {}
+    try:
+        ticks = os.sysconf('SC_CLK_TCK')
+        for tid in os.listdir('/proc/self/task'):
+            with open(f'/proc/self/task/{tid}/stat') as f:
+                # Fields after the parenthesised name; utime and stime are 14th and 15th overall
+                fields = f.read().rsplit(')', 1)[1].split()
+            times[int(tid)] = (int(fields[11]) + int(fields[12])) / ticks
+    except (OSError, ValueError, AttributeError):
+        pass
+    return times
+
+
+def _win32_thread_cpu_times() -> Dict[int, float]:
+    """Every thread of this process from a Toolhelp snapshot, timed with GetThreadTimes"""
+    import ctypes
+    from ctypes import wintypes
+
+    TH32CS_SNAPTHREAD = 0x4
+    THREAD_QUERY_LIMITED_INFORMATION = 0x0800
+
+    class THREADENTRY32(ctypes.Structure):
+        _fields_ = [('dwSize', wintypes.DWORD), ('cntUsage', wintypes.DWORD), ('th32ThreadID', wintypes.DWORD),
+                    ('th32OwnerProcessID', wintypes.DWORD), ('tpBasePri', wintypes.LONG),
+                    ('tpDeltaPri', wintypes.LONG), ('dwFlags', wintypes.DWORD)]
+
+    # A private instance, so setting restype does not affect other users of windll
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.OpenThread.restype = wintypes.HANDLE
+    invalid_handle = wintypes.HANDLE(-1).value
+
+    times = {}
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPTHREAD, 0)
+    if not snapshot or snapshot == invalid_handle:
+        return times
+    try:
+        pid = os.getpid()
+        entry = THREADENTRY32()
+        entry.dwSize = ctypes.sizeof(entry)
+        creation, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        more = kernel32.Thread32First(wintypes.HANDLE(snapshot), ctypes.byref(entry))
+        while more:
+            if entry.th32OwnerProcessID == pid:
+                handle = kernel32.OpenThread(THREAD_QUERY_LIMITED_INFORMATION, False, entry.th32ThreadID)
+                if handle:
+                    if kernel32.GetThreadTimes(wintypes.HANDLE(handle), ctypes.byref(creation), ctypes.byref(exited),
+                                               ctypes.byref(kernel), ctypes.byref(user)):
+                        # FILETIME counts 100 ns intervals
+                        times[entry.th32ThreadID] = sum((t.dwHighDateTime << 32 | t.dwLowDateTime)
+                                                        for t in (kernel, user)) / 1e7
+                    kernel32.CloseHandle(wintypes.HANDLE(handle))
+            more = kernel32.Thread32Next(wintypes.HANDLE(snapshot), ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(wintypes.HANDLE(snapshot))
+    return times
@@ -0,0 +1,128 @@
+from math import gcd
+import numpy as np
+from core.logger import app_logger
+
+class PolyphaseResampler:
+    """Streaming rational resampler with a windowed-sinc polyphase FIR
+
+    Keeps the filter history between chunks, so chunked output equals
+    resampling the whole signal at once. Work buffers are preallocated
+    and only grow if a longer chunk arrives.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, zero_crossings: int = 16,
+                 rolloff: float = 0.9, beta: float = 8.0, max_chunk: int = 8192):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+
+        # Taps per phase, measured in input samples
+        self.taps = int(np.ceil(2 * zero_crossings * max(1.0, self.down / self.up)))
+        length = self.taps * self.up
+        cutoff = rolloff * 0.5 / max(self.up, self.down)
+        m = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, beta) * self.up
+
+        # phases[p, j] multiplies the input window position j (oldest first)
+        self.phases = np.ascontiguousarray(
+            prototype.reshape(self.taps, self.up)[::-1].T, dtype=np.float32)
+        self.delay = (length - 1) / 2 / self.down  # in output samples
+
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._t = 0
+        self._allocate(max_chunk)
+
+        app_logger.debug(f"PolyphaseResampler {in_rate}->{out_rate}Hz: up={self.up}, down={self.down}, "
+                         f"{self.taps} taps/phase")
+
+    def _allocate(self, max_chunk: int):
+        self.max_chunk = max_chunk
+        max_out = max_chunk * self.up // self.down + 2
+        self._buffer = np.zeros(max_chunk + self.taps - 1, dtype=np.float32)
+        self._offsets = np.arange(max_out, dtype=np.int64) * self.down
+        self._positions = np.empty(max_out, dtype=np.int64)
+        self._bases = np.empty(max_out, dtype=np.int64)
+        self._phase_idx = np.empty(max_out, dtype=np.int64)
+        self._windows = np.empty((max_out, self.taps), dtype=np.float32)
+        self._coefs = np.empty((max_out, self.taps), dtype=np.float32)
+        self._out = np.empty(max_out, dtype=np.float32)
+
+    def reset(self):
+        """Forget filter history"""
+        self._history[:] = 0
+        self._t = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample next mono chunk; returns a view valid until the next call"""
+        n_in = len(samples)
+        if n_in > self.max_chunk:
+            self._allocate(n_in)
+
+        k = self.taps - 1
+        buffer = self._buffer[:n_in + k]
+        buffer[:k] = self._history
+        buffer[k:] = samples
+
+        span = n_in * self.up
+        n_out = max(0, -(-(span - self._t) // self.down))
+
+        if n_out:
+            positions = self._positions[:n_out]
+            np.add(self._offsets[:n_out], self._t, out=positions)
+            bases = np.floor_divide(positions, self.up, out=self._bases[:n_out])
+            phase_idx = np.remainder(positions, self.up, out=self._phase_idx[:n_out])
+
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps)
+            gathered = np.take(windows, bases, axis=0, out=self._windows[:n_out])
+            coefs = np.take(self.phases, phase_idx, axis=0, out=self._coefs[:n_out])
+            np.multiply(gathered, coefs, out=gathered)
+            out = np.sum(gathered, axis=1, out=self._out[:n_out])
+        else:
+            out = self._out[:0]
+
+        self._t += n_out * self.down - span
+        self._history[:] = buffer[n_in:]
+        return out
+
+
+class InputConditioner:
+    """Down-mixes and resamples device audio to mono int16 at the target rate"""
+
+    def __init__(self, in_rate: int, in_channels: int, out_rate: int, max_frames: int = 8192):
+        self.in_rate = in_rate
+        self.in_channels = in_channels
+        self.out_rate = out_rate
+        self.resampler = PolyphaseResampler(in_rate, out_rate, max_chunk=max_frames) if in_rate != out_rate else None
+        self._allocate(max_frames)
+
+        app_logger.info(f"InputConditioner: {in_rate}Hz {in_channels}ch -> {out_rate}Hz mono")
+
+    def _allocate(self, max_frames: int):
+        self.max_frames = max_frames
+        max_out = max_frames * self.out_rate // self.in_rate + 2
+        self._mono = np.empty(max_frames, dtype=np.float32)
+        self._pcm = np.empty(max(max_frames, max_out), dtype=np.int16)
+
+    def process(self, data) -> bytes:
+        """Convert one chunk of interleaved int16 device audio"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        n_frames = len(samples) // self.in_channels
+        if n_frames > self.max_frames:
+            self._allocate(n_frames)
+
+        frames = samples[:n_frames * self.in_channels].reshape(n_frames, self.in_channels)
+        mono = np.sum(frames, axis=1, dtype=np.float32, out=self._mono[:n_frames])
+        if self.in_channels > 1:
+            mono *= 1.0 / self.in_channels
+
+        out = self.resampler.process(mono) if self.resampler else mono
+        np.clip(out, -32768, 32767, out=out)
+        pcm = self._pcm[:len(out)]
+        pcm[:] = out
+        return pcm.tobytes()
+
+    def reset(self):
+        if self.resampler:
+            self.resampler.reset()
@@ -1,7 +1,8 @@
 import json
-from vosk import Model, KaldiRecognizer
-from pathlib import Path
+from typing import Optional, Tuple
+from vosk import KaldiRecognizer
 from core.logger import app_logger, log_error
+from core.model_manager import model_manager
 from config.settings import config
 
 class SpeechToTextPipeline:
@@ -9,45 +10,131 @@ class SpeechToTextPipeline:
     
     def __init__(self):
         self.model = None
+        self.model_key = None
         self.recognizer = None
+        self.segments = []
+        self.confidences = []
         self._init_model()
         app_logger.info("SpeechToTextPipeline initialized")
     
     def _init_model(self):
-        """Initialize Vosk model"""
+        """Load the default model; utterances pin their own in begin_utterance()"""
         try:
-            model_path = Path(config.vosk.MODEL_PATH)
+            model_manager.get()
             
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model not found at {model_path}")
-            
-            self.model = Model(str(model_path))
-            self.recognizer = KaldiRecognizer(self.model, config.audio.SAMPLE_RATE)
-            
-            app_logger.info(f"Vosk model loaded from {model_path}")
+            app_logger.info(f"Vosk model '{model_manager.default_key}' ready")
             
         except Exception as e:
             log_error("SpeechToTextPipeline._init_model", e)
             raise
     
-    def recognize(self, audio_data: bytes) -> str:
-        """Recognize speech from audio data"""
+    def recognize(self, audio_data, language: str = None) -> str:
+        """Recognize speech from audio data (bytes or buffer view)"""
         try:
-            recognizer = KaldiRecognizer(self.model, config.audio.SAMPLE_RATE)
+            if not isinstance(audio_data, bytes):
+                # Vosk's cffi binding only takes bytes for the waveform pointer
+                audio_data = bytes(audio_data)
             
-            if recognizer.AcceptWaveform(audio_data):
-                result = json.loads(recognizer.Result())
-            else:
-                result = json.loads(recognizer.PartialResult())
+            with model_manager.acquire(language) as model:
+                recognizer = KaldiRecognizer(model, config.audio.SAMPLE_RATE)
+                
+                if recognizer.AcceptWaveform(audio_data):
+                    result = json.loads(recognizer.Result())
+                else:
+                    result = json.loads(recognizer.PartialResult())
             
-            if 'result' in result:
-                recognized_text = ' '.join([item['conf'] for item in result['result']])
-                return recognized_text.lower().strip()
-            elif 'partial' in result:
-                return result['partial'].lower().strip()
-            
-            return ""
+            return self._extract_text(result)
             
         except Exception as e:
             log_error("SpeechToTextPipeline.recognize", e)
             return ""
+    
+    def begin_utterance(self, language: str = None):
+        """Start streaming recognition of a new utterance
+        
+        language selects the model by VOSK_MODELS key; the model stays
+        pinned in the model manager until finish_utterance(). Returns
+        False if no model could be loaded.
+        """
+        self._release_model()
+        self.segments = []
+        self.confidences = []
+        try:
+            self.model_key = model_manager.resolve(language)
+            self.model = model_manager.pin(self.model_key)
+            self.recognizer = KaldiRecognizer(self.model, config.audio.SAMPLE_RATE)
+            # Per-word results carry the confidence recorded in the command journal
+            self.recognizer.SetWords(True)
+            return True
+        except Exception as e:
+            log_error("SpeechToTextPipeline.begin_utterance", e)
+            self._release_model()
+            return False
+    
+    def _release_model(self):
+        """Unpin the utterance's model and drop every reference to it"""
+        if self.model is not None:
+            model_manager.unpin(self.model_key, self.model)
+        self.model = None
+        self.model_key = None
+        self.recognizer = None
+    
+    def accept_chunk(self, audio_chunk: bytes) -> Tuple[str, bool]:
+        """Feed chunk to streaming recognizer, return (text so far, is_final)"""
+        if self.recognizer is None:
+            return ' '.join(self.segments), False
+        try:
+            if self.recognizer.AcceptWaveform(audio_chunk):
+                result = json.loads(self.recognizer.Result())
+                self._collect_confidence(result)
+                text = self._extract_text(result)
+                if text:
+                    self.segments.append(text)
+                return ' '.join(self.segments), True
+            
+            partial = self._extract_text(json.loads(self.recognizer.PartialResult()))
+            return ' '.join(self.segments + [partial] if partial else self.segments), False
+            
+        except Exception as e:
+            log_error("SpeechToTextPipeline.accept_chunk", e)
+            return ' '.join(self.segments), False
+    
+    def finish_utterance(self) -> str:
+        """Flush streaming recognizer and return full utterance text"""
+        try:
+            if self.recognizer is None:
+                return ''
+            result = json.loads(self.recognizer.FinalResult())
+            self._collect_confidence(result)
+            text = self._extract_text(result)
+            if text:
+                self.segments.append(text)
+        except Exception as e:
+            log_error("SpeechToTextPipeline.finish_utterance", e)
+        finally:
+            self._release_model()
+        
+        recognized_text = ' '.join(self.segments)
+        self.segments = []
+        return recognized_text
+    
+    def _collect_confidence(self, result: dict):
+        self.confidences.extend(item['conf'] for item in result.get('result', []) if 'conf' in item)
+    
+    def utterance_confidence(self) -> Optional[float]:
+        """Mean word confidence of the last utterance, None without words"""
+        if not self.confidences:
+            return None
+        return sum(self.confidences) / len(self.confidences)
+    
+    @staticmethod
+    def _extract_text(result: dict) -> str:
+        """Extract normalized text from Vosk result"""
+        if 'text' in result:
+            return result['text'].lower().strip()
+        elif 'result' in result:
+            return ' '.join([item['word'] for item in result['result']]).lower().strip()
+        elif 'partial' in result:
+            return result['partial'].lower().strip()
+        
+        return ""
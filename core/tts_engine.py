@@ -1,21 +1,42 @@
+import os
 import pyttsx3
+import tempfile
 import threading
+import wave
+import numpy as np
 from core.logger import app_logger, log_error
+from core.playback import playback
 from config.settings import config
 
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
 class TextToSpeechEngine:
-    """Text to Speech using pyttsx3"""
+    """Text to Speech using pyttsx3
+    
+    Playback start and stop are published to the shared playback
+    monitor so capture can ignore the assistant's own voice. With
+    TTS_REFERENCE on Windows, speech is rendered to a WAV file first and
+    played with winsound, so the monitor also gets the exact reference
+    signal; this adds the render time before speech starts.
+    """
     
     def __init__(self):
+        self.speech_lock = threading.Lock()
+        self._rendering = False
+        self._text = ''
         self.engine = pyttsx3.init(driverName=config.tts.ENGINE)
         self._configure_engine()
-        self.speech_lock = threading.Lock()
         
         app_logger.info("TextToSpeechEngine initialized")
     
     def _configure_engine(self):
         """Configure TTS engine"""
         try:
+            self.engine.connect('started-utterance', self._on_started)
+            self.engine.connect('finished-utterance', self._on_finished)
             self.engine.setProperty('rate', config.tts.RATE)
             self.engine.setProperty('volume', config.tts.VOLUME)
             
@@ -36,28 +57,90 @@ class TextToSpeechEngine:
         except Exception as e:
             log_error("TextToSpeechEngine._configure_engine", e)
     
+    def apply_config(self, tts, changed: dict):
+        """Take new TTS_* settings; the driver is reloaded only if TTS_ENGINE changed"""
+        with self.speech_lock:
+            if 'ENGINE' in changed:
+                self.engine.stop()
+                self.engine = pyttsx3.init(driverName=tts.ENGINE)
+                self._configure_engine()
+            else:
+                self.engine.setProperty('rate', tts.RATE)
+                self.engine.setProperty('volume', tts.VOLUME)
+    
+    def _on_started(self, name):
+        if not self._rendering:
+            playback.started(self._text)
+    
+    def _on_finished(self, name, completed):
+        if not self._rendering:
+            playback.finished(self._text)
+    
     def speak(self, text: str, wait: bool = True):
         """Speak text"""
         if not text:
             return
         
+        if config.tts.REFERENCE and winsound is not None:
+            if wait:
+                self._speak_rendered(text)
+            else:
+                threading.Thread(target=self._speak_rendered, args=(text,), name='tts', daemon=True).start()
+            return
+        
         try:
             with self.speech_lock:
                 app_logger.info(f"TTS: '{text}'")
+                self._text = text
                 self.engine.say(text)
                 
                 if wait:
                     self.engine.runAndWait()
                 else:
-                    threading.Thread(target=self.engine.runAndWait, daemon=True).start()
+                    threading.Thread(target=self.engine.runAndWait, name='tts', daemon=True).start()
                     
         except Exception as e:
             log_error("TextToSpeechEngine.speak", e)
     
+    def _speak_rendered(self, text: str):
+        """Render to WAV, then play it while publishing it as the echo reference"""
+        path = None
+        try:
+            with self.speech_lock:
+                app_logger.info(f"TTS: '{text}' (rendered)")
+                fd, path = tempfile.mkstemp(suffix='.wav')
+                os.close(fd)
+                self._rendering = True
+                try:
+                    self.engine.save_to_file(text, path)
+                    self.engine.runAndWait()
+                finally:
+                    self._rendering = False
+            
+            with wave.open(path, 'rb') as wf:
+                rate, channels = wf.getframerate(), wf.getnchannels()
+                samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            reference = samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples
+            
+            playback.started(text, reference, rate)
+            try:
+                winsound.PlaySound(path, winsound.SND_FILENAME)
+            finally:
+                playback.finished(text)
+        
+        except Exception as e:
+            log_error("TextToSpeechEngine._speak_rendered", e)
+        finally:
+            if path and os.path.exists(path):
+                os.remove(path)
+    
     def stop(self):
         """Stop speech"""
         try:
             self.engine.stop()
+            if winsound is not None:
+                winsound.PlaySound(None, 0)
+            playback.finished()
             app_logger.info("TTS stopped")
         except Exception as e:
             log_error("TextToSpeechEngine.stop", e)
@@ -1,28 +1,192 @@
 import threading
 import json
-from pathlib import Path
-from typing import Callable, Optional
+import time
+from typing import Callable, List, Optional, Tuple
 from vosk import Model, KaldiRecognizer
 from core.logger import app_logger, log_error
 from core.audio_input import AudioCapture
+from core.model_manager import model_manager
 from config.settings import config
 
+WAKE_WORDS = [
+    "ассистент",
+    "привет ассистент",
+    "окей ассистент"
+]
+
+class WakeWordEngine:
+    """Wake word matching over a Vosk recognizer, fed chunk by chunk
+    
+    Matches on partial hypotheses as well as final results: a wake word
+    fires once it has been present in WAKE_PARTIAL_STABILITY consecutive
+    partials, then further wakes are ignored for WAKE_REFRACTORY_MS of
+    audio. Only the part of a partial that changed is scanned.
+    """
+    
+    def __init__(self, model: Model, on_partial_result: Callable = None):
+        self.model = model
+        self.on_partial_result = on_partial_result
+        self.RATE = config.audio.SAMPLE_RATE
+        self.ON_PARTIAL = config.wake.ON_PARTIAL
+        self.STABILITY = max(1, config.wake.PARTIAL_STABILITY)
+        self.REFRACTORY_MS = config.wake.REFRACTORY_MS
+        
+        # Longest first, so "привет ассистент" wins over "ассистент"
+        self.wake_words = sorted(WAKE_WORDS, key=len, reverse=True)
+        self.max_wake_len = len(self.wake_words[0])
+        
+        self.recognizer = KaldiRecognizer(self.model, self.RATE)
+        self.recognizer.SetWords(True)
+        self.audio_ms = 0.0
+        self.last_confidence = None
+        self.last_wake_ms = None
+        self.stats = {'wakes': 0, 'partial_wakes': 0, 'final_wakes': 0, 'suppressed': 0}
+        self._reset_partial()
+    
+    def _reset_partial(self):
+        self._last_partial = ""
+        self._match = None
+        self._match_end = 0
+        self._stable_count = 0
+    
+    def reset(self):
+        """Reset recognizer and matching state"""
+        self.recognizer.Reset()
+        self._reset_partial()
+    
+    def process_chunk(self, chunk: bytes) -> Optional[str]:
+        """Feed one chunk; return the wake word if it fired on this chunk"""
+        self.audio_ms += len(chunk) / 2 / self.RATE * 1000
+        
+        if self.recognizer.AcceptWaveform(chunk):
+            result = json.loads(self.recognizer.Result())
+            self._reset_partial()
+            wake_word = self._match_text(result.get('text', ''))
+            if not wake_word:
+                return None
+            words = [item['conf'] for item in result.get('result', []) if 'conf' in item]
+            self.last_confidence = sum(words) / len(words) if words else None
+            return self._fire(wake_word, 'final')
+        
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        if self.on_partial_result:
+            self.on_partial_result(partial)
+        
+        if not self.ON_PARTIAL:
+            return None
+        
+        wake_word = self._scan_partial(partial.lower())
+        if wake_word is None:
+            self._stable_count = 0
+            return None
+        
+        self._stable_count += 1
+        if self._stable_count >= self.STABILITY:
+            self.last_confidence = None
+            return self._fire(wake_word, 'partial')
+        return None
+    
+    def advance_to(self, audio_ms: float):
+        """Move the clock over audio that was not decoded: skipped by a VAD
+        gate, gated during playback or dropped while a command was handled
+        
+        WAKE_REFRACTORY_MS then runs in capture time, not decoded time.
+        """
+        self.audio_ms = max(self.audio_ms, audio_ms)
+    
+    def pending_confidence(self) -> float:
+        """How close the current partial is to firing, 0 to 1"""
+        return min(1.0, self._stable_count / self.STABILITY) if self._match else 0.0
+    
+    def _match_text(self, text: str, start: int = 0) -> Optional[str]:
+        text = text.lower()
+        for wake_word in self.wake_words:
+            if text.find(wake_word, start) >= 0:
+                return wake_word
+        return None
+    
+    def _scan_partial(self, text: str) -> Optional[str]:
+        """Wake word present in partial, scanning only text that changed"""
+        previous = self._last_partial
+        self._last_partial = text
+        
+        if text == previous:
+            return self._match
+        
+        # Match still holds while the text up to its end is unchanged
+        if self._match and text.startswith(previous[:self._match_end]):
+            return self._match
+        
+        if previous and text.startswith(previous):
+            start = max(0, len(previous) - self.max_wake_len)
+        else:
+            start = 0
+        
+        self._match = None
+        for wake_word in self.wake_words:
+            index = text.find(wake_word, start)
+            if index >= 0:
+                self._match = wake_word
+                self._match_end = index + len(wake_word)
+                break
+        
+        return self._match
+    
+    def _fire(self, wake_word: str, source: str) -> Optional[str]:
+        if self.last_wake_ms is not None and self.audio_ms - self.last_wake_ms < self.REFRACTORY_MS:
+            self.stats['suppressed'] += 1
+            self.reset()
+            return None
+        
+        self.last_wake_ms = self.audio_ms
+        self.stats['wakes'] += 1
+        self.stats[f'{source}_wakes'] += 1
+        app_logger.info(f"Wake word detected: '{wake_word}' ({source})")
+        self.reset()
+        return wake_word
+
+
+def feed_chunk(engine: WakeWordEngine, gate, chunk: bytes, timestamp: float) -> Tuple[Optional[str], int]:
+    """Decode one chunk of a single stream ending at timestamp (seconds)
+    
+    With a gate (a one-stream StreamArbiter) the chunk is decoded only
+    while the stream is active, starting from its pre-roll. The engine's
+    clock is set from timestamp first. Returns the wake word if it fired
+    and the number of chunks decoded.
+    """
+    chunks = [chunk]
+    if gate is not None:
+        decision = gate.update(0, chunk, timestamp)
+        if decision is None:
+            return None, 0
+        _, chunks, assigned = decision
+        if assigned:
+            engine.reset()
+    
+    engine.advance_to(timestamp * 1000 - sum(len(data) for data in chunks) / 2 / engine.RATE * 1000)
+    for decoded, data in enumerate(chunks, 1):
+        fired = engine.process_chunk(data)
+        if fired:
+            return fired, decoded
+    return None, len(chunks)
+
+
 class WakeWordDetector:
     """Detects wake words using Vosk speech recognition"""
     
-    WAKE_WORDS = [
-        "ассистент",
-        "привет ассистент",
-        "окей ассистент"
-    ]
+    WAKE_WORDS = WAKE_WORDS
     
     def __init__(self, on_wake: Callable, on_partial_result: Callable = None):
         self.on_wake = on_wake
         self.on_partial_result = on_partial_result
         self.is_running = False
         self.detection_thread = None
+        self.stats = {'chunks': 0, 'decode_s': 0.0, 'idle_chunks': 0}
+        # Held while on_wake reads the command from the capture
+        self._command_lock = threading.Lock()
         
         self.audio_capture = AudioCapture()
+        self._init_gate(config.wake.VAD_GATE)
         self._init_recognizer()
         
         app_logger.info("WakeWordDetector initialized")
@@ -30,39 +194,93 @@ class WakeWordDetector:
     def _init_recognizer(self):
         """Initialize Vosk recognizer"""
         try:
-            model_path = Path(config.vosk.MODEL_PATH)
-            
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model not found at {model_path}")
-            
-            self.model = Model(str(model_path))
-            self.recognizer = KaldiRecognizer(self.model, config.audio.SAMPLE_RATE)
-            self.recognizer.SetWords(self.WAKE_WORDS)
-            
-            app_logger.info(f"Vosk model loaded from {model_path}")
-            app_logger.info(f"Wake words: {', '.join(self.WAKE_WORDS)}")
+            # Pinned for the detector's lifetime; shared with the STT pipeline
+            self.model_key = model_manager.resolve(config.wake.MODEL or None)
+            self.model = model_manager.pin(self.model_key)
+            self.engine = WakeWordEngine(self.model, self.on_partial_result)
             
+            app_logger.info(f"Wake word model: '{self.model_key}'")
+            app_logger.info(f"Wake words: {', '.join(self.WAKE_WORDS)} "
+                            f"(partials: {self.engine.ON_PARTIAL}, stability: {self.engine.STABILITY}, "
+                            f"refractory: {self.engine.REFRACTORY_MS}ms)")
+        
         except Exception as e:
             log_error("WakeWordDetector._init_recognizer", e)
             raise
     
+    def _init_gate(self, enabled: bool):
+        """With WAKE_VAD_GATE, decode only chunks the energy VAD marks as speech
+        
+        The gate is the multi-microphone StreamArbiter over one stream, so
+        MULTI_ACTIVE_SNR_DB, MULTI_HANGOVER_MS and MULTI_PREROLL_MS apply.
+        """
+        from core.multi_mic import StreamArbiter
+        self.gate = StreamArbiter(1, decoders=1) if enabled else None
+    
+    def apply_config(self, wake, changed: dict):
+        """Take new WAKE_* settings; the model is re-pinned only if WAKE_MODEL changed"""
+        if 'VAD_GATE' in changed:
+            self._init_gate(wake.VAD_GATE)
+        if 'MODEL' in changed:
+            self.reload_model()
+            return
+        
+        engine = self.engine
+        engine.ON_PARTIAL = wake.ON_PARTIAL
+        engine.STABILITY = max(1, wake.PARTIAL_STABILITY)
+        engine.REFRACTORY_MS = wake.REFRACTORY_MS
+    
+    def reload_model(self):
+        """Re-resolve and pin the wake model, then swap in a fresh engine"""
+        old_key, old_model = self.model_key, self.model
+        self._init_recognizer()
+        model_manager.unpin(old_key, old_model)
+    
+    def reopen_captures(self):
+        """Reopen the audio source after audio settings changed
+        
+        Waits for a command being read from the current capture to end.
+        """
+        with self._command_lock:
+            old_capture, self.audio_capture = self.audio_capture, AudioCapture()
+            old_capture.stop()
+            self._init_gate(self.gate is not None)
+    
+    def captures(self) -> List[AudioCapture]:
+        """Captures read by the detector"""
+        return [self.audio_capture]
+    
+    def command_capture(self) -> AudioCapture:
+        """Capture to read the command from after a wake
+        
+        on_wake runs on the detection thread, so the capture is not read
+        by the loop meanwhile and holds only audio after the wake word.
+        """
+        return self.audio_capture
+    
     def start(self):
         """Start wake word detection"""
         if self.is_running:
             return
         
         self.is_running = True
-        self.detection_thread = threading.Thread(target=self._detection_loop, daemon=True)
+        self.detection_thread = threading.Thread(target=self._detection_loop, name='wake-detection', daemon=True)
         self.detection_thread.start()
         app_logger.info("Wake word detection started")
     
+    def decode_ms_per_chunk(self) -> float:
+        """Average wake decoding time per chunk so far"""
+        return self.stats['decode_s'] * 1000 / max(self.stats['chunks'], 1)
+    
     def stop(self):
         """Stop wake word detection"""
         self.is_running = False
         if self.detection_thread:
             self.detection_thread.join(timeout=2.0)
         self.audio_capture.stop()
-        app_logger.info("Wake word detection stopped")
+        model_manager.unpin(self.model_key, self.model)
+        app_logger.info(f"Wake word detection stopped: {self.stats['chunks']} chunks decoded, "
+                        f"{self.stats['idle_chunks']} skipped by the VAD gate, {self.decode_ms_per_chunk():.1f}ms/chunk")
     
     def _detection_loop(self):
         """Main detection loop"""
@@ -73,35 +291,22 @@ class WakeWordDetector:
                 if chunk is None:
                     continue
                 
-                if self.recognizer.AcceptWaveform(chunk):
-                    result = json.loads(self.recognizer.Result())
-                    self._process_result(result)
-                else:
-                    partial = json.loads(self.recognizer.PartialResult())
-                    self._process_partial(partial)
-                    
+                gate = self.gate
+                start = time.perf_counter()
+                fired, decoded = feed_chunk(self.engine, gate, chunk, time.monotonic())
+                if not decoded:
+                    self.stats['idle_chunks'] += 1
+                    continue
+                self.stats['decode_s'] += time.perf_counter() - start
+                self.stats['chunks'] += decoded
+                
+                if fired:
+                    with self._command_lock:
+                        self.on_wake()
+                    # Audio queued while the command was handled is stale
+                    self.audio_capture.flush()
+                    if gate is not None:
+                        gate.reset()
+            
             except Exception as e:
                 log_error("WakeWordDetector._detection_loop", e)
-    
-    def _process_result(self, result: dict):
-        """Process final recognition result"""
-        if 'result' in result:
-            recognized_text = ' '.join([item['conf'] for item in result['result']])
-        elif 'partial' in result:
-            recognized_text = result['partial']
-        else:
-            return
-        
-        recognized_text = recognized_text.lower().strip()
-        
-        for wake_word in self.WAKE_WORDS:
-            if wake_word in recognized_text:
-                app_logger.info(f"Wake word detected: '{wake_word}'")
-                self.on_wake()
-                self.recognizer.Reset()
-                return
-    
-    def _process_partial(self, partial: dict):
-        """Process partial recognition result"""
-        if 'partial' in partial and self.on_partial_result:
-            self.on_partial_result(partial['partial'])
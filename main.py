@@ -9,13 +9,31 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+if __name__ == '__main__' and sys.argv[1:2] == ['stats']:
+    # Query the command journal without loading audio, models or TTS
+    from core.journal import stats_cli
+    sys.exit(stats_cli(sys.argv[2:]))
+
 from core.logger import app_logger, log_error
-from core.audio_input import AudioCapture, VoiceActivityDetector
+from core import logger
+from core.audio_input import VoiceActivityDetector
+from core.endpointing import Endpointer
+from core.audio_buffer import UtteranceBuffer
 from core.wake_word import WakeWordDetector
+from core.multi_mic import MultiMicDetector
+from core.audio_backends import multi_stream_configured
+from core.model_manager import model_manager
 from core.stt_engine import SpeechToTextPipeline
 from core.tts_engine import tts_engine
 from core.command_router import CommandRouter
+from core.blackbox import BlackBox
+from core.diagnostics import diagnostics
+from core.echo_gate import EchoGate
+from core.playback import playback
+from core.journal import CommandJournal
+from core.perf_profile import apply_startup_profile
 from config.settings import config
+from config.watcher import ConfigWatcher
 
 
 class VoiceAssistant:
@@ -30,25 +48,57 @@ class VoiceAssistant:
         self.is_running = False
         self.is_listening = False
 
+        apply_startup_profile()
+
         self.stt_pipeline = SpeechToTextPipeline()
         self.command_router = CommandRouter()
-        self.audio_capture = AudioCapture()
+        # The command is read from the wake detector's capture, right after the wake word;
+        # with several microphones, from the stream that heard it best
+        self.multi_mic = multi_stream_configured()
         self.vad = VoiceActivityDetector()
+        self.endpointer = Endpointer(self.vad, self.command_router.is_complete_command)
+        self.utterance_buffer = UtteranceBuffer()
 
-        self.wake_word_detector = WakeWordDetector(
+        detector_class = MultiMicDetector if self.multi_mic else WakeWordDetector
+        self.wake_word_detector = detector_class(
             on_wake=self._on_wake_word,
             on_partial_result=self._on_partial_result
         )
 
+        self.blackbox = None
+        if config.blackbox.ENABLED:
+            try:
+                self.blackbox = BlackBox()
+                logger.error_hooks.append(self.blackbox.on_error)
+                self._attach_recorder()
+                playback.listeners.append(lambda event, text: self._record('tts', f"{event} {text}"))
+            except Exception as e:
+                log_error("VoiceAssistant.blackbox", e)
+
+        self.journal = None
+        if config.journal.ENABLED:
+            try:
+                self.journal = CommandJournal()
+            except Exception as e:
+                log_error("VoiceAssistant.journal", e)
+
         self.gui = None
         if self.enable_gui:
             try:
                 from ui.gui_main import VoiceAssistantGUI
                 self.gui = VoiceAssistantGUI(self)
+                self._attach_level_feed()
             except Exception as e:
                 app_logger.warning(f"GUI initialization failed: {e}")
                 self.enable_gui = False
 
+        if config.vosk.PRELOAD:
+            model_manager.preload()
+
+        self.config_watcher = None
+        if config.reload.ENABLED:
+            self._init_config_watcher()
+
         app_logger.info("Voice Assistant initialized successfully")
 
     def start(self):
@@ -58,8 +108,13 @@ class VoiceAssistant:
 
         self.is_running = True
         app_logger.info("Voice Assistant started")
+        if config.diag.ENABLED:
+            diagnostics.start()
         tts_engine.speak("Ассистент готов", wait=False)
         self.wake_word_detector.start()
+        self.command_router.warmup()
+        if self.config_watcher:
+            self.config_watcher.start()
 
         if self.gui:
             self.gui.show()
@@ -74,64 +129,194 @@ class VoiceAssistant:
 
         app_logger.info("Stopping Voice Assistant...")
         self.is_running = False
+        if self.config_watcher:
+            self.config_watcher.stop()
+        diagnostics.stop()
         self.wake_word_detector.stop()
-        self.audio_capture.stop()
+        self._log_echo_stats()
+        if self.blackbox:
+            logger.error_hooks.remove(self.blackbox.on_error)
+            app_logger.info(f"BlackBox: {self.blackbox.get_stats()}")
+            self.blackbox.close()
+        if self.journal:
+            self.journal.close()
+        model_manager.save_usage()
+        app_logger.info(f"Model manager: {model_manager.get_stats()}")
+        app_logger.info(f"Plugins: {self.command_router.registry.get_stats()}")
 
         if self.gui:
             self.gui.close()
 
         app_logger.info("Voice Assistant stopped")
 
+    def _init_config_watcher(self):
+        """Route .env changes to the subsystems they concern"""
+        watcher = ConfigWatcher()
+        watcher.subscribe('vad', self.vad.apply_config)
+        watcher.subscribe('vad', self.endpointer.apply_config)
+        watcher.subscribe('tts', tts_engine.apply_config)
+        watcher.subscribe('commands', self.command_router.apply_config)
+        watcher.subscribe('logging', logger.apply_config)
+        watcher.subscribe('wake', self.wake_word_detector.apply_config)
+        watcher.subscribe('vosk', self._apply_vosk_config)
+        watcher.subscribe('noise', self._apply_noise_config)
+        watcher.subscribe('echo', self._apply_echo_config)
+        watcher.subscribe('audio', self._apply_audio_config)
+        watcher.subscribe('diag', diagnostics.apply_config)
+        if self.multi_mic:
+            watcher.subscribe('multi', self.wake_word_detector.apply_multi_config)
+        self.config_watcher = watcher
+
+    def _apply_vosk_config(self, vosk, changed: dict):
+        """Resize the utterance buffer or swap models, only for the keys that changed"""
+        if 'TIMEOUT_SECONDS' in changed:
+            self.utterance_buffer = UtteranceBuffer()
+
+        replaced = model_manager.apply_config(vosk, changed)
+        if self.wake_word_detector.model_key in replaced or 'DEFAULT_MODEL' in changed:
+            self.wake_word_detector.reload_model()
+
+    def _captures(self) -> list:
+        """Every open capture; all belong to the wake detector"""
+        return self.wake_word_detector.captures()
+
+    def _apply_noise_config(self, noise, changed: dict):
+        for capture in self._captures():
+            capture.apply_config(noise, changed)
+
+    def _apply_echo_config(self, echo, changed: dict):
+        for capture in self._captures():
+            capture.echo_gate = EchoGate(capture.RATE) if echo.ENABLED else None
+
+    def _log_echo_stats(self):
+        """Report decoding skipped while the assistant was speaking"""
+        gated = sum(capture.stats['gated'] for capture in self._captures())
+        if not gated:
+            return
+        gated_s = sum(capture.stats['gated_s'] for capture in self._captures())
+        saved_s = gated * self.wake_word_detector.decode_ms_per_chunk() / 1000
+        app_logger.info(f"Echo gate: {gated} chunks ({gated_s:.1f}s of TTS playback) not decoded, "
+                        f"~{saved_s:.2f}s decode time saved; playback {playback.stats}")
+
+    def _apply_audio_config(self, audio, changed: dict):
+        """Reopen capture devices; models stay loaded"""
+        if multi_stream_configured() != self.multi_mic:
+            app_logger.warning("Switching between one and several microphones takes effect after restart")
+        self.wake_word_detector.reopen_captures()
+        if 'SAMPLE_RATE' in changed:
+            self.wake_word_detector.reload_model()
+        if self.gui:
+            self._attach_level_feed()
+        if self.blackbox:
+            if self.blackbox.rate != audio.SAMPLE_RATE:
+                # The ring is laid out for one sample rate; start a new one
+                old_blackbox = self.blackbox
+                logger.error_hooks.remove(old_blackbox.on_error)
+                self.blackbox = BlackBox()
+                logger.error_hooks.append(self.blackbox.on_error)
+                old_blackbox.close()
+            self._attach_recorder()
+
+    def _attach_recorder(self):
+        """Record what the wake detector's capture delivers, wake word and command alike"""
+        if self.multi_mic:
+            self.wake_word_detector.recorder = self.blackbox
+            return
+        self.wake_word_detector.audio_capture.recorder = self.blackbox
+
+    def _attach_level_feed(self):
+        if self.multi_mic:
+            self.wake_word_detector.level_feed = self.gui.level_feed
+            return
+        self.wake_word_detector.audio_capture.level_feed = self.gui.level_feed
+
+    def _record(self, kind: str, text: str = '', value: float = 0.0):
+        if self.blackbox:
+            self.blackbox.event(kind, text, value)
+
     def _on_wake_word(self):
         """Wake word callback"""
         app_logger.info("WAKE WORD DETECTED - Starting command listening")
+        self._record('wake')
         tts_engine.speak("Слушаю", wait=False)
 
         self.is_listening = True
-        audio_buffer = []
-        self.vad.reset()
+        # Settings may be reloaded meanwhile; keep this command's resources
+        audio_capture = self.wake_word_detector.command_capture()
+        utterance_buffer = self.utterance_buffer
+        utterance_buffer.clear()
+        self.endpointer.reset()
+        if not self.stt_pipeline.begin_utterance(config.vosk.COMMAND_MODEL or None):
+            tts_engine.speak("Распознавание речи недоступно", wait=False)
+            self.is_listening = False
+            return
         start_time = time.time()
         timeout = config.vosk.TIMEOUT_SECONDS
-        silence_count = 0
 
         while self.is_listening and (time.time() - start_time) < timeout:
             try:
-                chunk = self.audio_capture.get_audio_chunk(timeout=0.1)
+                chunk = audio_capture.get_audio_chunk(timeout=0.1)
                 if chunk is None:
                     continue
 
-                audio_buffer.append(chunk)
+                chunk_view = utterance_buffer.append(chunk)
+                text, is_final = self.stt_pipeline.accept_chunk(chunk)
+                if text and self.gui:
+                    self.gui.update_partial_result(text)
+
+                if self.endpointer.process(chunk_view, text, is_final):
+                    break
 
-                if self.vad.detect_speech_end(chunk):
-                    silence_count += 1
-                    if silence_count > 3:
-                        break
-                else:
-                    silence_count = 0
+                if utterance_buffer.is_full():
+                    app_logger.warning("Utterance buffer full, ending command capture")
+                    break
 
             except Exception as e:
                 log_error("VoiceAssistant._on_wake_word", e)
                 break
 
-        if audio_buffer:
-            self._process_command(audio_buffer)
+        endpoint_time = time.time()
+        endpoint_reason = self.endpointer.reason or 'timeout'
+        self._record('endpoint', endpoint_reason)
+        recognized_text = self.stt_pipeline.finish_utterance()
+        stt_time = time.time()
+        entry = self._process_command(recognized_text)
+        done_time = time.time()
+        app_logger.info(f"Endpoint: {endpoint_reason}, "
+                        f"response after {(done_time - endpoint_time) * 1000:.0f}ms")
+        if self.journal:
+            entry.update(ts=start_time, text=recognized_text, endpoint_reason=endpoint_reason,
+                         confidence=self.stt_pipeline.utterance_confidence(),
+                         capture_ms=(endpoint_time - start_time) * 1000,
+                         stt_ms=(stt_time - endpoint_time) * 1000,
+                         response_ms=(done_time - endpoint_time) * 1000,
+                         total_ms=(done_time - start_time) * 1000)
+            self.journal.record(entry)
 
         self.is_listening = False
         self.vad.reset()
 
-    def _process_command(self, audio_buffer: list):
-        """Process recognized command"""
+    def _process_command(self, recognized_text: str) -> dict:
+        """Process recognized command, return intent, outcome, result and route_ms for the journal"""
+        entry = {'intent': 'no_speech', 'outcome': 'no_speech'}
         try:
-            audio_data = b''.join(audio_buffer)
-            recognized_text = self.stt_pipeline.recognize(audio_data)
-
             if not recognized_text:
                 app_logger.warning("No speech recognized")
+                self._on_unrecognized('')
                 tts_engine.speak("Не удалось распознать речь, повторите попытку", wait=False)
-                return
+                return entry
 
             app_logger.info(f"Recognized: '{recognized_text}'")
+            self._record('recognized', recognized_text)
+            route_start = time.time()
             command_type, result, success = self.command_router.route_command(recognized_text)
+            entry.update(intent=command_type, result=result, route_ms=(time.time() - route_start) * 1000,
+                         outcome='success' if success else 'not_recognized' if command_type == 'unknown'
+                         else 'error' if command_type == 'error' else 'failed')
+            if command_type == 'unknown':
+                self._on_unrecognized(recognized_text)
+            else:
+                self._record('command', f"{command_type}: {result}", float(success))
 
             if success:
                 app_logger.info(f"Command executed: {command_type} -> {result}")
@@ -142,7 +327,15 @@ class VoiceAssistant:
 
         except Exception as e:
             log_error("VoiceAssistant._process_command", e)
+            entry['outcome'] = 'error'
             tts_engine.speak("Произошла ошибка при выполнении команды", wait=False)
+        return entry
+
+    def _on_unrecognized(self, text: str):
+        """Keep the audio of a command that was not understood for replay"""
+        self._record('unrecognized', text)
+        if self.blackbox and config.blackbox.ON_UNRECOGNIZED:
+            self.blackbox.snapshot('unrecognized', from_wake=True)
 
     def _on_partial_result(self, partial_text: str):
         """Partial recognition result"""
@@ -177,6 +370,7 @@ def signal_handler(sig, frame):
 def main():
     """Main function"""
     signal.signal(signal.SIGINT, signal_handler)
+    diagnostics.install_signal()
 
     try:
         assistant = VoiceAssistant(enable_gui=config.gui.USE_GUI)
@@ -0,0 +1 @@
+"""Benchmark and diagnostics tools"""
@@ -0,0 +1,76 @@
+"""Allocation benchmark for the command capture path
+
+Compares peak and total traced allocations of the original
+list-of-bytes + b''.join capture with UtteranceBuffer, including the
+per-chunk VAD energy computation. Chunks are generated up front so the
+cost of reading from the device is excluded from both runs.
+
+Usage:
+    python -m tools.alloc_benchmark [--seconds 10]
+"""
+
+import argparse
+import tracemalloc
+from typing import Optional
+
+import numpy as np
+
+from core.audio_buffer import UtteranceBuffer
+from core.audio_input import VoiceActivityDetector
+from config.settings import config
+
+
+def legacy_capture(chunks: list):
+    """Original path: list of chunks, float copy for energy, join at the end"""
+    audio_buffer = []
+    for chunk in chunks:
+        audio_buffer.append(chunk)
+        audio_data = np.frombuffer(chunk, dtype=np.int16)
+        np.sqrt(np.mean(audio_data.astype(float) ** 2))
+    return b''.join(audio_buffer)
+
+
+def buffered_capture(chunks: list, buffer: UtteranceBuffer, vad: VoiceActivityDetector):
+    """Preallocated buffer with views handed to VAD"""
+    buffer.clear()
+    for chunk in chunks:
+        chunk_view = buffer.append(chunk)
+        vad.get_energy(chunk_view)
+    return buffer.view()
+
+
+def measure(name: str, func):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+    print(f"{name:>10}: peak={peak / 1024:9.1f} KiB, retained={allocated / 1024:9.1f} KiB")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=config.vosk.TIMEOUT_SECONDS,
+                        help="Utterance length to simulate")
+    args = parser.parse_args(argv)
+
+    chunk_size = config.audio.CHUNK_SIZE
+    n_chunks = int(args.seconds * config.audio.SAMPLE_RATE / chunk_size)
+    rng = np.random.default_rng(0)
+    chunks = [(rng.standard_normal(chunk_size) * 3000).astype(np.int16).tobytes() for _ in range(n_chunks)]
+
+    buffer = UtteranceBuffer(max_seconds=args.seconds)
+    vad = VoiceActivityDetector()
+    buffered_capture(chunks, buffer, vad)  # warm up scratch buffers
+
+    print(f"{n_chunks} chunks of {chunk_size} samples ({args.seconds}s)")
+    measure('legacy', lambda: legacy_capture(chunks))
+    measure('buffered', lambda: buffered_capture(chunks, buffer, vad))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Save a black box snapshot from outside the assistant
+
+Reads the ring file (BLACKBOX_FILE) read-only, so it works while the
+assistant is running and after it crashed, and writes a bundle in the
+replay corpus layout to BLACKBOX_SNAPSHOT_DIR. Bundles can be passed
+straight to the replay and wake benchmarks.
+
+Usage:
+    python -m tools.blackbox_dump [RING_FILE] [--seconds 30] [--events]
+"""
+
+import argparse
+from datetime import datetime
+from typing import Optional
+
+from core.blackbox import BlackBox
+from config.settings import config
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('ring', nargs='?', default=config.blackbox.FILE, help="Black box ring file")
+    parser.add_argument('--seconds', type=float, default=config.blackbox.SNAPSHOT_S,
+                        help="Audio to save; 0 saves the whole ring")
+    parser.add_argument('--events', action='store_true', help="Print the events in the ring instead")
+    args = parser.parse_args(argv)
+
+    blackbox = BlackBox(args.ring, readonly=True)
+    if args.events:
+        for event in blackbox.read_events():
+            print(f"{datetime.fromtimestamp(event['time']):%H:%M:%S.%f} "
+                  f"{event['sample'] / blackbox.rate:10.2f}s {event['kind']:>12} {event['text']}")
+        return
+
+    blackbox.snapshot('manual', seconds=args.seconds, wait=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Echo gate evaluation on synthetic playback
+
+Simulates the assistant speaking: a speech-like reference is "played",
+reaches the mic delayed, filtered and scaled, over room noise, and in
+some runs the user talks over it. Each run is streamed through the
+EchoGate without and with the reference signal, and reports:
+  * echo gated: playback chunks without user speech kept from the decoders
+  * barge-in kept: chunks with user speech that still pass
+  * decode saved: gated audio times the decoder's cost per chunk,
+    measured with a Vosk model when --model is given
+
+Usage:
+    python -m tools.echo_eval [--runs 20] [--echo-rms 3000] [--model KEY]
+"""
+
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+
+from tools.noise_eval import speech_like
+from core.echo_gate import EchoGate
+from core.playback import PlaybackMonitor
+from config.settings import config
+
+
+def make_run(rng, rate: int, echo_rms: float, user_rms: float, barge_in: bool):
+    """Reference, mic signal and per-sample user-speech mask"""
+    seconds = rng.uniform(1.5, 4.0)
+    n = int(seconds * rate)
+    reference = speech_like(rng, n, rate)
+    reference *= 8000 / np.sqrt(np.mean(reference ** 2))
+
+    delay = int(rng.uniform(0.02, 0.15) * rate)
+    tail = int(0.5 * rate)
+    room = np.exp(-np.arange(int(0.03 * rate)) / (0.008 * rate)) * rng.standard_normal(int(0.03 * rate))
+    echo = np.convolve(np.concatenate([np.zeros(delay), reference, np.zeros(tail)]), room)[:n + delay + tail]
+    mic = echo / np.sqrt(np.mean(echo[delay:delay + n] ** 2)) * echo_rms
+    mic += rng.standard_normal(len(mic)) * 100
+
+    user = np.zeros(len(mic), dtype=bool)
+    if barge_in:
+        start = int(rng.uniform(0.3, 0.6) * len(mic))
+        length = min(len(mic) - start, int(rng.uniform(0.6, 1.2) * rate))
+        voice = speech_like(rng, length, rate)
+        mic[start:start + length] += voice / np.sqrt(np.mean(voice ** 2)) * user_rms
+        user[start:start + length] = True
+    return reference, np.clip(mic, -32768, 32767).astype(np.int16), user, n / rate
+
+
+def evaluate(rng, runs: int, echo_rms: float, user_rms: float, with_reference: bool) -> dict:
+    rate = config.audio.SAMPLE_RATE
+    chunk = config.audio.CHUNK_SIZE
+    totals = {'echo': 0, 'echo_gated': 0, 'user': 0, 'user_kept': 0, 'gated_chunks': 0, 'us': []}
+    for index in range(runs):
+        reference, mic, user, seconds = make_run(rng, rate, echo_rms, user_rms, barge_in=index % 2 == 1)
+        monitor = PlaybackMonitor()
+        monitor.started('', reference if with_reference else None, rate)
+        # Playback on a simulated clock starting at 0
+        monitor.started_at, monitor.finished_at, monitor.speaking = 0.0, seconds, False
+        gate = EchoGate(rate, monitor)
+
+        for start in range(0, len(mic) - chunk + 1, chunk):
+            timestamp = (start + chunk) / rate
+            t0 = time.perf_counter()
+            gate.process(mic[start:start + chunk].tobytes(), timestamp)
+            totals['us'].append((time.perf_counter() - t0) * 1e6)
+            has_user = user[start:start + chunk].mean() > 0.3
+            totals['gated_chunks'] += gate.gated
+            if has_user:
+                totals['user'] += 1
+                totals['user_kept'] += not gate.gated
+            elif monitor.is_active(timestamp, gate.TAIL_S):
+                totals['echo'] += 1
+                totals['echo_gated'] += gate.gated
+    return totals
+
+
+def decode_ms_per_chunk(model_key: str) -> float:
+    """Average Vosk decoding time for one chunk of speech-like audio"""
+    from vosk import KaldiRecognizer, SetLogLevel
+    from core.model_manager import model_manager
+    SetLogLevel(-1)
+    rate, chunk = config.audio.SAMPLE_RATE, config.audio.CHUNK_SIZE
+    audio = speech_like(np.random.default_rng(1), rate * 10, rate)
+    audio = (audio / np.sqrt(np.mean(audio ** 2)) * 3000).astype(np.int16)
+    recognizer = KaldiRecognizer(model_manager.get(model_key), rate)
+    start = time.perf_counter()
+    count = 0
+    for offset in range(0, len(audio) - chunk + 1, chunk):
+        recognizer.AcceptWaveform(audio[offset:offset + chunk].tobytes())
+        count += 1
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20, help="Simulated utterances, every other one with barge-in")
+    parser.add_argument('--echo-rms', type=float, default=3000.0, help="Echo level at the mic")
+    parser.add_argument('--user-rms', type=float, default=5000.0, help="Level of the user talking over playback")
+    parser.add_argument('--model', help="Model key for measuring decode cost (default: no decoding)")
+    args = parser.parse_args(argv)
+
+    decode_ms = decode_ms_per_chunk(args.model) if args.model else None
+    chunk_s = config.audio.CHUNK_SIZE / config.audio.SAMPLE_RATE
+    print(f"chunk={config.audio.CHUNK_SIZE}, barge-in RMS={config.echo.BARGE_IN_RMS}, echo RMS={args.echo_rms:.0f}, "
+          f"user RMS={args.user_rms:.0f}" + (f", decode {decode_ms:.1f}ms/chunk" if decode_ms else ""))
+    print(f"{'mode':>10} {'echo gated':>11} {'barge-in kept':>14} {'gated audio':>12} {'decode saved':>13} {'us/chunk':>9}")
+    for name, with_reference in (('gate', False), ('reference', True)):
+        totals = evaluate(np.random.default_rng(0), args.runs, args.echo_rms, args.user_rms, with_reference)
+        gated_s = totals['gated_chunks'] * chunk_s
+        saved = f"{totals['gated_chunks'] * decode_ms / 1000:11.2f}s" if decode_ms else f"{'-':>12}"
+        print(f"{name:>10} {totals['echo_gated'] / max(totals['echo'], 1):11.1%} "
+              f"{totals['user_kept'] / max(totals['user'], 1):14.1%} {gated_s:11.1f}s {saved} "
+              f"{np.mean(totals['us']):9.0f}")
+
+
+if __name__ == '__main__':
+    main()
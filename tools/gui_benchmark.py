@@ -0,0 +1,139 @@
+"""VU meter benchmark: redraw cost and Tk event loop lag
+
+Runs the GUI with a synthetic audio thread publishing chunks in real
+time, first with the original redraw strategy (delete + recreate every
+item, one extra after(0) redraw per chunk) and then with the persistent
+items fed from LevelFeed. A 10 ms probe timer measures how late the Tk
+event loop services callbacks in each phase. Needs a display.
+
+Usage:
+    python -m tools.gui_benchmark [--seconds 10] [--chunk 1024]
+"""
+
+import argparse
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from ui.gui_main import VoiceAssistantGUI
+from core.metrics import percentile
+from config.settings import config
+
+
+class LegacyMeter:
+    """Original VU meter: full canvas rebuild per frame and per chunk"""
+
+    def __init__(self, gui: VoiceAssistantGUI):
+        self.gui = gui
+        self.canvas = gui.canvas
+        self.audio_data = np.zeros(100)
+        self.max_level = 0
+        self.draw_ms = []
+        self.running = True
+
+    def draw(self):
+        if not self.running:
+            return
+        start = time.perf_counter()
+        data = self.audio_data
+        self.canvas.delete('all')
+        levels = np.abs(data)
+        max_val = np.max(levels) if len(levels) > 0 else 0
+        self.max_level = max(self.max_level * 0.95, max_val, 1e-6)
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        for i in range(40):
+            idx = i * len(data) // 40
+            bar_height = int((levels[idx] / self.max_level) * height * 0.8)
+            color = '#ef4444' if bar_height > height * 0.7 else '#f59e0b' if bar_height > height * 0.4 else '#10b981'
+            x1 = i * 8
+            self.canvas.create_rectangle(x1, height - bar_height, x1 + 6, height, fill=color, outline=color)
+        peak_x = int((max_val / self.max_level) * width)
+        self.canvas.create_line(peak_x, 0, peak_x, 10, fill='#fbbf24', width=3)
+        self.draw_ms.append((time.perf_counter() - start) * 1000)
+
+    def update_audio_level(self, audio_chunk: bytes):
+        data = np.frombuffer(audio_chunk, dtype=np.int16)
+        self.audio_data = np.roll(self.audio_data, -len(data) // 2)
+        self.audio_data[-len(data) // 2:] = data.astype(float) / 32768.0
+        self.gui.root.after(0, self.draw)
+
+    def loop(self):
+        if self.running:
+            self.draw()
+            self.gui.root.after(50, self.loop)
+
+
+def run_phase(gui: VoiceAssistantGUI, publish, seconds: float, chunk: int) -> list:
+    """Publish synthetic chunks in real time and probe event loop lag"""
+    lags = []
+    stop = threading.Event()
+    rng = np.random.default_rng(0)
+    period = chunk / config.audio.SAMPLE_RATE
+
+    def producer():
+        while not stop.is_set():
+            publish((rng.standard_normal(chunk) * 4000).astype(np.int16).tobytes())
+            time.sleep(period)
+
+    def probe(expected):
+        now = time.perf_counter()
+        lags.append(max(0.0, (now - expected) * 1000))
+        if not stop.is_set():
+            gui.root.after(10, probe, now + 0.01)
+
+    def finish():
+        stop.set()
+        gui.root.quit()
+
+    threading.Thread(target=producer, daemon=True).start()
+    gui.root.after(10, probe, time.perf_counter() + 0.01)
+    gui.root.after(int(seconds * 1000), finish)
+    gui.root.mainloop()
+    return lags
+
+
+def report(name: str, redraws: int, draw_total_ms: float, lags: list):
+    print(f"{name:>10}: redraws={redraws} "
+          f"draw avg={draw_total_ms / max(1, redraws):.3f}ms "
+          f"draw total={draw_total_ms:.0f}ms | "
+          f"loop lag p50={percentile(lags, 50):.1f}ms p95={percentile(lags, 95):.1f}ms "
+          f"max={max(lags, default=0):.1f}ms")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--chunk', type=int, default=1024, help="Samples per published chunk")
+    args = parser.parse_args(argv)
+
+    gui = VoiceAssistantGUI(assistant=None)
+    gui.root.update()
+
+    # Phase 1: original strategy. The GUI's own loop keeps running but
+    # finds nothing in its feed, so it costs only the tick itself.
+    legacy = LegacyMeter(gui)
+    gui.root.after(50, legacy.loop)
+    lags = run_phase(gui, legacy.update_audio_level, args.seconds, args.chunk)
+    legacy.running = False
+    report('legacy', len(legacy.draw_ms), sum(legacy.draw_ms), lags)
+
+    # Phase 2: persistent items fed through LevelFeed.
+    gui.canvas.delete('all')
+    gui.vu_bars, gui.vu_colors = [], []
+    gui._create_vu_items()
+    draw_ms_before = gui.render_stats['draw_ms_total']
+    frames_before = gui.render_stats['frames']
+    lags = run_phase(gui, gui.update_audio_level, args.seconds, args.chunk)
+    frames = gui.render_stats['frames'] - frames_before
+    draw_total = gui.render_stats['draw_ms_total'] - draw_ms_before
+    report('persistent', frames, draw_total, lags)
+    print(f"GUI_VU_FPS={config.gui.VU_FPS}, chunk={args.chunk} samples")
+
+    gui.close()
+
+
+if __name__ == '__main__':
+    main()
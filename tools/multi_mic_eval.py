@@ -0,0 +1,137 @@
+"""Multi-microphone evaluation on synthetic rooms
+
+Simulates a room with several microphones: speech-like bursts from a
+talker near one of them reach the others attenuated and delayed, over
+independent HVAC noise at a different level per microphone. The streams
+go through the StreamArbiter chunk by chunk, and for each microphone
+count it reports:
+  * decoded: share of stream chunks sent to a wake decoder; decoding
+    every stream, as one WakeWordDetector per microphone would, is 100%
+  * front end: VAD and arbitration time per stream chunk
+  * CPU: estimated decoding plus front-end CPU share, against decoding
+    every stream, using the Vosk cost per chunk when --model is given
+  * best mic: wakes (at the end of each burst) whose command would be
+    read from the microphone with the best speech-to-noise ratio
+
+--write DIR saves each room as mic0.wav, mic1.wav, ... for running the
+assistant with AUDIO_BACKEND=wav and AUDIO_WAV_PATHS.
+
+Usage:
+    python -m tools.multi_mic_eval [--mics 1 2 3 4] [--minutes 5] [--model KEY] [--write DIR]
+"""
+
+import argparse
+import time
+import wave
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from tools.noise_eval import speech_like, hvac_noise
+from tools.echo_eval import decode_ms_per_chunk
+from core.multi_mic import StreamArbiter
+from config.settings import config
+
+
+def make_room(rng, mics: int, seconds: float, rate: int):
+    """Microphone signals and the bursts as (start, end, best mic) in samples
+
+    The best microphone is the one with the highest speech-to-noise
+    ratio, usually but not always the nearest one."""
+    n = int(seconds * rate)
+    noise_rms = rng.uniform(150, 600, mics)
+    signals = [hvac_noise(rng, n, rate) * level for level in noise_rms]
+    bursts = []
+    position = int(rng.uniform(2, 5) * rate)
+    while position < n - 3 * rate:
+        length = int(rng.uniform(0.8, 2.5) * rate)
+        nearest = int(rng.integers(mics))
+        voice = speech_like(rng, length, rate)
+        voice *= rng.uniform(3000, 6000) / np.sqrt(np.mean(voice ** 2))
+        snr = []
+        for mic in range(mics):
+            gain = 1.0 if mic == nearest else 10 ** (-rng.uniform(6, 18) / 20)
+            snr.append(gain / noise_rms[mic])
+            delay = 0 if mic == nearest else int(rng.uniform(0.002, 0.015) * rate)
+            end = min(n, position + delay + length)
+            signals[mic][position + delay:end] += voice[:end - position - delay] * gain
+        bursts.append((position, position + length, int(np.argmax(snr))))
+        position += length + int(rng.uniform(3, 20) * rate)
+    return [np.clip(s, -32768, 32767).astype(np.int16) for s in signals], bursts
+
+
+def write_room(out: Path, signals: List[np.ndarray], rate: int):
+    out.mkdir(parents=True, exist_ok=True)
+    for mic, samples in enumerate(signals):
+        with wave.open(str(out / f'mic{mic}.wav'), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(samples.tobytes())
+    print(f"Wrote {len(signals)} microphones to {out}")
+
+
+def evaluate(rng, mics: int, seconds: float) -> dict:
+    rate, chunk = config.audio.SAMPLE_RATE, config.audio.CHUNK_SIZE
+    signals, bursts = make_room(rng, mics, seconds, rate)
+    arbiter = StreamArbiter(mics, rate=rate)
+    wake_chunks = {end // chunk: best for _, end, best in bursts}
+    totals = {'chunks': 0, 'decoded': 0, 'front_us': 0.0, 'wakes': 0, 'best': 0, 'signals': signals}
+
+    for index in range(len(signals[0]) // chunk):
+        timestamp = (index + 1) * chunk / rate
+        for mic in range(mics):
+            data = signals[mic][index * chunk:(index + 1) * chunk].tobytes()
+            start = time.perf_counter()
+            decision = arbiter.update(mic, data, timestamp)
+            totals['front_us'] += (time.perf_counter() - start) * 1e6
+            totals['chunks'] += 1
+            if decision is not None:
+                totals['decoded'] += len(decision[1])
+
+        if index in wake_chunks:
+            # The wake fires on a decoded stream; without one it is missed
+            decoded = [stream for stream in arbiter.slots if stream is not None]
+            totals['wakes'] += 1
+            if decoded:
+                selected, _ = arbiter.select({stream: 1.0 if stream == decoded[0] else 0.0 for stream in decoded},
+                                             timestamp)
+                totals['best'] += selected == wake_chunks[index]
+            arbiter.reset()
+    return totals
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mics', type=int, nargs='+', default=[1, 2, 3, 4], help="Microphone counts to simulate")
+    parser.add_argument('--minutes', type=float, default=5.0, help="Length of each simulated room")
+    parser.add_argument('--model', help="Model key for measuring decode cost (default: no decoding)")
+    parser.add_argument('--write', help="Save the largest room's microphones as WAV files here")
+    args = parser.parse_args(argv)
+
+    rate, chunk = config.audio.SAMPLE_RATE, config.audio.CHUNK_SIZE
+    decode_ms = decode_ms_per_chunk(args.model) if args.model else None
+    chunk_ms = chunk / rate * 1000
+    print(f"chunk={chunk}, decoders={config.multi.DECODERS}, active SNR={config.multi.ACTIVE_SNR_DB}dB"
+          + (f", decode {decode_ms:.1f}ms/chunk" if decode_ms else ""))
+    print(f"{'mics':>5} {'decoded':>8} {'front end':>10} {'CPU':>7} {'all decoded':>12} {'best mic':>9}")
+
+    for mics in args.mics:
+        totals = evaluate(np.random.default_rng(mics), mics, args.minutes * 60)
+        front_us = totals['front_us'] / totals['chunks']
+        if decode_ms:
+            cpu = (totals['decoded'] * decode_ms + totals['front_us'] / 1000) / (totals['chunks'] * chunk_ms)
+            naive = decode_ms / chunk_ms * mics
+            cpu_cells = f"{cpu * mics:7.1%} {naive:12.1%}"
+        else:
+            cpu_cells = f"{'-':>7} {'-':>12}"
+        print(f"{mics:5d} {totals['decoded'] / totals['chunks']:8.1%} {front_us:8.0f}us {cpu_cells} "
+              f"{totals['best']}/{totals['wakes']:<5}")
+
+    if args.write:
+        write_room(Path(args.write), totals['signals'], rate)
+
+
+if __name__ == '__main__':
+    main()
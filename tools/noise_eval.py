@@ -0,0 +1,207 @@
+"""Noise suppression evaluation: how much audio would be decoded
+
+Streams noisy recordings through the capture path with the noise
+suppression stage bypassed and enabled, and reports per mode:
+  * decoded: fraction of chunks with at least one VAD frame above
+    VAD_ENERGY_THRESHOLD, i.e. audio a VAD-gated decoder would process
+  * speech kept: fraction of labelled speech frames still above it
+  * noise active: fraction of noise-only frames above it
+  * endpoint: delay from the labelled speech end to the Endpointer's
+    silence decision
+  * processing time per chunk in microseconds
+
+Labels come from the "speech_segments_ms" sidecar field, a list of
+[start, end] pairs; recordings should end with a couple of seconds of
+noise rather than digital silence. Without CORPUS_DIR, synthetic fixtures (harmonic
+speech-like bursts in fan/HVAC noise) are generated; --write-fixtures
+saves them as a corpus.
+
+Usage:
+    python -m tools.noise_eval [CORPUS_DIR] [--write-fixtures DIR] [--noise-rms 1500]
+"""
+
+import argparse
+import json
+import wave
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from tools.replay_corpus import ReplayItem, load_corpus, iter_chunks
+from core.metrics import percentile
+from core.audio_input import VoiceActivityDetector
+from core.endpointing import Endpointer
+from core.noise_suppression import NoiseSuppressor
+from config.settings import config
+
+
+def speech_like(rng, n: int, rate: int) -> np.ndarray:
+    """Voiced burst: harmonics of a gliding pitch with formant shaping and syllable rhythm"""
+    t = np.arange(n) / rate
+    f0 = rng.uniform(100, 220) * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(0.5, 2) * t))
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    signal = np.zeros(n)
+    for k in range(1, 30):
+        freq = k * f0.mean()
+        if freq > rate / 2 - 500:
+            break
+        formants = sum(np.exp(-((freq - f) / 250) ** 2) for f in (550, 1500, 2600))
+        signal += (0.2 + formants) / k ** 0.7 * np.sin(k * phase)
+    syllables = np.abs(np.sin(np.pi * rng.uniform(3.5, 5.5) * t)) ** 0.6
+    ramp = np.minimum(1, np.minimum(t, t[-1] - t) / 0.03)
+    return signal * syllables * ramp
+
+
+def hvac_noise(rng, n: int, rate: int) -> np.ndarray:
+    """Low-frequency rumble, broadband fan noise and mains hum"""
+    rumble = np.zeros(n)
+    white = rng.standard_normal(n)
+    # Leaky integration gives a brown-noise rumble below a few hundred Hz
+    leak = np.exp(-2 * np.pi * 150 / rate)
+    acc = 0.0
+    for start in range(0, n, 4096):
+        block = white[start:start + 4096]
+        powers = leak ** np.arange(len(block))
+        rumble[start:start + len(block)] = powers * (acc + np.cumsum(block / powers))
+        acc = rumble[start + len(block) - 1]
+    fan = np.convolve(rng.standard_normal(n), np.ones(4) / 4, mode='same')
+    t = np.arange(n) / rate
+    hum = sum(np.sin(2 * np.pi * 50 * k * t) / k for k in (1, 2, 3))
+    parts = [rumble / rumble.std(), fan / fan.std(), hum / hum.std()]
+    return 0.7 * parts[0] + 0.6 * parts[1] + 0.4 * parts[2]
+
+
+def make_fixture(rng, seconds: float, rate: int, noise_rms: float, speech_rms: float):
+    """Noisy recording with 2-4 speech bursts; returns (int16 audio, [[start_ms, end_ms], ...])"""
+    n = int(seconds * rate)
+    noise = hvac_noise(rng, n, rate)
+    audio = noise / noise.std() * noise_rms
+
+    segments = []
+    position = rng.uniform(1.5, 2.5)
+    while True:
+        length = rng.uniform(0.8, 1.8)
+        # Keep at least 2s of noise after the last burst for the endpointer
+        if position + length + 2.0 > seconds:
+            break
+        start, end = int(position * rate), int((position + length) * rate)
+        burst = speech_like(rng, end - start, rate)
+        audio[start:end] += burst / np.sqrt(np.mean(burst ** 2)) * speech_rms
+        segments.append([round(position * 1000), round((position + length) * 1000)])
+        position += length + rng.uniform(1.5, 3.0)
+
+    return np.clip(audio, -32768, 32767).astype(np.int16), segments
+
+
+def synthetic_corpus(count: int, noise_rms: float, speech_rms: float) -> List[ReplayItem]:
+    rng = np.random.default_rng(0)
+    rate = config.audio.SAMPLE_RATE
+    items = []
+    for i in range(count):
+        audio, segments = make_fixture(rng, rng.uniform(8, 12), rate, noise_rms, speech_rms)
+        labels = {'speech_segments_ms': segments, 'speech_end_ms': segments[-1][1]}
+        items.append(ReplayItem(Path(f'noisy_{i:02d}.wav'), audio.tobytes(), rate, labels))
+    return items
+
+
+def write_fixtures(items: List[ReplayItem], out_dir: str):
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for item in items:
+        with wave.open(str(out / item.path.name), 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(item.sample_rate)
+            wf.writeframes(item.audio)
+        (out / item.path.name).with_suffix('.json').write_text(json.dumps(item.labels), encoding='utf-8')
+    print(f"Wrote {len(items)} fixtures to {out}")
+
+
+def evaluate(item: ReplayItem, vad: VoiceActivityDetector, suppressor: Optional[NoiseSuppressor]) -> dict:
+    """Stream one recording through the stage and the VAD"""
+    chunk_size = config.audio.CHUNK_SIZE
+    delay_ms = suppressor.FRAME / item.sample_rate * 1000 if suppressor else 0.0
+    frame_ms = vad.FRAME_SIZE / item.sample_rate * 1000
+    chunk_ms = chunk_size / item.sample_rate * 1000
+
+    if suppressor:
+        suppressor.reset()
+    endpointer = Endpointer(vad)
+    endpoint_ms = None
+    # Endpointer looks for the silence after the last speech burst
+    last_start_ms = item.labels['speech_segments_ms'][-1][0] + delay_ms
+
+    active = []
+    times = []
+    decoded = 0
+    n_chunks = 0
+    elapsed_us = []
+    for index, chunk in enumerate(iter_chunks(item.audio, chunk_size)):
+        if suppressor:
+            chunk = suppressor.process(chunk)
+            elapsed_us.append(suppressor.stats['us_last'])
+        energies = vad.frame_energies(chunk)
+        frames_active = energies > vad.THRESHOLD
+        active.append(frames_active)
+        # frame_energies drops the partial frame at the end of each chunk
+        times.append(index * chunk_ms + (np.arange(len(energies)) + 0.5) * frame_ms - delay_ms)
+        n_chunks += 1
+        decoded += bool(frames_active.any())
+
+        position_ms = (index + 1) * chunk_ms
+        if endpoint_ms is None and position_ms > last_start_ms and endpointer.process(chunk):
+            endpoint_ms = position_ms
+
+    active = np.concatenate(active)
+    times = np.concatenate(times)
+    speech = np.zeros(len(active), dtype=bool)
+    for start, end in item.labels['speech_segments_ms']:
+        speech |= (times >= start) & (times < end)
+
+    speech_end = item.labels['speech_end_ms'] + delay_ms
+    return {
+        'decoded': decoded / n_chunks,
+        'speech_kept': active[speech].mean() if speech.any() else float('nan'),
+        'noise_active': active[~speech & (times >= 0)].mean(),
+        'endpoint_ms': (endpoint_ms - speech_end) if endpoint_ms is not None else None,
+        'us': elapsed_us,
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help="Directory with noisy WAV recordings and labels")
+    parser.add_argument('--write-fixtures', metavar='DIR', help="Save the synthetic fixtures and exit")
+    parser.add_argument('--count', type=int, default=12, help="Synthetic fixtures to generate")
+    parser.add_argument('--noise-rms', type=float, default=1500.0, help="Synthetic noise level")
+    parser.add_argument('--speech-rms', type=float, default=3000.0, help="Synthetic speech level")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        corpus = [item for item in load_corpus(args.corpus) if 'speech_segments_ms' in item.labels]
+    else:
+        corpus = synthetic_corpus(args.count, args.noise_rms, args.speech_rms)
+    if args.write_fixtures:
+        write_fixtures(corpus, args.write_fixtures)
+        return
+
+    vad = VoiceActivityDetector()
+    suppressor = NoiseSuppressor(max_chunk=config.audio.CHUNK_SIZE)
+
+    print(f"{len(corpus)} recordings, chunk={config.audio.CHUNK_SIZE}, VAD threshold={vad.THRESHOLD}")
+    print(f"{'mode':>10} {'decoded':>8} {'speech kept':>12} {'noise active':>13} "
+          f"{'endpoint p50':>13} {'missed':>7} {'us/chunk':>9} {'us p95':>7}")
+    for name, stage in (('bypass', None), ('suppress', suppressor)):
+        results = [evaluate(item, vad, stage) for item in corpus if item.sample_rate == config.audio.SAMPLE_RATE]
+        endpoints = [r['endpoint_ms'] for r in results if r['endpoint_ms'] is not None]
+        us = [value for r in results for value in r['us']]
+        print(f"{name:>10} {np.mean([r['decoded'] for r in results]):8.1%} "
+              f"{np.nanmean([r['speech_kept'] for r in results]):12.1%} "
+              f"{np.mean([r['noise_active'] for r in results]):13.1%} "
+              f"{percentile(endpoints, 50):11.0f}ms {len(results) - len(endpoints):7d} "
+              f"{np.mean(us) if us else 0:9.0f} {percentile(us, 95) if us else 0:7.0f}")
+
+
+if __name__ == '__main__':
+    main()
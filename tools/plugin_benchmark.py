@@ -0,0 +1,76 @@
+"""Plugin startup and first-call latency
+
+Runs discovery in a fresh interpreter twice, so module imports are
+cold both times:
+  * lazy: metadata only, as the assistant starts
+  * eager: every handler imported up front, as hardcoded commands would be
+and reports the startup time of each plus, per plugin, its discovery
+time, handler import time and first-call latency. Only handlers with
+side_effect "none" are called; others report the import alone.
+
+Usage:
+    python -m tools.plugin_benchmark [--plugin-dir DIR] [--text "..."]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from typing import Optional
+
+
+def child(mode: str, plugin_dir: Optional[str], text: str):
+    start = time.perf_counter()
+    from core.plugins import PluginRegistry
+    registry = PluginRegistry()
+    registry.discover(plugin_dir)
+    if mode == 'eager':
+        for name in registry.specs:
+            registry.resolve(name)
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    if mode == 'lazy':
+        for name, spec in registry.specs.items():
+            if spec.side_effect == 'none':
+                registry.call(name, text or name)
+            else:
+                registry.resolve(name)
+    print(json.dumps({'startup_ms': startup_ms, 'plugins': registry.get_stats()}))
+
+
+def run_child(mode: str, plugin_dir: Optional[str], text: str) -> dict:
+    cmd = [sys.executable, '-m', 'tools.plugin_benchmark', '--child', mode, '--text', text]
+    if plugin_dir:
+        cmd += ['--plugin-dir', plugin_dir]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plugin-dir', help="Plugin directory (default PLUGINS_DIR)")
+    parser.add_argument('--text', default='', help="Text passed to handlers on the first call (default: the name)")
+    parser.add_argument('--child', choices=('lazy', 'eager'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.plugin_dir, args.text)
+        return
+
+    lazy = run_child('lazy', args.plugin_dir, args.text)
+    eager = run_child('eager', args.plugin_dir, args.text)
+    print(f"startup: lazy {lazy['startup_ms']:.1f}ms, eager {eager['startup_ms']:.1f}ms")
+    if not lazy['plugins']:
+        print("No plugins found")
+        return
+
+    print(f"{'plugin':>16} {'source':>28} {'discovery':>10} {'import':>9} {'first call':>11}")
+    for name, stats in lazy['plugins'].items():
+        first_call = stats['first_call_ms']
+        print(f"{name:>16} {stats['source']:>28} {stats['discovery_ms'] or 0:8.1f}ms "
+              f"{stats['import_ms']:7.1f}ms {'%9.1fms' % first_call if first_call is not None else '%11s' % '-'}")
+
+
+if __name__ == '__main__':
+    main()
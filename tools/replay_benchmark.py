@@ -0,0 +1,136 @@
+"""Replay benchmark: end-of-speech to response time
+
+Feeds each corpus recording through the command-capture loop as if it
+came from the microphone and reports, per endpointing strategy, the time
+from the end of speech to the moment a response is ready:
+
+    response = (endpoint position - speech end) + post-endpoint compute
+
+Usage:
+    python -m tools.replay_benchmark CORPUS_DIR [--no-stt] [--verbose]
+"""
+
+import argparse
+import time
+from typing import Optional
+
+from tools.replay_corpus import ReplayItem, load_corpus, iter_chunks
+from core.metrics import percentile
+from core.audio_input import VoiceActivityDetector
+from core.endpointing import Endpointer
+from core.command_router import CommandRouter
+from config.settings import config
+
+
+def estimate_speech_end_ms(item: ReplayItem, vad: VoiceActivityDetector) -> float:
+    """Speech end from labels, or end of the last frame above the VAD threshold"""
+    if 'speech_end_ms' in item.labels:
+        return float(item.labels['speech_end_ms'])
+
+    energies = vad.frame_energies(item.audio)
+    speech_frames = (energies > vad.THRESHOLD).nonzero()[0]
+    if len(speech_frames) == 0:
+        return 0.0
+    return (speech_frames[-1] + 1) * vad.FRAME_SIZE / item.sample_rate * 1000
+
+
+def run_legacy(item: ReplayItem, vad: VoiceActivityDetector, stt) -> dict:
+    """Original loop: VAD speech end counted over more than three chunks, then batch STT"""
+    chunk_ms = config.audio.CHUNK_SIZE / item.sample_rate * 1000
+    max_chunks = int(config.vosk.TIMEOUT_SECONDS * 1000 / chunk_ms)
+    pad = max(0, max_chunks - int(item.duration_ms / chunk_ms))
+
+    vad.reset()
+    audio_buffer = []
+    silence_count = 0
+    for chunk in iter_chunks(item.audio, config.audio.CHUNK_SIZE, pad):
+        audio_buffer.append(chunk)
+        if len(audio_buffer) >= max_chunks:
+            break
+        if vad.detect_speech_end(chunk):
+            silence_count += 1
+            if silence_count > 3:
+                break
+        else:
+            silence_count = 0
+
+    endpoint_ms = len(audio_buffer) * chunk_ms
+    compute_start = time.perf_counter()
+    text = stt.recognize(b''.join(audio_buffer)) if stt else ""
+    compute_ms = (time.perf_counter() - compute_start) * 1000
+    return {'endpoint_ms': endpoint_ms, 'compute_ms': compute_ms, 'text': text, 'reason': None}
+
+
+def run_adaptive(item: ReplayItem, endpointer: Endpointer, stt) -> dict:
+    """Adaptive endpointer fed by frame VAD, Vosk final results and command matches"""
+    chunk_ms = config.audio.CHUNK_SIZE / item.sample_rate * 1000
+    max_chunks = int(config.vosk.TIMEOUT_SECONDS * 1000 / chunk_ms)
+    pad = max(0, max_chunks - int(item.duration_ms / chunk_ms))
+
+    endpointer.reset()
+    if stt:
+        stt.begin_utterance()
+
+    n_chunks = 0
+    for chunk in iter_chunks(item.audio, config.audio.CHUNK_SIZE, pad):
+        n_chunks += 1
+        text, is_final = stt.accept_chunk(chunk) if stt else ("", False)
+        if endpointer.process(chunk, text, is_final) or n_chunks >= max_chunks:
+            break
+
+    endpoint_ms = n_chunks * chunk_ms
+    compute_start = time.perf_counter()
+    text = stt.finish_utterance() if stt else ""
+    compute_ms = (time.perf_counter() - compute_start) * 1000
+    return {'endpoint_ms': endpoint_ms, 'compute_ms': compute_ms, 'text': text, 'reason': endpointer.reason}
+
+
+def summarize(name: str, latencies: list):
+    print(f"{name:>10}: n={len(latencies)} "
+          f"mean={sum(latencies) / max(1, len(latencies)):.0f}ms "
+          f"p50={percentile(latencies, 50):.0f}ms "
+          f"p95={percentile(latencies, 95):.0f}ms")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', help="Directory with WAV recordings")
+    parser.add_argument('--no-stt', action='store_true', help="Skip Vosk; endpoint on VAD only")
+    parser.add_argument('--verbose', action='store_true', help="Print per-recording results")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    vad = VoiceActivityDetector()
+    router = CommandRouter()
+    endpointer = Endpointer(vad, router.is_complete_command)
+
+    stt = None
+    if not args.no_stt:
+        from core.stt_engine import SpeechToTextPipeline
+        stt = SpeechToTextPipeline()
+
+    results = {'legacy': [], 'adaptive': []}
+    for item in corpus:
+        if item.sample_rate != config.audio.SAMPLE_RATE:
+            print(f"skip {item.path.name}: {item.sample_rate}Hz != {config.audio.SAMPLE_RATE}Hz")
+            continue
+
+        speech_end_ms = estimate_speech_end_ms(item, vad)
+        for name, run in (('legacy', lambda: run_legacy(item, vad, stt)),
+                          ('adaptive', lambda: run_adaptive(item, endpointer, stt))):
+            outcome = run()
+            latency = outcome['endpoint_ms'] - speech_end_ms + outcome['compute_ms']
+            results[name].append(latency)
+            if args.verbose:
+                print(f"{item.path.name:>30} {name:>8}: {latency:7.0f}ms "
+                      f"(endpoint {outcome['endpoint_ms']:.0f}ms, {outcome['reason'] or '-'}) "
+                      f"'{outcome['text']}'")
+
+    print(f"End-of-speech to response, chunk={config.audio.CHUNK_SIZE}, "
+          f"timeout={config.vosk.TIMEOUT_SECONDS}s, stt={'on' if stt else 'off'}")
+    for name, latencies in results.items():
+        summarize(name, latencies)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Replay corpus loading
+
+A replay corpus is a directory of 16-bit PCM WAV recordings. Each
+recording may have a JSON sidecar with the same stem holding labels:
+
+    {"text": "сколько времени", "speech_end_ms": 1840, "wake_end_ms": 620}
+
+Labels are optional; benchmarks estimate what they need when missing.
+Black box snapshots (core/blackbox.py) are written in this layout.
+"""
+
+import json
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List
+
+
+@dataclass
+class ReplayItem:
+    path: Path
+    audio: bytes
+    sample_rate: int
+    labels: dict = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return len(self.audio) / 2 / self.sample_rate * 1000
+
+
+def load_item(wav_path: Path) -> ReplayItem:
+    """Load one recording and its labels"""
+    with wave.open(str(wav_path), 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError(f"{wav_path}: expected 16-bit mono PCM")
+        audio = wf.readframes(wf.getnframes())
+        sample_rate = wf.getframerate()
+
+    labels = {}
+    sidecar = wav_path.with_suffix('.json')
+    if sidecar.exists():
+        labels = json.loads(sidecar.read_text(encoding='utf-8'))
+
+    return ReplayItem(wav_path, audio, sample_rate, labels)
+
+
+def load_corpus(corpus_dir: str) -> List[ReplayItem]:
+    """Load all recordings under corpus_dir"""
+    paths = sorted(Path(corpus_dir).rglob('*.wav'))
+    if not paths:
+        raise FileNotFoundError(f"No WAV files found in {corpus_dir}")
+    return [load_item(path) for path in paths]
+
+
+def iter_chunks(audio: bytes, chunk_size: int, pad_chunks: int = 0) -> Iterator[bytes]:
+    """Yield fixed-size chunks, then pad_chunks chunks of silence"""
+    chunk_bytes = chunk_size * 2
+    for start in range(0, len(audio), chunk_bytes):
+        chunk = audio[start:start + chunk_bytes]
+        if len(chunk) < chunk_bytes:
+            chunk += b'\x00' * (chunk_bytes - len(chunk))
+        yield chunk
+
+    silence = b'\x00' * chunk_bytes
+    for _ in range(pad_chunks):
+        yield silence
@@ -0,0 +1,99 @@
+"""Wake word benchmark: latency of final-only vs partial matching
+
+Runs every corpus recording through WakeWordEngine twice, once matching
+final results only (the original behaviour) and once matching stable
+partial hypotheses. Latency is measured from the end of the wake word,
+taken from the "wake_end_ms" label; without a label only the firing
+times of the two modes are compared.
+
+Usage:
+    python -m tools.wake_benchmark CORPUS_DIR [--stability 2] [--verbose]
+"""
+
+import argparse
+from typing import Optional
+
+from vosk import SetLogLevel
+
+from tools.replay_corpus import ReplayItem, load_corpus, iter_chunks
+from core.metrics import percentile
+from core.wake_word import WakeWordEngine
+from core.model_manager import model_manager
+from config.settings import config
+
+# Silence after the recording, so a final result can still arrive
+TAIL_MS = 1500
+
+
+def run(item: ReplayItem, engine: WakeWordEngine) -> dict:
+    """Feed one recording; return the audio position of the first wake"""
+    chunk_ms = config.audio.CHUNK_SIZE / item.sample_rate * 1000
+    engine.reset()
+    engine.audio_ms = 0.0
+    engine.last_wake_ms = None
+
+    fired_ms = None
+    wake_word = None
+    for chunk in iter_chunks(item.audio, config.audio.CHUNK_SIZE, int(TAIL_MS / chunk_ms)):
+        wake_word = engine.process_chunk(chunk)
+        if wake_word:
+            fired_ms = engine.audio_ms
+            break
+    return {'fired_ms': fired_ms, 'wake_word': wake_word}
+
+
+def summarize(name: str, latencies: list, misses: int):
+    print(f"{name:>8}: n={len(latencies)} missed={misses} "
+          f"mean={sum(latencies) / max(1, len(latencies)):.0f}ms "
+          f"p50={percentile(latencies, 50):.0f}ms "
+          f"p95={percentile(latencies, 95):.0f}ms")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', help="Directory with WAV recordings")
+    parser.add_argument('--stability', type=int, default=config.wake.PARTIAL_STABILITY,
+                        help="Consecutive partials required to fire")
+    parser.add_argument('--verbose', action='store_true', help="Print per-recording results")
+    args = parser.parse_args(argv)
+
+    SetLogLevel(-1)
+    corpus = load_corpus(args.corpus)
+    engine = WakeWordEngine(model_manager.get(config.wake.MODEL or None))
+    engine.STABILITY = max(1, args.stability)
+
+    results = {'final': [], 'partial': []}
+    misses = {'final': 0, 'partial': 0}
+    gains = []
+    for item in corpus:
+        if item.sample_rate != config.audio.SAMPLE_RATE:
+            print(f"skip {item.path.name}: {item.sample_rate}Hz != {config.audio.SAMPLE_RATE}Hz")
+            continue
+
+        outcomes = {}
+        for name, on_partial in (('final', False), ('partial', True)):
+            engine.ON_PARTIAL = on_partial
+            outcomes[name] = outcome = run(item, engine)
+            if outcome['fired_ms'] is None:
+                misses[name] += 1
+            elif 'wake_end_ms' in item.labels:
+                results[name].append(outcome['fired_ms'] - item.labels['wake_end_ms'])
+
+        final_ms, partial_ms = outcomes['final']['fired_ms'], outcomes['partial']['fired_ms']
+        if final_ms is not None and partial_ms is not None:
+            gains.append(final_ms - partial_ms)
+
+        if args.verbose:
+            print(f"{item.path.name:>30}: final={final_ms}ms partial={partial_ms}ms "
+                  f"label={item.labels.get('wake_end_ms', '-')} '{outcomes['partial']['wake_word'] or ''}'")
+
+    print(f"Wake latency after wake word end, chunk={config.audio.CHUNK_SIZE}, stability={engine.STABILITY}")
+    for name, latencies in results.items():
+        summarize(name, latencies, misses[name])
+    if gains:
+        print(f"partial fires earlier by: mean={sum(gains) / len(gains):.0f}ms "
+              f"p50={percentile(gains, 50):.0f}ms (n={len(gains)})")
+
+
+if __name__ == '__main__':
+    main()
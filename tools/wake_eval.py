@@ -0,0 +1,204 @@
+"""Wake word evaluation: false accepts, misses, latency and CPU cost
+
+Runs the WakeWordDetector decoding logic (WakeWordEngine, and the VAD
+gate with --gate) over two sets of 16-bit mono WAV recordings:
+  * negative: long recordings without the wake word (talk radio, office
+    audio); every wake is a false accept. Recordings are cut into
+    --segment-min segments, each decoded from --overlap-s earlier so a
+    wake across a cut is neither lost nor counted twice
+  * positive: clips containing the wake word, in the replay corpus
+    layout; latency is measured from the "wake_end_ms" label
+
+Segments and clips are spread over a process pool with one model per
+worker, loaded once when the worker starts, so hours of audio run many
+times faster than real time. Reports false accepts per audio hour,
+miss rate, wake latency and CPU seconds per audio hour (decoding only,
+summed over workers). Chunk size, wake and gate settings come from the
+environment, as for the assistant.
+
+Usage:
+    python -m tools.wake_eval --negative radio/ [--positive clips/] [--workers 4] [--gate] [--verbose]
+"""
+
+import argparse
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from vosk import SetLogLevel
+
+from tools.replay_corpus import iter_chunks, load_item
+from core.metrics import percentile
+from core.logger import app_logger
+from core.wake_word import WakeWordEngine, feed_chunk
+from core.model_manager import model_manager
+from config.settings import config
+
+# Silence after a positive clip, so a final result can still arrive
+TAIL_MS = 1500
+
+_engine: Optional[WakeWordEngine] = None
+_gate = False
+
+
+def _init_worker(model_key: str, stability: int, gate: bool):
+    """Load the model once per worker process"""
+    global _engine, _gate
+    SetLogLevel(-1)
+    app_logger.setLevel('WARNING')
+    _engine = WakeWordEngine(model_manager.get(model_key))
+    _engine.STABILITY = max(1, stability)
+    _gate = gate
+
+
+def _decode(audio: bytes, pad_chunks: int, rate: int, first_wake: bool = False) -> dict:
+    """Feed audio through the detection loop's feed_chunk; wake positions in ms"""
+    engine = _engine
+    engine.reset()
+    engine.audio_ms = 0.0
+    engine.last_wake_ms = None
+    gate = None
+    if _gate:
+        from core.multi_mic import StreamArbiter
+        gate = StreamArbiter(1, decoders=1, rate=rate)
+
+    chunk_ms = config.audio.CHUNK_SIZE / rate * 1000
+    wakes = []
+    chunks = decoded = 0
+    start = time.process_time()
+    for index, chunk in enumerate(iter_chunks(audio, config.audio.CHUNK_SIZE, pad_chunks)):
+        chunks += 1
+        wake_word, count = feed_chunk(engine, gate, chunk, (index + 1) * chunk_ms / 1000)
+        decoded += count
+        if wake_word:
+            wakes.append(((index + 1) * chunk_ms, wake_word))
+            if first_wake:
+                break
+            if gate is not None:
+                gate.reset()
+    return {'wakes': wakes, 'chunks': chunks, 'decoded': decoded, 'cpu_s': time.process_time() - start}
+
+
+def _run_negative(path: str, start: int, frames: int, overlap: int) -> dict:
+    """Decode one segment; wakes in the overlap belong to the previous one"""
+    with wave.open(path, 'rb') as wf:
+        rate = wf.getframerate()
+        wf.setpos(start - overlap)
+        audio = wf.readframes(frames + overlap)
+    result = _decode(audio, 0, rate)
+    overlap_ms = overlap / rate * 1000
+    result['wakes'] = [(path, (start - overlap) / rate + ms / 1000, wake_word)
+                       for ms, wake_word in result['wakes'] if ms > overlap_ms]
+    result['audio_s'] = frames / rate
+    return result
+
+
+def _run_positive(path: str) -> dict:
+    """Decode one clip up to its first wake"""
+    item = load_item(Path(path))
+    chunk_ms = config.audio.CHUNK_SIZE / item.sample_rate * 1000
+    result = _decode(item.audio, int(TAIL_MS / chunk_ms), item.sample_rate, first_wake=True)
+    result['audio_s'] = item.duration_ms / 1000
+    result['path'] = path
+    result['wake_end_ms'] = item.labels.get('wake_end_ms')
+    return result
+
+
+def _wav_rate(path: Path) -> int:
+    with wave.open(str(path), 'rb') as wf:
+        return wf.getframerate()
+
+
+def plan_positive(positive_dir: str) -> List[str]:
+    """Clips at the assistant's sample rate"""
+    clips = []
+    for path in sorted(Path(positive_dir).rglob('*.wav')):
+        rate = _wav_rate(path)
+        if rate != config.audio.SAMPLE_RATE:
+            print(f"skip {path.name}: {rate}Hz != {config.audio.SAMPLE_RATE}Hz")
+            continue
+        clips.append(str(path))
+    return clips
+
+
+def plan_negative(negative_dir: str, segment_s: float, overlap_s: float) -> List[tuple]:
+    """(path, start frame, frames, overlap frames) for every segment"""
+    segments = []
+    for path in sorted(Path(negative_dir).rglob('*.wav')):
+        with wave.open(str(path), 'rb') as wf:
+            if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                raise ValueError(f"{path}: expected 16-bit mono PCM")
+            rate, total = wf.getframerate(), wf.getnframes()
+        if rate != config.audio.SAMPLE_RATE:
+            print(f"skip {path.name}: {rate}Hz != {config.audio.SAMPLE_RATE}Hz")
+            continue
+        step = int(segment_s * rate)
+        for start in range(0, total, step):
+            overlap = min(start, int(overlap_s * rate))
+            segments.append((str(path), start, min(step, total - start), overlap))
+    return segments
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--negative', help="Directory with recordings without the wake word")
+    parser.add_argument('--positive', help="Directory with wake word clips")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--segment-min', type=float, default=10.0, help="Length of negative segments")
+    parser.add_argument('--overlap-s', type=float, default=5.0, help="Audio decoded before each segment")
+    parser.add_argument('--stability', type=int, default=config.wake.PARTIAL_STABILITY,
+                        help="Consecutive partials required to fire")
+    parser.add_argument('--gate', action='store_true', default=config.wake.VAD_GATE,
+                        help="Decode only speech, as with WAKE_VAD_GATE")
+    parser.add_argument('--verbose', action='store_true', help="Print every false accept and miss")
+    args = parser.parse_args(argv)
+    if not args.negative and not args.positive:
+        parser.error("give --negative, --positive or both")
+
+    segments = plan_negative(args.negative, args.segment_min * 60, args.overlap_s) if args.negative else []
+    clips = plan_positive(args.positive) if args.positive else []
+    model_key = model_manager.resolve(config.wake.MODEL or None)
+    print(f"model={model_key}, chunk={config.audio.CHUNK_SIZE}, stability={max(1, args.stability)}, "
+          f"gate={'on' if args.gate else 'off'}, workers={args.workers}: "
+          f"{len(segments)} negative segments, {len(clips)} positive clips")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(model_key, args.stability, args.gate)) as pool:
+        negative = list(pool.map(_run_negative, *zip(*segments))) if segments else []
+        positive = list(pool.map(_run_positive, clips))
+    wall_s = time.perf_counter() - start
+
+    results = negative + positive
+    audio_s = sum(r['audio_s'] for r in results)
+    cpu_s = sum(r['cpu_s'] for r in results)
+    chunks = sum(r['chunks'] for r in results)
+    print(f"{audio_s / 3600:.2f}h of audio in {wall_s:.1f}s ({audio_s / wall_s:.0f}x real time), "
+          f"{cpu_s / (audio_s / 3600):.0f} CPU s per audio hour, "
+          f"{sum(r['decoded'] for r in results) / max(chunks, 1):.0%} of chunks decoded")
+
+    if negative:
+        false_accepts = [wake for r in negative for wake in r['wakes']]
+        hours = sum(r['audio_s'] for r in negative) / 3600
+        print(f"negative: {len(false_accepts)} false accepts in {hours:.2f}h = {len(false_accepts) / hours:.2f}/hour")
+        if args.verbose:
+            for path, position_s, wake_word in false_accepts:
+                print(f"  FA {Path(path).name} {position_s // 60:.0f}:{position_s % 60:04.1f} '{wake_word}'")
+
+    if positive:
+        missed = [r['path'] for r in positive if not r['wakes']]
+        latencies = [r['wakes'][0][0] - r['wake_end_ms'] for r in positive
+                     if r['wakes'] and r['wake_end_ms'] is not None]
+        print(f"positive: {len(missed)}/{len(positive)} missed = {len(missed) / len(positive):.1%}, "
+              f"latency after wake word end n={len(latencies)} p50={percentile(latencies, 50):.0f}ms "
+              f"p95={percentile(latencies, 95):.0f}ms")
+        if args.verbose:
+            for path in missed:
+                print(f"  miss {Path(path).name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,11 @@ import tkinter as tk
 from tkinter import ttk
 import threading
 import time
-import numpy as np
 import pyaudio
 from typing import Callable
 from core.logger import app_logger
+from core.level_feed import LevelFeed
+from config.settings import config
 
 class VoiceAssistantGUI:
     """Enhanced GUI for Voice Assistant with real-time visualization"""
@@ -20,8 +21,16 @@ class VoiceAssistantGUI:
         self.root.resizable(True, True)
         
         # Real-time data
-        self.audio_data = np.zeros(100)
+        self.level_feed = LevelFeed(config.gui.VU_BARS)
+        self.frame_interval_ms = max(1, int(1000 / config.gui.VU_FPS))
         self.max_level = 0
+        self.vu_bars = []
+        self.vu_colors = []
+        self.vu_levels = [0.0] * config.gui.VU_BARS
+        self.peak_line = None
+        self.render_stats = {'frames': 0, 'draw_ms_total': 0.0, 'draw_ms_max': 0.0,
+                             'lag_ms_total': 0.0, 'lag_ms_max': 0.0, 'ticks': 0}
+        self._next_tick = None
         self.is_listening = False
         self.recognized_text = ""
         self.command_status = "Ready"
@@ -65,6 +74,8 @@ class VoiceAssistantGUI:
         
         self.canvas = tk.Canvas(viz_frame, width=800, height=80, bg='#0f1419', highlightthickness=0)
         self.canvas.pack(pady=5)
+        self._create_vu_items()
+        self.canvas.bind('<Configure>', lambda event: self._draw_vu_meter(self.vu_levels, 0.0))
         
         # Row 2: Status & Partial Recognition
         status_frame = tk.LabelFrame(main_frame, text="🎤 Статус распознавания", 
@@ -125,29 +136,28 @@ class VoiceAssistantGUI:
                                font=('Segoe UI', 11, 'bold'), relief=tk.FLAT)
         self.mic_btn.pack(side=tk.LEFT, padx=10)
     
-    def _draw_vu_meter(self, data: np.ndarray):
-        """Draw real-time VU meter"""
-        self.canvas.delete('all')
-        
-        # Normalize data
-        levels = np.abs(data)
-        max_val = np.max(levels) if len(levels) > 0 else 0
-        self.max_level = max(self.max_level * 0.95, max_val)  # Decay
+    def _create_vu_items(self):
+        """Create persistent VU meter items, later moved with coords/itemconfig"""
+        for _ in range(config.gui.VU_BARS):
+            self.vu_bars.append(self.canvas.create_rectangle(0, 0, 0, 0, fill='#10b981', outline='#10b981'))
+            self.vu_colors.append('#10b981')
+        self.peak_line = self.canvas.create_line(0, 0, 0, 10, fill='#fbbf24', width=3)
+    
+    def _draw_vu_meter(self, levels: list, peak: float):
+        """Update real-time VU meter in place"""
+        self.max_level = max(self.max_level * 0.95, peak, 1e-6)  # Decay
+        self.vu_levels = levels
         
         bar_width = 6
         bar_gap = 2
-        num_bars = 40
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
         
         if width < 10:
             return
         
-        bar_w = (width - (num_bars - 1) * bar_gap) / num_bars
-        
-        for i in range(num_bars):
-            idx = i * len(data) // num_bars
-            level = levels[idx] if idx < len(levels) else 0
+        for i, item in enumerate(self.vu_bars):
+            level = levels[i] if i < len(levels) else 0
             bar_height = int((level / self.max_level) * height * 0.8)
             
             # Color based on level
@@ -159,28 +169,35 @@ class VoiceAssistantGUI:
                 color = '#10b981'  # Green
             
             x1 = i * (bar_width + bar_gap)
-            y1 = height - bar_height
-            x2 = x1 + bar_width
-            y2 = height
-            
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline=color)
+            self.canvas.coords(item, x1, height - bar_height, x1 + bar_width, height)
+            if color != self.vu_colors[i]:
+                self.canvas.itemconfig(item, fill=color, outline=color)
+                self.vu_colors[i] = color
         
         # Peak indicator
-        peak_x = int((max_val / self.max_level) * width)
-        self.canvas.create_line(peak_x, 0, peak_x, 10, fill='#fbbf24', width=3)
+        peak_x = int((peak / self.max_level) * width)
+        self.canvas.coords(self.peak_line, peak_x, 0, peak_x, 10)
     
     def update_audio_level(self, audio_chunk: bytes):
-        """Update audio visualization from callback"""
+        """Update audio visualization from callback (any thread)"""
         if self.audio_callback:
             self.audio_callback(audio_chunk)
         try:
-            data = np.frombuffer(audio_chunk, dtype=np.int16)
-            self.audio_data = np.roll(self.audio_data, -len(data)//2)
-            self.audio_data[-len(data)//2:] = data.astype(float) / 32768.0
-            self.root.after(0, lambda: self._draw_vu_meter(self.audio_data))
+            self.level_feed.publish(audio_chunk)
         except:
             pass
     
+    def get_render_stats(self) -> dict:
+        """VU meter redraw cost and Tk event loop lag"""
+        stats = self.render_stats
+        return {
+            'frames': stats['frames'],
+            'draw_ms_avg': stats['draw_ms_total'] / max(1, stats['frames']),
+            'draw_ms_max': stats['draw_ms_max'],
+            'lag_ms_avg': stats['lag_ms_total'] / max(1, stats['ticks']),
+            'lag_ms_max': stats['lag_ms_max'],
+        }
+    
     def update_status(self, status: str, color: str = '#00ff88'):
         """Update status display"""
         self.status_var.set(status)
@@ -213,13 +230,28 @@ class VoiceAssistantGUI:
     
     def _start_visualization_loop(self):
         """Continuous visualization update"""
-        self.root.after(50, self._visualization_update)
+        self._next_tick = time.perf_counter() + self.frame_interval_ms / 1000
+        self.root.after(self.frame_interval_ms, self._visualization_update)
     
     def _visualization_update(self):
-        """Update visualization every 50ms"""
-        if self.canvas:
-            self._draw_vu_meter(self.audio_data)
-        self.root.after(50, self._visualization_update)
+        """Redraw VU meter at GUI_VU_FPS when new levels arrived"""
+        now = time.perf_counter()
+        stats = self.render_stats
+        lag_ms = max(0.0, (now - self._next_tick) * 1000)
+        stats['ticks'] += 1
+        stats['lag_ms_total'] += lag_ms
+        stats['lag_ms_max'] = max(stats['lag_ms_max'], lag_ms)
+        
+        update = self.level_feed.take()
+        if self.canvas and update:
+            self._draw_vu_meter(*update)
+            draw_ms = (time.perf_counter() - now) * 1000
+            stats['frames'] += 1
+            stats['draw_ms_total'] += draw_ms
+            stats['draw_ms_max'] = max(stats['draw_ms_max'], draw_ms)
+        
+        self._next_tick = now + self.frame_interval_ms / 1000
+        self.root.after(self.frame_interval_ms, self._visualization_update)
     
     def _on_start(self):
         """Start assistant"""